@@ -1,22 +1,27 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
+from app.db.session import get_async_db, get_db
 from app.models.user import User
 from app.models.profile import Profile
 from app.models.preferences import Preferences
 from app.core.security import (
+    access_token_claims,
     create_access_token,
-    verify_password,
-    get_password_hash,
+    revoked_users,
     get_current_user,
 )
 from app.core.config import settings
+from app.core.passwords import password_hasher
+from app.core.principal import principal_cache
 from app.schemas.token import Token
 from app.schemas.user import UserCreate, UserResponse
-from app.services.spotify import SpotifyService
+from app.services.spotify import SyncSpotifyService
+from app.services.spotify_tokens import spotify_token_fields
 
 router = APIRouter()
 
@@ -24,69 +29,87 @@ router = APIRouter()
 @router.post(
     "/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED
 )
-def register(user_in: UserCreate, db: Session = Depends(get_db)):
+async def register(user_in: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Register a new user.
     """
     # Check if user with this email already exists
-    db_user = db.query(User).filter(User.email == user_in.email).first()
+    db_user = await db.scalar(select(User).where(User.email == user_in.email).limit(1))
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered"
         )
 
-    # Create new user
-    hashed_password = get_password_hash(user_in.password)
+    # Create new user; bcrypt runs in the password worker pool, not on the event loop
+    hashed_password = await password_hasher.hash_async(user_in.password)
     db_user = User(email=user_in.email, hashed_password=hashed_password, is_active=True)
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
 
     # Create profile for user if name is provided
     if user_in.name:
         profile = Profile(user_id=db_user.id, name=user_in.name)
         db.add(profile)
-        db.commit()
-        db.refresh(profile)
+        await db.commit()
+        await db.refresh(profile)
 
         # Create empty preferences
         preferences = Preferences(profile_id=profile.id)
         db.add(preferences)
-        db.commit()
+        await db.commit()
 
     return db_user
 
 
 @router.post("/login", response_model=Token)
-def login(
-    form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
+async def login(
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     OAuth2 compatible token login, get an access token for future requests.
     """
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = await db.scalar(select(User).where(User.email == form_data.username).limit(1))
+    verified, new_hash = False, None
+    if user:
+        # bcrypt runs in the password worker pool, not on the event loop
+        verified, new_hash = await password_hasher.verify_and_update_async(
+            form_data.password, user.hashed_password
+        )
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    if user.is_active:
+        # The user may have been reactivated since their last rejected request
+        revoked_users.restore(user.id)
+
+    if new_hash:
+        # Upgrade hashes made with an outdated work factor while the password is at hand
+        user.hashed_password = new_hash
+        await db.commit()
+        principal_cache.invalidate(user.id)
+
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data=access_token_claims(user), expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
 
 @router.post("/token", response_model=Token)
-def login_for_access_token(
-    form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
+async def login_for_access_token(
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     OAuth2 compatible token login, get an access token for future requests.
     """
-    return login(form_data, db)
+    return await login(form_data, db)
 
 
 @router.post("/refresh-token", response_model=Token)
@@ -96,7 +119,7 @@ def refresh_token(current_user: User = Depends(get_current_user)):
     """
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": current_user.email}, expires_delta=access_token_expires
+        data=access_token_claims(current_user), expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -163,7 +186,7 @@ def spotify_callback(
         db.refresh(preferences)
 
     # Exchange code for access token
-    spotify_service = SpotifyService()
+    spotify_service = SyncSpotifyService()
     redirect_uri = f"{settings.SPOTIFY_REDIRECT_URL}/api/v1/auth/spotify/callback"
     token_data = spotify_service.get_access_token(code, redirect_uri)
 
@@ -173,17 +196,13 @@ def spotify_callback(
             detail=f"Spotify token error: {token_data['error']}",
         )
 
-    # Store token in user preferences
+    # Store token in user preferences, with its absolute expiry for proactive refreshes
     preferences.spotify_connected = True
-    preferences.spotify_data = {
-        "access_token": token_data.get("access_token"),
-        "refresh_token": token_data.get("refresh_token"),
-        "expires_in": token_data.get("expires_in"),
-        "token_type": token_data.get("token_type"),
-    }
+    preferences.spotify_data = spotify_token_fields(token_data)
 
     db.add(preferences)
     db.commit()
+    principal_cache.invalidate(user.id)
 
     # Return success message with redirect URL
     return {
@@ -1,50 +1,90 @@
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, status
 
 from app.core.security import get_current_user
+from app.db.pool import pool_metrics
+from app.db.session import async_engine, async_replica_engine, engine, replica_engine
 from app.models.user import User
-from app.services.exercise import ExerciseService
-from app.db.session import get_db
-from sqlalchemy.orm import Session
-from app.models.workout import Exercise
+from app.services.catalog_sync import SyncAlreadyRunning, catalog_sync_jobs
 
 router = APIRouter()
 
-@router.post("/database/sync-external-source")
+@router.post("/database/sync-external-source", status_code=status.HTTP_202_ACCEPTED)
 def synchronize_database(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user)
 ):
     """_summary_
-    Synchronize the database with ExerciseDB API
+    Start synchronizing the database with ExerciseDB API in the background
+
+    Only new and changed exercises are written; exercises removed from ExerciseDB
+    are deactivated so existing workouts keep referencing them. Poll
+    GET /database/sync-external-source/{job_id} for progress.
 
     Args:
         current_user (User, optional): _description_. Defaults to Depends(get_current_user).
 
+    Raises:
+        HTTPException: If a sync is already running
+
     Returns:
-        _type_: _description_
+        _type_: The started sync job
     """
     
-    exercise_service = ExerciseService(db)
-    # Delete all existing exercises
-    db.query(Exercise).delete()    
-    db.commit()
-    # Fetch all exercises from ExerciseDB API
-    
-    exercises = [{
-        "id": ex["id"],
-        "name": ex["name"],
-        "body_part": ex["bodyPart"],
-        "target": ex["target"],
-        "secondary_muscles": ex["secondaryMuscles"],
-        "equipment": ex["equipment"],
-        "gif_url": ex["gifUrl"],
-        "instructions": ex["instructions"]
-    } for ex in exercise_service.get_exercises_from_external_source(params={"limit": 1324})]
+    try:
+        job = catalog_sync_jobs.start()
+    except SyncAlreadyRunning as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Catalog sync {e.job.id} is already running"
+        )
     
-    # Update Exercise table with fetched data
-    db.bulk_insert_mappings(Exercise, exercises)  
-        
-    db.commit()
+    return job.to_dict()
+
+@router.get("/database/sync-external-source/{job_id}")
+def read_sync_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """_summary_
+    Get the progress of a catalog sync job
+
+    Args:
+        job_id (str): _description_
+        current_user (User, optional): _description_. Defaults to Depends(get_current_user).
+
+    Raises:
+        HTTPException: If the job does not exist
+
+    Returns:
+        _type_: Pages fetched, rows written, errors, throughput and final counts
+    """
+    job = catalog_sync_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Sync job not found"
+        )
     
-    return {"message": "Database synchronized successfully"}
+    return job.to_dict()
+
+@router.get("/database/pool-metrics")
+def read_pool_metrics(
+    current_user: User = Depends(get_current_user)
+):
+    """_summary_
+    Get connection pool occupancy and checkout wait times
+
+    Args:
+        current_user (User, optional): _description_. Defaults to Depends(get_current_user).
+
+    Returns:
+        _type_: Checked-out and overflow connections plus a checkout wait histogram, per engine
+    """
+    metrics = {
+        "sync": pool_metrics(engine.pool),
+        "async": pool_metrics(async_engine.sync_engine.pool),
+    }
+    if replica_engine is not engine:
+        metrics["replica_sync"] = pool_metrics(replica_engine.pool)
+        metrics["replica_async"] = pool_metrics(async_replica_engine.sync_engine.pool)
+    return metrics
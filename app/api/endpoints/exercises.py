@@ -1,17 +1,27 @@
-from typing import List
+from typing import List, Optional
 
-from app.api.endpoints.workouts import EXERCISE_NOT_FOUND
+from app.api.endpoints.workouts import EXERCISE_NOT_FOUND, INVALID_CURSOR
 from app.core.security import get_current_user
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.models.user import User
 from app.models.workout import Exercise
 from app.schemas.exercise import (ExerciseCreate, ExerciseResponse, ExerciseSearch,
-                                  ExerciseUpdate)
-from fastapi import APIRouter, Depends, HTTPException, status
+                                  ExerciseSuggestion, ExerciseUpdate)
+from app.services.catalog_export import exercise_catalog_export
+from app.services.exercise import ExerciseService
+from app.services.exercise_catalog import exercise_catalog
+from app.services.typeahead import exercise_typeahead
+from app.utils.pagination import (NEXT_CURSOR_HEADER, InvalidCursor, decode_cursor,
+                                  encode_cursor)
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
 
 router = APIRouter()
 
+DEFAULT_SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 50  # Hard cap, search never returns the whole catalog
+MAX_AUTOCOMPLETE_LIMIT = 25
+
 @router.post("/", response_model=ExerciseResponse, status_code=status.HTTP_201_CREATED)
 def create_exercise(exercise: ExerciseCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     """_summary_
@@ -27,58 +37,158 @@ def create_exercise(exercise: ExerciseCreate, db: Session = Depends(get_db), cur
     db_exercise = Exercise(**exercise.model_dump())    
     db.add(db_exercise)
     db.commit()
+    exercise_catalog.invalidate()
     db.refresh(db_exercise)    
     return db_exercise
 
 @router.get("/", response_model=List[ExerciseResponse])
-def read_exercises(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def read_exercises(
+    response: Response,
+    skip: int = 0,
+    limit: int = Query(100, ge=1),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
     """_summary_
 
     Args:
-        skip (int, optional): _description_. Defaults to 0.
+        response (Response): _description_
+        skip (int, optional): Ignored when a cursor is given. Defaults to 0.
         limit (int, optional): _description_. Defaults to 100.
-        db (Session, optional): _description_. Defaults to Depends(get_db).
+        cursor (Optional[str], optional): The X-Next-Cursor header of the previous page. Defaults to None.
+        db (Session, optional): _description_. Defaults to Depends(get_read_db).
+
+    Raises:
+        HTTPException: _description_
 
     Returns:
         _type_: _description_
-    """    
-    exercises = db.query(Exercise).offset(skip).limit(limit).all()    
+    """
+    try:
+        position = decode_cursor(cursor)
+        after_id = int(position["id"]) if position else None
+    except (InvalidCursor, KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail=INVALID_CURSOR)
+
+    query = db.query(Exercise).filter(Exercise.is_active.is_(True))
+    if after_id is not None:
+        query = query.filter(Exercise.id > after_id)
+    else:
+        query = query.offset(skip)
+
+    # Fetch one extra row to know whether there is a next page
+    exercises = query.order_by(Exercise.id).limit(limit + 1).all()
+    if len(exercises) > limit:
+        exercises = exercises[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor({"id": exercises[-1].id})
     return exercises
 
 @router.post("/search", response_model=List[ExerciseResponse])
-def search_exercises(search_query: ExerciseSearch, db: Session = Depends(get_db)):
+def search_exercises(
+    search_query: ExerciseSearch,
+    response: Response,
+    limit: int = Query(DEFAULT_SEARCH_PAGE_SIZE, ge=1, le=MAX_SEARCH_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
     """_summary_
 
     Args:
-        search_query (str): _description_
+        search_query (ExerciseSearch): _description_
+        response (Response): _description_
+        limit (int, optional): _description_. Defaults to DEFAULT_SEARCH_PAGE_SIZE.
+        cursor (Optional[str], optional): The X-Next-Cursor header of the previous page. Defaults to None.
         db (Session, optional): _description_. Defaults to Depends(get_db).
 
+    Raises:
+        HTTPException: _description_
+
     Returns:
         _type_: _description_
     """
-    query = db.query(Exercise)
-    if search_query.name:
-        query = query.filter(Exercise.name.ilike(f"%{search_query.name}%"))
-        
-    if search_query.body_part:
-        query = query.filter(Exercise.body_part.ilike(f"%{search_query.body_part}%"))
-        
-    if search_query.target:
-        query = query.filter(Exercise.target.ilike(f"%{search_query.target}%"))
-    
-    if search_query.equipment:
-        query = query.filter(Exercise.equipment.ilike(f"%{search_query.equipment}%"))
-        
-    exercises = query.all()
-    return exercises
+    try:
+        position = decode_cursor(cursor)
+        after = (float(position["score"]), int(position["id"])) if position else None
+    except (InvalidCursor, KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail=INVALID_CURSOR)
+
+    # Fetch one extra row to know whether there is a next page
+    results = ExerciseService(db).search_exercises(
+        name=search_query.name,
+        body_part=search_query.body_part,
+        target=search_query.target,
+        equipment=search_query.equipment,
+        limit=limit + 1,
+        after=after
+    )
+    if len(results) > limit:
+        results = results[:limit]
+        last_exercise, last_score = results[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor({"score": last_score, "id": last_exercise.id})
+
+    return [exercise for exercise, _ in results]
+
+@router.get("/autocomplete", response_model=List[ExerciseSuggestion])
+def autocomplete_exercises(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=MAX_AUTOCOMPLETE_LIMIT),
+    db: Session = Depends(get_read_db)
+):
+    """_summary_
+
+    Args:
+        q (str): The exercise name typed so far.
+        limit (int, optional): _description_. Defaults to 10.
+        db (Session, optional): Only used when the catalog has to be reloaded. Defaults to Depends(get_read_db).
+
+    Returns:
+        _type_: _description_
+    """
+    suggestions = exercise_typeahead.get(db).suggest(q, limit=limit)
+    return [
+        ExerciseSuggestion(
+            id=exercise.id,
+            name=exercise.name,
+            target=exercise.target,
+            equipment=exercise.equipment,
+            gif_url=exercise.gif_url,
+            typos=typos
+        )
+        for exercise, typos in suggestions
+    ]
+
+@router.get("/snapshot", response_class=Response)
+def download_exercise_snapshot(request: Request, db: Session = Depends(get_read_db)):
+    """_summary_
+
+    Args:
+        request (Request): Read for the If-None-Match and Accept-Encoding headers.
+        db (Session, optional): Only used when the catalog has to be reloaded. Defaults to Depends(get_read_db).
+
+    Returns:
+        Response: The whole catalog as compressed JSON, or 304 if the client copy is current.
+    """
+    export = exercise_catalog_export.get(db)
+    etag = f'"{export.etag}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+
+    if_none_match = request.headers.get("if-none-match", "")
+    client_etags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if etag in client_etags or "*" in client_etags:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    encoding = export.negotiate(request.headers.get("accept-encoding"))
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=export.bodies[encoding], media_type="application/json", headers=headers)
 
 @router.get("/{exercise_id}", response_model=ExerciseResponse)
-def read_exercise(exercise_id: int, db: Session = Depends(get_db)):
+def read_exercise(exercise_id: int, db: Session = Depends(get_read_db)):
     """_summary_
 
     Args:
         exercise_id (int): _description_
-        db (Session, optional): _description_. Defaults to Depends(get_db).
+        db (Session, optional): _description_. Defaults to Depends(get_read_db).
 
     Raises:
         HTTPException: _description_
@@ -113,6 +223,7 @@ def update_exercise(exercise_id: int, exercise: ExerciseUpdate, db: Session = De
     for key, value in exercise.model_dump(exclude_unset=True).items():        
         setattr(db_exercise, key, value)
     db.commit()
+    exercise_catalog.invalidate()
     db.refresh(db_exercise)    
     return db_exercise
 
@@ -136,4 +247,5 @@ def delete_exercise(exercise_id: int, db: Session = Depends(get_db), current_use
         raise HTTPException(status_code=404, detail=EXERCISE_NOT_FOUND)    
     db.delete(db_exercise)
     db.commit()
+    exercise_catalog.invalidate()
     return {"ok": True}
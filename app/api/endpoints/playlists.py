@@ -5,13 +5,13 @@ from typing import List, Dict, Any
 
 from app.db.session import get_db
 from app.models.user import User
-from app.models.profile import Profile
-from app.models.preferences import Preferences
 from app.models.workout import Workout
 from app.services.gemini import GeminiService
 from app.services.spotify import SpotifyService
 from app.services.playlist_selector import PlaylistSelectorService
-from app.core.security import get_current_user
+from app.services.spotify_tokens import spotify_tokens
+from app.core.principal import Principal
+from app.core.security import get_current_principal, get_current_principal_async, get_current_user
 
 router = APIRouter()
 
@@ -34,22 +34,19 @@ def get_spotify_auth_url(
 async def get_spotify_recommendations(
     workout_type: str = None,
     duration_minutes: int = 60,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    principal: Principal = Depends(get_current_principal_async),
 ):
     """
     Get Spotify playlist recommendations based on user preferences and workout type.
     """
-    # Get user profile and preferences
-    profile = db.query(Profile).filter(Profile.user_id == current_user.id).first()
+    # Profile and preferences are loaded together with the current user
+    profile = principal.profile
     if not profile:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found"
         )
 
-    preferences = (
-        db.query(Preferences).filter(Preferences.profile_id == profile.id).first()
-    )
+    preferences = principal.preferences
     if not preferences:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Preferences not found"
@@ -101,22 +98,18 @@ async def get_spotify_recommendations(
 
 
 @router.get("/spotify/playlists")
-def get_user_playlists(
-    current_user: User = Depends(get_current_user), db: Session = Depends(get_db)
-):
+def get_user_playlists(principal: Principal = Depends(get_current_principal)):
     """
     Get user's Spotify playlists.
     """
     # Get user profile and preferences
-    profile = db.query(Profile).filter(Profile.user_id == current_user.id).first()
+    profile = principal.profile
     if not profile:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found"
         )
 
-    preferences = (
-        db.query(Preferences).filter(Preferences.profile_id == profile.id).first()
-    )
+    preferences = principal.preferences
     if not preferences:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Preferences not found"
@@ -145,6 +138,7 @@ def get_user_playlists(
 def get_playlist_for_workout(
     workout_id: int,
     current_user: User = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ):
     """
@@ -163,15 +157,13 @@ def get_playlist_for_workout(
         )
 
     # Get user profile and preferences
-    profile = db.query(Profile).filter(Profile.user_id == current_user.id).first()
+    profile = principal.profile
     if not profile:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found"
         )
 
-    preferences = (
-        db.query(Preferences).filter(Preferences.profile_id == profile.id).first()
-    )
+    preferences = principal.preferences
     if not preferences:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Preferences not found"
@@ -200,13 +192,8 @@ def get_playlist_for_workout(
             detail="Spotify access token not found",
         )
 
-    access_token = spotify_data["access_token"]
-
-    # Check if token needs to be refreshed
-    if "refresh_token" in spotify_data:
-        # In a real implementation, we would check if the token is expired
-        # and refresh it if needed
-        pass
+    # Refreshed first if it is about to expire
+    access_token = spotify_tokens.get_access_token(current_user.id, preferences)
 
     # Select a playlist for the workout
     playlist_selector = PlaylistSelectorService()
@@ -237,6 +224,7 @@ def get_playlist_for_workout(
 def refresh_playlist_for_workout(
     workout_id: int,
     current_user: User = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ):
     """
@@ -255,15 +243,13 @@ def refresh_playlist_for_workout(
         )
 
     # Get user profile and preferences
-    profile = db.query(Profile).filter(Profile.user_id == current_user.id).first()
+    profile = principal.profile
     if not profile:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found"
         )
 
-    preferences = (
-        db.query(Preferences).filter(Preferences.profile_id == profile.id).first()
-    )
+    preferences = principal.preferences
     if not preferences:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Preferences not found"
@@ -283,13 +269,8 @@ def refresh_playlist_for_workout(
             detail="Spotify access token not found",
         )
 
-    access_token = spotify_data["access_token"]
-
-    # Check if token needs to be refreshed
-    if "refresh_token" in spotify_data:
-        # In a real implementation, we would check if the token is expired
-        # and refresh it if needed
-        pass
+    # Refreshed first if it is about to expire
+    access_token = spotify_tokens.get_access_token(current_user.id, preferences)
 
     # Get the current playlist ID to avoid selecting it again
     recently_used_playlists = []
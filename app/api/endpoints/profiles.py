@@ -8,19 +8,17 @@ from app.models.profile import Profile
 from app.models.preferences import Preferences
 from app.schemas.profile import ProfileCreate, ProfileResponse, ProfileUpdate
 from app.schemas.preferences import PreferencesCreate, PreferencesResponse, PreferencesUpdate
-from app.core.security import get_current_user
+from app.core.principal import Principal, principal_cache
+from app.core.security import get_current_principal, get_current_user
 
 router = APIRouter()
 
 @router.get("/me", response_model=ProfileResponse)
-def read_profile_me(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
+def read_profile_me(principal: Principal = Depends(get_current_principal)):
     """
     Get current user's profile.
     """
-    profile = db.query(Profile).filter(Profile.user_id == current_user.id).first()
+    profile = principal.profile
     if not profile:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -57,6 +55,7 @@ def create_profile(
     )
     db.add(db_profile)
     db.commit()
+    principal_cache.invalidate(current_user.id)
     db.refresh(db_profile)
     
     return db_profile
@@ -83,25 +82,22 @@ def update_profile_me(
     
     db.add(profile)
     db.commit()
+    principal_cache.invalidate(current_user.id)
     db.refresh(profile)
     return profile
 
 @router.get("/me/preferences", response_model=PreferencesResponse)
-def read_preferences_me(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
+def read_preferences_me(principal: Principal = Depends(get_current_principal)):
     """
     Get current user's preferences.
     """
-    profile = db.query(Profile).filter(Profile.user_id == current_user.id).first()
-    if not profile:
+    if not principal.profile:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Profile not found"
         )
     
-    preferences = db.query(Preferences).filter(Preferences.profile_id == profile.id).first()
+    preferences = principal.preferences
     if not preferences:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -141,6 +137,7 @@ def create_preferences_me(
     )
     db.add(db_preferences)
     db.commit()
+    principal_cache.invalidate(current_user.id)
     db.refresh(db_preferences)
     
     return db_preferences
@@ -174,5 +171,6 @@ def update_preferences_me(
     
     db.add(preferences)
     db.commit()
+    principal_cache.invalidate(current_user.id)
     db.refresh(preferences)
     return preferences
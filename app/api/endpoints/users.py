@@ -1,21 +1,45 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from app.db.session import get_db
+from app.db.session import get_async_db, get_db
 from app.models.user import User
 from app.models.profile import Profile
-from app.schemas.user import UserCreate, UserResponse, UserUpdate
-from app.core.security import get_password_hash, get_current_user
+from app.schemas.user import UserCreate, UserImportReport, UserResponse, UserUpdate
+from app.core.principal import principal_cache
+from app.core.passwords import password_hasher
+from app.core.security import get_current_admin, get_current_user, get_current_user_async
 from app.api.endpoints.auth import register
+from app.services.user_import import IMPORT_FORMATS, detect_format, import_users_from_stream, text_stream
 router = APIRouter()
 
 @router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def create_user(user_in: UserCreate, db: Session = Depends(get_db)):
+async def create_user(user_in: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Create a new user.
     """
-    return register(user_in, db)
+    return await register(user_in, db)
+
+@router.post("/import", response_model=UserImportReport)
+def import_users(
+    file: UploadFile = File(..., description="NDJSON or CSV with email, password and optional name"),
+    file_format: Optional[str] = Query(None, alias="format", description="ndjson or csv, guessed from the file name if omitted"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """
+    Import users in bulk, reporting the rows that could not be imported. Admins only.
+    """
+    file_format = file_format or detect_format(file.filename)
+    if file_format not in IMPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported format, expected one of: {', '.join(IMPORT_FORMATS)}"
+        )
+
+    return import_users_from_stream(db, text_stream(file.file), file_format)
 
 @router.get("/me", response_model=UserResponse)
 def read_user_me(current_user: User = Depends(get_current_user)):
@@ -25,10 +49,10 @@ def read_user_me(current_user: User = Depends(get_current_user)):
     return current_user
 
 @router.put("/me", response_model=UserResponse)
-def update_user_me(
+async def update_user_me(
     user_in: UserUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     """
     Update current user.
@@ -37,13 +61,14 @@ def update_user_me(
     updated_user = current_user
 
     if user_in.password:
-        hashed_password = get_password_hash(user_in.password)
+        # bcrypt runs in the password worker pool, not on the event loop
+        hashed_password = await password_hasher.hash_async(user_in.password)
         updated_user.hashed_password = hashed_password
     
     if user_in.email:
         # Check if email is already taken
         if user_in.email != updated_user.email:
-            db_user = db.query(User).filter(User.email == user_in.email).first()
+            db_user = await db.scalar(select(User).where(User.email == user_in.email).limit(1))
             if db_user:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -52,8 +77,9 @@ def update_user_me(
         updated_user.email = user_in.email
     
     db.add(updated_user)
-    db.commit()
-    db.refresh(updated_user)
+    await db.commit()
+    principal_cache.invalidate(updated_user.id)
+    await db.refresh(updated_user)
     return updated_user
 
 @router.get("/{user_id}", response_model=UserResponse)
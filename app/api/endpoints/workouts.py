@@ -1,20 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
-from sqlalchemy.orm import Session, selectinload
-from typing import List
-from datetime import datetime, timedelta
-
-from app.db.session import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import ARRAY, Integer, String, cast, column, exists, func, or_, select, tuple_, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from typing import List, Optional, Tuple
+from datetime import date, datetime, timedelta
+
+from app.db.loaders import (EXERCISE_RESPONSE_COLUMNS, WORKOUT_DETAIL, WORKOUT_EXERCISES, WORKOUT_LIST,
+                            WORKOUT_SCHEDULE)
+from app.db.session import get_async_read_db, get_db, get_read_db
 from app.models.user import User
-from app.models.profile import Profile
-from app.models.preferences import Preferences
 from app.models.workout import Exercise, Workout, WorkoutExercise
 from app.schemas.workout import UserProfile, WorkoutAIResponse, WorkoutBase, WorkoutCreate, WorkoutResponse, WorkoutSuggest, WorkoutUpdate, ScheduleResponse, ScheduleRequest
-from app.schemas.exercise import WorkoutExerciseCreate, WorkoutExerciseResponse, WorkoutExerciseUpdate
-from app.core.security import get_current_user
+from app.schemas.exercise import ExerciseResponse, WorkoutExerciseCreate, WorkoutExerciseProgress, WorkoutExerciseResponse, WorkoutExerciseUpdate
+from app.core.principal import Principal
+from app.core.security import get_current_principal, get_current_principal_async, get_current_user, get_current_user_async
 from app.services.scheduler import SchedulerService
 from app.services.exercise_selector import ExerciseSelectorService
+from app.services.exercise_catalog import exercise_catalog
 from app.services.gemini import GeminiService
+from app.utils.pagination import NEXT_CURSOR_HEADER, InvalidCursor, decode_cursor, encode_cursor
 
 # Define constants for error messages
 WORKOUT_NOT_FOUND = "Workout not found"
@@ -22,29 +26,100 @@ EXERCISE_NOT_FOUND = "Exercise not found"
 PROFILE_NOT_FOUND = "Profile not found"
 PREFERENCES_NOT_FOUND = "Preferences not found"
 NO_WORKOUT_TODAY = "No workout scheduled for today"
+INVALID_CURSOR = "Invalid pagination cursor"
+DUPLICATE_EXERCISE_UPDATE = "Each exercise can only be updated once per request"
+
+
+def _load_workout(db: Session, workout_id: int) -> Workout:
+    """
+    (Re)load a workout with everything WorkoutResponse serializes.
+    """
+    return db.query(Workout).options(*WORKOUT_DETAIL).populate_existing().filter(Workout.id == workout_id).one()
+
+
+def _workouts_page_query(
+    user_id: int,
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    after: Optional[Tuple[Optional[datetime], int]],
+    skip: int,
+    limit: int
+):
+    """
+    Select one page of a user's workouts, most recent first. Fetches one extra row
+    to tell whether there is a next page.
+    """
+    query = select(Workout).options(*WORKOUT_LIST).where(Workout.user_id == user_id)
+
+    if start_date:
+        query = query.where(Workout.date >= start_date)
+    if end_date:
+        query = query.where(Workout.date <= end_date)
+
+    if after is not None:
+        after_date, after_id = after
+        if after_date is None:
+            # Undated workouts come last, ordered by id
+            query = query.where(Workout.date.is_(None), Workout.id < after_id)
+        else:
+            query = query.where(or_(
+                tuple_(Workout.date, Workout.id) < tuple_(after_date, after_id),
+                Workout.date.is_(None)
+            ))
+    else:
+        query = query.offset(skip)
+
+    return query.order_by(Workout.date.desc().nulls_last(), Workout.id.desc()).limit(limit + 1)
+
+
+def _day_workout_query(user_id: int, day: date):
+    """
+    Select a user's workout on a given day.
+    """
+    return select(Workout).options(*WORKOUT_DETAIL).where(
+        Workout.user_id == user_id,
+        Workout.date >= datetime.combine(day, datetime.min.time()),
+        Workout.date <= datetime.combine(day, datetime.max.time())
+    )
+
 
 router = APIRouter()
 
 @router.get("/", response_model=List[WorkoutResponse])
-def read_workouts(
+async def read_workouts(
+    response: Response,
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1),
     start_date: datetime = None,
     end_date: datetime = None,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
-    Get all workouts for the current user.
-    """
-    query = db.query(Workout).options(selectinload(Workout.workout_exercises).selectinload(WorkoutExercise.exercise)).filter(Workout.user_id == current_user.id)
-
-    if start_date:
-        query = query.filter(Workout.date >= start_date)
-    if end_date:
-        query = query.filter(Workout.date <= end_date)
+    Get all workouts for the current user, most recent first.
 
-    workouts = query.order_by(Workout.date.desc()).offset(skip).limit(limit).all()
+    Pass the X-Next-Cursor header of a page as `cursor` to get the next one;
+    `skip` is ignored when a cursor is given.
+    """
+    try:
+        position = decode_cursor(cursor)
+        after = None
+        if position:
+            after_date = datetime.fromisoformat(position["date"]) if position["date"] is not None else None
+            after = (after_date, int(position["id"]))
+    except (InvalidCursor, KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail=INVALID_CURSOR)
+
+    query = _workouts_page_query(current_user.id, start_date, end_date, after, skip, limit)
+    workouts = (await db.scalars(query)).all()
+    if len(workouts) > limit:
+        workouts = workouts[:limit]
+        last = workouts[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor({
+            "date": last.date.isoformat() if last.date else None,
+            "id": last.id
+        })
     return workouts
 
 @router.post("/suggest-workout-today", response_model=WorkoutResponse, status_code=status.HTTP_201_CREATED)
@@ -85,12 +160,9 @@ def create_random_workout(
         for _, exercise_data in enumerate(workout_exercises)
     ]
     db.bulk_save_objects(exercises_to_add)
-    db_workout.exercises = db.query(WorkoutExercise).filter(WorkoutExercise.workout_id == db_workout.id).order_by(WorkoutExercise.order)
     db.commit()
-    db.refresh(db_workout)
 
-    
-    return db_workout
+    return _load_workout(db, db_workout.id)
 
 @router.post("/", response_model=WorkoutResponse, status_code=status.HTTP_201_CREATED)
 def create_workout(
@@ -120,14 +192,13 @@ def create_workout(
             db.add(db_exercise)
 
         db.commit()
-        db.refresh(db_workout)
 
-    return db_workout
+    return _load_workout(db, db_workout.id)
 
 @router.get("/today", response_model=WorkoutResponse)
-def get_today_workout(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_today_workout(
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Get today's workout.
@@ -135,11 +206,7 @@ def get_today_workout(
     today = datetime.now().date()
 
     # Get workout for today
-    workout = db.query(Workout).filter(
-        Workout.user_id == current_user.id,
-        Workout.date >= datetime.combine(today, datetime.min.time()),
-        Workout.date <= datetime.combine(today, datetime.max.time())
-    ).first()
+    workout = (await db.scalars(_day_workout_query(current_user.id, today))).unique().first()
 
     if not workout:
         raise HTTPException(
@@ -151,18 +218,18 @@ def get_today_workout(
 
 
 @router.get("/{workout_id}", response_model=WorkoutResponse)
-def read_workout(
+async def read_workout(
     workout_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Get a specific workout by ID.
     """
-    workout = db.query(Workout).filter(
+    workout = (await db.scalars(select(Workout).options(*WORKOUT_DETAIL).where(
         Workout.id == workout_id,
         Workout.user_id == current_user.id
-    ).first()
+    ))).unique().first()
 
     if not workout:
         raise HTTPException(
@@ -199,8 +266,7 @@ def update_workout(
 
     db.add(workout)
     db.commit()
-    db.refresh(workout)
-    return workout
+    return _load_workout(db, workout.id)
 
 @router.delete("/{workout_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_workout(
@@ -230,7 +296,7 @@ def delete_workout(
 def read_workout_exercises(
     workout_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get all exercises for a specific workout.
@@ -247,7 +313,7 @@ def read_workout_exercises(
             detail=WORKOUT_NOT_FOUND
         )
 
-    exercises = db.query(WorkoutExercise).filter(
+    exercises = db.query(WorkoutExercise).options(*WORKOUT_EXERCISES).filter(
         WorkoutExercise.workout_id == workout_id
     ).order_by(WorkoutExercise.order).all()
 
@@ -340,6 +406,78 @@ def update_workout_exercise(
     db.refresh(exercise)
     return exercise
 
+@router.patch("/{workout_id}/exercises", response_model=List[WorkoutExerciseResponse])
+def update_workout_exercises_progress(
+    workout_id: int,
+    progress_in: List[WorkoutExerciseProgress],
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Record progress for several exercises of a workout at once.
+
+    All updates are applied by a single UPDATE ... FROM (VALUES ...) statement,
+    which also checks that the workout belongs to the current user. Fields left
+    out (or null) keep their current value. Either every exercise is updated or
+    none is.
+    """
+    if not progress_in:
+        return []
+    if len({progress.exercise_id for progress in progress_in}) != len(progress_in):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=DUPLICATE_EXERCISE_UPDATE
+        )
+
+    progress = values(
+        column("exercise_id", Integer),
+        column("completed_sets", Integer),
+        column("weights_used", ARRAY(String)),
+        name="progress"
+    ).data([
+        (progress.exercise_id, progress.completed_sets, progress.weights_used)
+        for progress in progress_in
+    ])
+
+    stmt = (
+        update(WorkoutExercise)
+        .where(
+            WorkoutExercise.workout_id == workout_id,
+            WorkoutExercise.exercise_id == progress.c.exercise_id,
+            Exercise.id == WorkoutExercise.exercise_id,
+            exists().where(Workout.id == workout_id, Workout.user_id == current_user.id)
+        )
+        .values(
+            # NULLs in VALUES are untyped, so cast before falling back to the current value
+            completed_sets=func.coalesce(cast(progress.c.completed_sets, Integer), WorkoutExercise.completed_sets),
+            weights_used=func.coalesce(cast(progress.c.weights_used, ARRAY(String)), WorkoutExercise.weights_used)
+        )
+        .returning(
+            *WorkoutExercise.__table__.columns,
+            *(column.label(f"exercise__{column.key}") for column in EXERCISE_RESPONSE_COLUMNS)
+        )
+        .execution_options(synchronize_session=False)
+    )
+    rows = db.execute(stmt).mappings().all()
+
+    if len(rows) != len(progress_in):
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=EXERCISE_NOT_FOUND if rows else WORKOUT_NOT_FOUND
+        )
+    db.commit()
+
+    return [
+        WorkoutExerciseResponse(
+            **{column.key: row[column.key] for column in WorkoutExercise.__table__.columns},
+            exercise=ExerciseResponse(**{
+                column.key: row[f"exercise__{column.key}"] for column in EXERCISE_RESPONSE_COLUMNS
+            })
+        )
+        for row in sorted(rows, key=lambda row: row["order"])
+    ]
+
 @router.delete("/{workout_id}/exercises/{exercise_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_workout_exercise(
     workout_id: int,
@@ -382,13 +520,14 @@ def delete_workout_exercise(
 def generate_workout_schedule(
     schedule_request: ScheduleRequest = None,
     current_user: User = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
     Generate a weekly workout schedule based on user preferences.
     """
     # Get user profile
-    profile = db.query(Profile).filter(Profile.user_id == current_user.id).first()
+    profile = principal.profile
     if not profile:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -396,7 +535,7 @@ def generate_workout_schedule(
         )
 
     # Get user preferences
-    preferences = db.query(Preferences).filter(Preferences.profile_id == profile.id).first()
+    preferences = principal.preferences
     if not preferences:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -411,7 +550,7 @@ def generate_workout_schedule(
     start_of_week = today - timedelta(days=today.weekday())
     end_of_week = start_of_week + timedelta(days=6)
 
-    existing_workouts = db.query(Workout).filter(
+    existing_workouts = db.query(Workout).options(*WORKOUT_SCHEDULE).filter(
         Workout.user_id == current_user.id,
         Workout.date >= datetime.combine(start_of_week, datetime.min.time()),
         Workout.date <= datetime.combine(end_of_week, datetime.max.time())
@@ -424,14 +563,8 @@ def generate_workout_schedule(
             message="Returning existing workout schedule"
         )
 
-    # If regenerate flag is set, delete existing workouts
-    if existing_workouts and regenerate:
-        for workout in existing_workouts:
-            db.delete(workout)
-        db.commit()
-
     # Generate new workout schedule
-    scheduler_service = SchedulerService()
+    scheduler_service = SchedulerService(db)
     workouts_data = scheduler_service.generate_weekly_schedule(
         user_id=current_user.id,
         available_days=profile.available_days,
@@ -442,29 +575,14 @@ def generate_workout_schedule(
         workout_duration_minutes=profile.workout_duration_minutes
     )
 
-    # Create workouts in the database
-    created_workouts = []
-    for workout_data in workouts_data:
-        exercises = workout_data.pop("exercises", [])
-
-        # Create workout
-        workout = Workout(**workout_data)
-        db.add(workout)
-        db.commit()
-        db.refresh(workout)
-
-        # Add exercises to workout
-        for i, exercise_data in enumerate(exercises):
-            exercise = WorkoutExercise(
-                workout_id=workout.id,
-                order=i + 1,
-                **exercise_data
-            )
-            db.add(exercise)
-
-        db.commit()
-        db.refresh(workout)
-        created_workouts.append(workout)
+    # Replace the existing workouts (if regenerating) and create the new ones in one transaction
+    workout_ids = scheduler_service.save_weekly_schedule(
+        workouts_data,
+        replace_workout_ids=[workout.id for workout in existing_workouts]
+    )
+    created_workouts = db.query(Workout).options(*WORKOUT_SCHEDULE).filter(
+        Workout.id.in_(workout_ids)
+    ).order_by(Workout.date, Workout.id).all()
 
     return ScheduleResponse(
         workouts=created_workouts,
@@ -476,6 +594,7 @@ def swap_workout_exercise(
     workout_id: int,
     exercise_id: int,
     current_user: User = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
@@ -495,25 +614,29 @@ def swap_workout_exercise(
 
     # Get the exercise
     exercise = db.query(WorkoutExercise).filter(
-        WorkoutExercise.id == exercise_id,
+        WorkoutExercise.exercise_id == exercise_id,
         WorkoutExercise.workout_id == workout_id
     ).first()
 
-    if not exercise:
+    # Muscle group and equipment come from the catalog index instead of another query.
+    # The catalog holds active exercises only; ones deactivated by the sync are still in the table
+    catalog_exercise = exercise_catalog.get(db).get_exercise_by_id(exercise_id) or db.get(Exercise, exercise_id)
+
+    if not exercise or not catalog_exercise:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=EXERCISE_NOT_FOUND
         )
 
     # Get user profile and preferences
-    profile = db.query(Profile).filter(Profile.user_id == current_user.id).first()
+    profile = principal.profile
     if not profile:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=PROFILE_NOT_FOUND
         )
 
-    preferences = db.query(Preferences).filter(Preferences.profile_id == profile.id).first()
+    preferences = principal.preferences
     if not preferences:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -525,14 +648,14 @@ def swap_workout_exercise(
         WorkoutExercise.workout_id == workout_id
     ).all()
 
-    recently_used_exercises = [ex.exercise_id for ex in workout_exercises if ex.id != exercise_id]
+    recently_used_exercises = [ex.exercise_id for ex in workout_exercises if ex.exercise_id != exercise_id]
 
     # Use the exercise selector service to find a replacement
     exercise_selector = ExerciseSelectorService(db)
     new_exercise_data = exercise_selector.swap_exercise(
         exercise_id=exercise.exercise_id,
-        muscle_group=exercise.muscle_group,
-        equipment=exercise.equipment,
+        muscle_group=catalog_exercise.target,
+        equipment=catalog_exercise.equipment,
         fitness_level=profile.fitness_level.value,
         available_equipment=preferences.available_equipment,
         recently_used_exercises=recently_used_exercises
@@ -559,20 +682,19 @@ def swap_workout_exercise(
 @router.post("/ai-recommendations", response_model=WorkoutAIResponse)
 async def get_ai_workout_recommendations(
     workout_type: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal_async),
     gemini_service: GeminiService = Depends(lambda: GeminiService())
 ):
     """Get AI-enhanced workout recommendations."""
-    # we can get user profile based on current_user
-    profile = db.query(Profile).filter(Profile.user_id == current_user.id).first()
+    # Profile and preferences are loaded together with the current user
+    profile = principal.profile
     if not profile:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=PROFILE_NOT_FOUND
         )
 
-    preferences = db.query(Preferences).filter(Preferences.profile_id == profile.id).first()
+    preferences = principal.preferences
     if not preferences:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import List, Optional
 import os
 from dotenv import load_dotenv
 
@@ -18,16 +18,76 @@ class Settings(BaseSettings):
     SPOTIFY_REDIRECT_URL: str = os.getenv(
         "SPOTIFY_REDIRECT_URL", "http://localhost:8000"
     )
+    # Optional read-only replica that GET handlers read from
+    DATABASE_REPLICA_URI: Optional[str] = os.getenv("DATABASE_REPLICA_URI")
+    # After a user writes, their reads stay on the primary this long (must exceed replica lag)
+    DATABASE_REPLICA_STICKINESS_SECONDS: float = 5
+    # Connection pool of each engine (sync and async). pool_size + max_overflow should
+    # cover the ~40 worker threads FastAPI runs sync endpoints on
+    DATABASE_POOL_SIZE: int = 10
+    DATABASE_MAX_OVERFLOW: int = 30
+    DATABASE_POOL_TIMEOUT_SECONDS: float = 30
+    DATABASE_POOL_RECYCLE_SECONDS: int = 60 * 30  # Reconnect before idle server timeouts
+    DATABASE_POOL_PRE_PING: bool = True
+    # Connect through PgBouncer in transaction pooling mode: no app-side pool, no prepared statements
+    DATABASE_PGBOUNCER_TRANSACTION_MODE: bool = False
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8  # 8 days
+    # Authenticated user + profile + preferences kept in process between requests
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 30
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+    # Verified access tokens remembered until they expire, so each is HMAC-checked once
+    TOKEN_CACHE_MAX_ENTRIES: int = 10000
+    # Deactivated users are rejected without a lookup for this long, then checked again
+    REVOKED_USERS_TTL_SECONDS: float = 60
+    # bcrypt work factor; stored hashes with another factor are re-hashed at login
+    BCRYPT_ROUNDS: int = 12
+    # Password hashing runs in its own process pool, rejecting work beyond max pending with 503
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 16
+    PASSWORD_HASH_RETRY_AFTER_SECONDS: int = 1
+    # Users written per transaction by the bulk import
+    USER_IMPORT_CHUNK_SIZE: int = 500
+    # Password hashing processes of the import endpoint, separate from the login pool
+    USER_IMPORT_HASH_WORKERS: int = 1
+    # Emails of the users allowed to run admin-only endpoints such as the bulk import (JSON list)
+    ADMIN_EMAILS: List[str] = []
 
     # Spotify API settings
     SPOTIFY_CLIENT_ID: Optional[str] = os.getenv("SPOTIFY_CLIENT_ID")
     SPOTIFY_CLIENT_SECRET: Optional[str] = os.getenv("SPOTIFY_CLIENT_SECRET")
+    # Per-request timeouts and the keep-alive pool of the shared Spotify HTTP client
+    SPOTIFY_TIMEOUT_SECONDS: float = 10
+    SPOTIFY_CONNECT_TIMEOUT_SECONDS: float = 3
+    SPOTIFY_MAX_CONNECTIONS: int = 20
+    SPOTIFY_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    SPOTIFY_KEEPALIVE_EXPIRY_SECONDS: float = 30
+    # Access tokens are refreshed this long before they expire
+    SPOTIFY_TOKEN_REFRESH_MARGIN_SECONDS: float = 300
+    # Bound on a token refresh call, made while the user's preferences row is locked
+    SPOTIFY_TOKEN_REFRESH_TIMEOUT_SECONDS: float = 3
 
     # Exercise API settings
     EXERCISE_API_KEY: Optional[str] = os.getenv("EXERCISE_API_KEY")
     EXERCISE_API_HOST: Optional[str] = os.getenv("EXERCISE_API_HOST")
+    # Serve exercise selection from the in-process catalog index instead of SQL
+    EXERCISE_CATALOG_ENABLED: bool = True
+    # Number of ExerciseDB records fetched and upserted per sync transaction
+    EXERCISE_SYNC_PAGE_SIZE: int = 200
+    # ExerciseDB response cache: off, readthrough, record or replay (serve recorded fixtures only)
+    EXERCISE_API_CACHE_MODE: str = "readthrough"
+    EXERCISE_API_CACHE_DIR: str = ".cache/exercisedb"
+    EXERCISE_API_CACHE_TTL_SECONDS: int = 60 * 60 * 24  # 1 day
+    EXERCISE_API_CACHE_STALE_SECONDS: int = 60 * 60 * 24 * 7  # Served while revalidating
+    # Maximum number of concurrent requests to ExerciseDB across the whole process
+    EXERCISE_API_MAX_CONCURRENCY: int = 4
     
+    # Log statement counts and DB time per request
+    SQL_INSTRUMENTATION_ENABLED: bool = False
+    # Also return them to clients as X-DB-* response headers; for local debugging only
+    SQL_INSTRUMENTATION_HEADERS: bool = False
+    # Log a possible N+1 when one statement shape runs more often than this in a request
+    SQL_REPEATED_STATEMENT_THRESHOLD: int = 5
+
     # Google Gemini settings
     GEMINI_API_KEY: str = os.getenv("GEMINI_API_KEY")
 
@@ -0,0 +1,191 @@
+"""
+Password hashing off the request path.
+
+bcrypt is deliberately slow, so hashing and verifying run in a small dedicated
+process pool instead of on the event loop or the request threadpool. The pool
+accepts a bounded number of pending jobs; once they are all taken, further
+requests are turned away with 503 and a Retry-After header instead of queueing
+until every worker thread is blocked on bcrypt.
+
+The bcrypt work factor comes from settings.BCRYPT_ROUNDS. Hashes made with a
+different work factor still verify, and verify_and_update returns a fresh hash
+for them so logins can upgrade them in place.
+"""
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from app.core.config import settings
+
+# Contexts of this process keyed by work factor, built on first use in each worker
+_contexts: Dict[int, CryptContext] = {}
+
+
+def _context(rounds: int) -> CryptContext:
+    context = _contexts.get(rounds)
+    if context is None:
+        # Hashes with any other work factor need an update
+        context = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__default_rounds=rounds,
+            bcrypt__min_rounds=rounds,
+            bcrypt__max_rounds=rounds,
+        )
+        _contexts[rounds] = context
+    return context
+
+
+def _hash_password(password: str, rounds: int) -> str:
+    return _context(rounds).hash(password)
+
+
+def _hash_passwords(passwords: List[str], rounds: int) -> List[str]:
+    context = _context(rounds)
+    return [context.hash(password) for password in passwords]
+
+
+def _verify_and_update(password: str, hashed_password: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    return _context(rounds).verify_and_update(password, hashed_password)
+
+
+def _process_pool(max_workers: int) -> Executor:
+    # Workers are spawned rather than forked from a process that already runs threads
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def _busy_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many password operations in progress, try again shortly",
+        headers={"Retry-After": str(settings.PASSWORD_HASH_RETRY_AFTER_SECONDS)},
+    )
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a size-limited worker pool with a bounded number of pending jobs.
+    """
+
+    def __init__(
+        self,
+        rounds: int,
+        max_workers: int,
+        max_pending: int,
+        executor_factory: Callable[[int], Executor] = _process_pool,
+    ):
+        self.rounds = rounds
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor_factory = executor_factory
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _submit(self, fn, *args) -> Future:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise _busy_exception()
+            if self._executor is None:
+                # Started on first use so importing the app spawns no processes
+                self._executor = self._executor_factory(self.max_workers)
+            self._pending += 1
+            try:
+                future = self._executor.submit(fn, *args)
+            except BaseException:
+                self._pending -= 1
+                raise
+        future.add_done_callback(self._finished)
+        return future
+
+    def _finished(self, _future: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def hash(self, password: str) -> str:
+        """
+        Hash a password, blocking the calling thread until a worker is done.
+
+        Raises:
+            HTTPException: 503 if too many password operations are pending
+        """
+        return self._submit(_hash_password, password, self.rounds).result()
+
+    def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a password, blocking the calling thread until a worker is done.
+
+        Returns:
+            Whether the password matches, and a new hash if the stored one is out of date
+
+        Raises:
+            HTTPException: 503 if too many password operations are pending
+        """
+        return self._submit(_verify_and_update, password, hashed_password, self.rounds).result()
+
+    def hash_many(self, passwords: List[str]) -> List[str]:
+        """
+        Hash a batch of passwords spread over all workers, blocking until done.
+
+        The batch is split into one job per worker, so it takes at most
+        max_workers of the pending slots.
+
+        Returns:
+            The hashes, in the order of the passwords
+
+        Raises:
+            HTTPException: 503 if too many password operations are pending
+        """
+        if not passwords:
+            return []
+        slice_size = -(-len(passwords) // self.max_workers)
+        futures = [
+            self._submit(_hash_passwords, passwords[start:start + slice_size], self.rounds)
+            for start in range(0, len(passwords), slice_size)
+        ]
+        return [hashed for future in futures for hashed in future.result()]
+
+    async def hash_async(self, password: str) -> str:
+        """
+        Hash a password without blocking the event loop.
+
+        Raises:
+            HTTPException: 503 if too many password operations are pending
+        """
+        return await asyncio.wrap_future(self._submit(_hash_password, password, self.rounds))
+
+    async def verify_and_update_async(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a password without blocking the event loop.
+
+        Returns:
+            Whether the password matches, and a new hash if the stored one is out of date
+
+        Raises:
+            HTTPException: 503 if too many password operations are pending
+        """
+        return await asyncio.wrap_future(
+            self._submit(_verify_and_update, password, hashed_password, self.rounds)
+        )
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(
+    settings.BCRYPT_ROUNDS,
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
@@ -0,0 +1,175 @@
+"""
+The authenticated principal: a user with their profile and preferences.
+
+get_current_user resolves it once per request. It is loaded with a single joined
+query and kept in a short-lived in-process cache, so warm requests authenticate
+without touching the database. Cached rows are stored as plain column values;
+each request gets fresh instances attached to its own session, so nothing ORM
+related is shared between requests.
+
+Call principal_cache.invalidate(user_id) after committing changes to a user,
+their profile or their preferences.
+"""
+import copy
+from typing import Any, Dict, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core.config import settings
+from app.models.preferences import Preferences
+from app.models.profile import Profile
+from app.models.user import User
+from app.utils.cache import TTLCache
+
+
+class Principal:
+    """
+    The current user with their profile and preferences, either of which may be missing.
+    """
+
+    def __init__(self, user: User, profile: Optional[Profile] = None, preferences: Optional[Preferences] = None):
+        self.user = user
+        self.profile = profile
+        self.preferences = preferences
+
+
+def principal_query(email: str):
+    """
+    Select a user with their profile and preferences in one query.
+    """
+    return (
+        select(User, Profile, Preferences)
+        .outerjoin(Profile, Profile.user_id == User.id)
+        .outerjoin(Preferences, Preferences.profile_id == Profile.id)
+        .where(User.email == email)
+        .limit(1)
+    )
+
+
+def _column_values(instance) -> Optional[Dict[str, Any]]:
+    if instance is None:
+        return None
+    return {attr.key: getattr(instance, attr.key) for attr in instance.__mapper__.column_attrs}
+
+
+def _restore(model, values: Optional[Dict[str, Any]]):
+    if values is None:
+        return None
+    # Mutable column values (arrays, JSONB) are copied so requests can't change the cache
+    instance = model(**copy.deepcopy(values))
+    make_transient_to_detached(instance)
+    return instance
+
+
+class PrincipalSnapshot:
+    """
+    Column values of a loaded principal, safe to share between requests.
+    """
+
+    def __init__(self, principal: Principal):
+        self.user_id = principal.user.id
+        self.email = principal.user.email
+        self.user = _column_values(principal.user)
+        self.profile = _column_values(principal.profile)
+        self.preferences = _column_values(principal.preferences)
+
+    def restore(self, db) -> Principal:
+        """
+        Rebuild the principal as persistent instances of the given session, without SQL.
+        """
+        principal = Principal(
+            _restore(User, self.user),
+            _restore(Profile, self.profile),
+            _restore(Preferences, self.preferences),
+        )
+        for instance in (principal.user, principal.profile, principal.preferences):
+            if instance is not None:
+                db.add(instance)
+        return principal
+
+
+class PrincipalCache:
+    """
+    Principals keyed by user id. Tokens without a uid claim find theirs through
+    the email they were issued for.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self._principals = TTLCache(max_entries, ttl_seconds)
+        self._user_ids = TTLCache(max_entries, ttl_seconds)
+
+    def get(self, email: str, user_id: Optional[int] = None) -> Optional[PrincipalSnapshot]:
+        if user_id is None:
+            user_id = self._user_ids.get(email)
+        if user_id is None:
+            return None
+        snapshot = self._principals.get(user_id)
+        # The email may have changed since it was indexed
+        if snapshot is None or snapshot.email != email:
+            return None
+        return snapshot
+
+    def set(self, principal: Principal) -> None:
+        snapshot = PrincipalSnapshot(principal)
+        self._principals.set(snapshot.user_id, snapshot)
+        self._user_ids.set(snapshot.email, snapshot.user_id)
+
+    def invalidate(self, user_id: int) -> None:
+        self._principals.pop(user_id)
+
+    def clear(self) -> None:
+        self._principals.clear()
+        self._user_ids.clear()
+
+
+principal_cache = PrincipalCache(settings.PRINCIPAL_CACHE_MAX_ENTRIES, settings.PRINCIPAL_CACHE_TTL_SECONDS)
+
+
+def load_principal(db: Session, email: str, user_id: Optional[int] = None) -> Optional[Principal]:
+    """
+    Get the principal for an email, from the cache or with one joined query.
+
+    Args:
+        db: The database session the principal is attached to
+        email: The email the access token was issued for
+        user_id: The user id claim of the access token, if any
+
+    Returns:
+        The principal, or None if no user has this email
+    """
+    snapshot = principal_cache.get(email, user_id)
+    if snapshot is not None:
+        return snapshot.restore(db)
+
+    row = db.execute(principal_query(email)).first()
+    if row is None:
+        return None
+    principal = Principal(*row)
+    principal_cache.set(principal)
+    return principal
+
+
+async def load_principal_async(db: AsyncSession, email: str, user_id: Optional[int] = None) -> Optional[Principal]:
+    """
+    Get the principal for an email, from the cache or with one joined query.
+
+    Args:
+        db: The async database session the principal is attached to
+        email: The email the access token was issued for
+        user_id: The user id claim of the access token, if any
+
+    Returns:
+        The principal, or None if no user has this email
+    """
+    snapshot = principal_cache.get(email, user_id)
+    if snapshot is not None:
+        return snapshot.restore(db)
+
+    row = (await db.execute(principal_query(email))).first()
+    if row is None:
+        return None
+    principal = Principal(*row)
+    principal_cache.set(principal)
+    return principal
@@ -1,17 +1,104 @@
+import hashlib
+import logging
+import threading
+import time
 from datetime import datetime, timedelta, timezone
-from typing import Any, Optional, Dict
+from typing import Any, Callable, Iterable, Optional, Dict
 from jose import jwt, JWTError
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from passlib.context import CryptContext
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.core.config import settings
-from app.db.session import get_db
+from app.core.passwords import password_hasher
+from app.core.principal import Principal, load_principal, load_principal_async
+from app.db.session import SessionLocal, get_async_db, get_db
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 ALGORITHM = "HS256"
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/token")
 
+# Payloads of verified tokens keyed by token digest, each kept until its token expires
+_verified_tokens = TTLCache(settings.TOKEN_CACHE_MAX_ENTRIES, ttl_seconds=0)
+
+
+class RevokedUsers:
+    """
+    Ids of deactivated users. Their tokens stay cryptographically valid until they
+    expire, so they are rejected here, before any user lookup.
+
+    Entries expire after ttl_seconds. The user is then looked up again and revoked
+    anew if still inactive, so reactivations (and revocations made by other
+    workers) are picked up within that time.
+    """
+
+    def __init__(self, ttl_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._expires_at: Dict[int, float] = {}
+
+    def revoke(self, user_id: int) -> None:
+        with self._lock:
+            self._expires_at[user_id] = self._clock() + self.ttl_seconds
+
+    def restore(self, user_id: int) -> None:
+        with self._lock:
+            self._expires_at.pop(user_id, None)
+
+    def replace(self, user_ids: Iterable[int]) -> None:
+        expires_at = self._clock() + self.ttl_seconds
+        entries = {user_id: expires_at for user_id in user_ids}
+        with self._lock:
+            self._expires_at = entries
+
+    def __contains__(self, user_id: int) -> bool:
+        with self._lock:
+            expires_at = self._expires_at.get(user_id)
+            if expires_at is None:
+                return False
+            if expires_at <= self._clock():
+                del self._expires_at[user_id]
+                return False
+            return True
+
+
+revoked_users = RevokedUsers(settings.REVOKED_USERS_TTL_SECONDS)
+
+
+def load_revoked_users(session_factory: Callable[[], Session] = SessionLocal) -> None:
+    """
+    Fill the revocation set with the users deactivated so far.
+
+    Failures are logged and not raised, deactivated users are then still rejected
+    once their principal is loaded.
+    """
+    # Import here to avoid circular imports
+    from app.models.user import User
+
+    db = session_factory()
+    try:
+        revoked_users.replace(db.scalars(select(User.id).where(User.is_active.is_(False))))
+    except Exception:
+        logger.warning("Could not load deactivated users at startup", exc_info=True)
+    finally:
+        db.close()
+
+def access_token_claims(user) -> Dict[str, Any]:
+    """
+    Claims identifying a user in their access tokens.
+
+    Args:
+        user: The user the token is issued for
+
+    Returns:
+        The subject (email), user id and whether the user is active
+    """
+    return {"sub": user.email, "uid": user.id, "active": bool(user.is_active)}
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Create a JWT access token.
@@ -46,11 +133,19 @@ def decode_token(token: str) -> Dict[str, Any]:
     Raises:
         JWTError: If the token is invalid
     """
-    return jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+    digest = hashlib.sha256(token.encode()).digest()
+    payload = _verified_tokens.get(digest)
+    if payload is None:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+        # Tokens without an expiry are verified every time
+        remaining_seconds = payload.get("exp", 0) - time.time()
+        if remaining_seconds > 0:
+            _verified_tokens.set(digest, payload, ttl_seconds=remaining_seconds)
+    return dict(payload)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
-    Verify a password against a hash.
+    Verify a password against a hash in the password worker pool.
 
     Args:
         plain_password: The plain text password
@@ -59,11 +154,12 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Returns:
         True if the password matches the hash, False otherwise
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    verified, _ = password_hasher.verify_and_update(plain_password, hashed_password)
+    return verified
 
 def get_password_hash(password: str) -> str:
     """
-    Hash a password.
+    Hash a password in the password worker pool.
 
     Args:
         password: The password to hash
@@ -71,47 +167,153 @@ def get_password_hash(password: str) -> str:
     Returns:
         The hashed password
     """
-    return pwd_context.hash(password)
+    return password_hasher.hash(password)
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+def _forbidden_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="Not enough permissions"
+    )
+
+def _inactive_user_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Inactive user"
+    )
+
+def _verified_claims(token: str) -> Dict[str, Any]:
+    """
+    Get the claims of a JWT token, rejecting tokens of deactivated users.
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    Raises:
+        HTTPException: If the token is invalid or its user is deactivated
     """
-    Get the current user from a JWT token.
+    try:
+        payload = decode_token(token)
+    except JWTError:
+        raise _credentials_exception()
+
+    if payload.get("sub") is None:
+        raise _credentials_exception()
+
+    # Tokens issued before the uid/active claims existed are checked once the user is loaded
+    if payload.get("active") is False or payload.get("uid") in revoked_users:
+        raise _inactive_user_exception()
+
+    return payload
+
+def _ensure_active(user):
+    if not user.is_active:
+        # Reject their other tokens before the lookup from now on
+        revoked_users.revoke(user.id)
+        raise _inactive_user_exception()
+
+    # Reactivated users are let through again
+    revoked_users.restore(user.id)
+    return user
+
+def _remember_user(request: Optional[Request], db, user) -> None:
+    # Commits of this session count as writes by the user, and the request's
+    # read sessions stick to the primary after them (see app.db.session)
+    db.info["user_id"] = user.id
+    if request is not None:
+        request.state.user_id = user.id
+
+def get_current_principal(
+    request: Request, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+) -> Principal:
+    """
+    Get the current user, with their profile and preferences, from a JWT token.
 
     Args:
+        request: The current request
         token: The JWT token
-        db: The database session
+        db: The database session the principal is attached to
 
     Returns:
-        The current user
+        The current principal
 
     Raises:
         HTTPException: If the token is invalid or the user is not found
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+    claims = _verified_claims(token)
+    principal = load_principal(db, claims["sub"], user_id=claims.get("uid"))
+    if principal is None:
+        raise _credentials_exception()
 
-    try:
-        payload = decode_token(token)
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
+    _remember_user(request, db, _ensure_active(principal.user))
+    return principal
 
-    # Import here to avoid circular imports
-    from app.models.user import User
+def get_current_user(principal: Principal = Depends(get_current_principal)):
+    """
+    Get the current user from a JWT token.
 
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
-        raise credentials_exception
+    Args:
+        principal: The current principal
 
-    if not user.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Inactive user"
-        )
+    Returns:
+        The current user
+    """
+    return principal.user
 
-    return user
+def get_current_admin(principal: Principal = Depends(get_current_principal)):
+    """
+    Get the current user from a JWT token, requiring them to be an admin.
+
+    Args:
+        principal: The current principal
+
+    Returns:
+        The current user
+
+    Raises:
+        HTTPException: 403 if the user's email is not in settings.ADMIN_EMAILS
+    """
+    admin_emails = {email.lower() for email in settings.ADMIN_EMAILS}
+    if (principal.user.email or "").lower() not in admin_emails:
+        raise _forbidden_exception()
+    return principal.user
+
+async def get_current_principal_async(
+    request: Request, token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    """
+    Get the current principal from a JWT token without blocking the event loop.
+
+    Args:
+        request: The current request
+        token: The JWT token
+        db: The async database session the principal is attached to
+
+    Returns:
+        The current principal
+
+    Raises:
+        HTTPException: If the token is invalid or the user is not found
+    """
+    claims = _verified_claims(token)
+    principal = await load_principal_async(db, claims["sub"], user_id=claims.get("uid"))
+    if principal is None:
+        raise _credentials_exception()
+
+    _remember_user(request, db, _ensure_active(principal.user))
+    return principal
+
+async def get_current_user_async(principal: Principal = Depends(get_current_principal_async)):
+    """
+    Get the current user from a JWT token without blocking the event loop.
+
+    Args:
+        principal: The current principal
+
+    Returns:
+        The current user
+    """
+    return principal.user
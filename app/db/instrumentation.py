@@ -0,0 +1,157 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+QUERY_TIME_HEADER = "X-DB-Time-Ms"
+
+_STATEMENT_START_KEY = "instrumentation_statement_start"
+
+_WHITESPACE = re.compile(r"\s+")
+_PARAMETERS = re.compile(r"%\(\w+\)s|\$\d+|\?|'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|__\[POSTCOMPILE_\w+\]")
+_IN_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_VALUES_LISTS = re.compile(r"(VALUES\s*)\([^()]*\)(?:\s*,\s*\([^()]*\))*", re.IGNORECASE)
+
+
+def fingerprint(statement: str) -> str:
+    """
+    Reduce a SQL statement to its shape: literals and parameters become "?",
+    IN lists and multi-row VALUES collapse, and whitespace is normalized.
+    """
+    shape = _PARAMETERS.sub("?", _WHITESPACE.sub(" ", statement).strip())
+    shape = _IN_LISTS.sub("(...)", shape)
+    return _VALUES_LISTS.sub(r"\1(...)", shape)
+
+
+class QueryStats:
+    """
+    Statements executed while a collector is active.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.fingerprints: Counter = Counter()
+
+    @property
+    def total_ms(self) -> float:
+        return self.total_seconds * 1000
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.total_seconds += seconds
+        self.fingerprints[fingerprint(statement)] += 1
+
+    def merge(self, other: "QueryStats") -> None:
+        self.count += other.count
+        self.total_seconds += other.total_seconds
+        self.fingerprints.update(other.fingerprints)
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """
+        Statement shapes executed more than threshold times, most frequent first.
+        """
+        return [(shape, count) for shape, count in self.fingerprints.most_common() if count > threshold]
+
+    def summary(self) -> str:
+        lines = [f"{self.count} statements in {self.total_ms:.1f}ms"]
+        lines.extend(f"{count:>4} x {shape}" for shape, count in self.fingerprints.most_common())
+        return "\n".join(lines)
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """
+    Collect the statements executed in the current context.
+
+    Sync endpoints and dependencies run in a worker thread with a copy of the
+    request context, so they record into the same collector. Nested collectors
+    add their statements to the enclosing one when they exit.
+    """
+    parent = _current_stats.get()
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+        if parent is not None:
+            parent.merge(stats)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault(_STATEMENT_START_KEY, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    starts = conn.info.get(_STATEMENT_START_KEY)
+    if stats is None or not starts:
+        return
+    stats.record(statement, time.perf_counter() - starts.pop())
+
+
+def install_query_instrumentation(engine: Engine) -> None:
+    """
+    Record the statements of an engine into the active collector, if any.
+    """
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class QueryStatsMiddleware:
+    """
+    ASGI middleware reporting the statements run by each request.
+
+    The count and total DB time are logged, and only returned as response
+    headers when expose_headers is set, since they tell any client how the
+    database is doing. A warning is logged when one statement shape repeats
+    more than the configured threshold, which usually means an N+1 query.
+    """
+
+    def __init__(self, app, repeat_threshold: Optional[int] = None, expose_headers: Optional[bool] = None):
+        self.app = app
+        self.repeat_threshold = repeat_threshold or settings.SQL_REPEATED_STATEMENT_THRESHOLD
+        self.expose_headers = settings.SQL_INSTRUMENTATION_HEADERS if expose_headers is None else expose_headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+            async def send_with_stats(message):
+                if message["type"] == "http.response.start" and self.expose_headers:
+                    headers = list(message.get("headers", []))
+                    headers.append((QUERY_COUNT_HEADER.lower().encode(), str(stats.count).encode()))
+                    headers.append((QUERY_TIME_HEADER.lower().encode(), f"{stats.total_ms:.1f}".encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_stats)
+            finally:
+                logger.info(
+                    "%s %s ran %d statements in %.1fms", scope["method"], scope["path"], stats.count, stats.total_ms
+                )
+                for shape, count in stats.repeated(self.repeat_threshold):
+                    logger.warning(
+                        "%s %s ran the same statement %d times (possible N+1): %s",
+                        scope["method"], scope["path"], count, shape
+                    )
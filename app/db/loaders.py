@@ -0,0 +1,47 @@
+"""
+Named eager-loading profiles for workout reads.
+
+Every workout response serializes its exercises and their catalog entries, so
+reads must load them up front instead of lazily during serialization. Apply a
+profile with ``query.options(*WORKOUT_DETAIL)``.
+"""
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.models.workout import Exercise, Workout, WorkoutExercise
+
+# Exercise columns serialized by ExerciseResponse. Sync bookkeeping (content_hash,
+# is_active) is never sent to clients. instructions and gif_url are part of every
+# current workout schema, so no profile defers them.
+EXERCISE_RESPONSE_COLUMNS = (
+    Exercise.id,
+    Exercise.name,
+    Exercise.body_part,
+    Exercise.target,
+    Exercise.secondary_muscles,
+    Exercise.equipment,
+    Exercise.gif_url,
+    Exercise.instructions,
+)
+
+# Many workouts: one query for the workouts, one for all their exercises joined
+# with the catalog
+WORKOUT_LIST = (
+    selectinload(Workout.workout_exercises)
+    .joinedload(WorkoutExercise.exercise)
+    .load_only(*EXERCISE_RESPONSE_COLUMNS),
+)
+
+# A single workout: everything in one joined query
+WORKOUT_DETAIL = (
+    joinedload(Workout.workout_exercises)
+    .joinedload(WorkoutExercise.exercise)
+    .load_only(*EXERCISE_RESPONSE_COLUMNS),
+)
+
+# A week of workouts returned by the scheduler; same shape as the list view
+WORKOUT_SCHEDULE = WORKOUT_LIST
+
+# The exercises of one workout, without the workout itself
+WORKOUT_EXERCISES = (
+    joinedload(WorkoutExercise.exercise).load_only(*EXERCISE_RESPONSE_COLUMNS),
+)
@@ -0,0 +1,172 @@
+"""
+Connection pool configuration and checkout metrics.
+
+Both engines get their pool settings from ``Settings``. Pools created here
+record how long each checkout waited for a connection, so saturation shows up
+in GET /database/pool-metrics before it shows up as request timeouts.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, Pool, QueuePool
+
+from app.core.config import settings
+
+# Upper bounds (ms) of the checkout wait histogram buckets; the last bucket is unbounded
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# QueuePool._do_get retries by calling itself; only the outermost call is a checkout
+_in_checkout: ContextVar[bool] = ContextVar("pool_checkout", default=False)
+
+
+class PoolMetrics:
+    """
+    Checkout wait times of one pool, bucketed in a histogram.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.waiting = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    def started(self) -> None:
+        with self._lock:
+            self.waiting += 1
+
+    def finished(self, wait_ms: Optional[float], timed_out: bool = False) -> None:
+        """
+        Record the end of a checkout; wait_ms is None when connecting failed.
+        """
+        with self._lock:
+            self.waiting -= 1
+            if timed_out:
+                self.timeouts += 1
+                return
+            if wait_ms is None:
+                return
+            self.checkouts += 1
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+            self.buckets[bisect_left(WAIT_BUCKETS_MS, wait_ms)] += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            histogram = [
+                {"le_ms": bound, "count": count}
+                for bound, count in zip(WAIT_BUCKETS_MS + (None,), self.buckets)
+            ]
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "waiting": self.waiting,
+                "avg_wait_ms": round(self.total_wait_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait_ms, 3),
+                "wait_histogram": histogram,
+            }
+
+
+class _InstrumentedPoolMixin:
+    metrics: PoolMetrics
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        if _in_checkout.get():
+            return super()._do_get()
+
+        token = _in_checkout.set(True)
+        self.metrics.started()
+        start = time.perf_counter()
+        try:
+            entry = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.finished((time.perf_counter() - start) * 1000, timed_out=True)
+            raise
+        except BaseException:
+            self.metrics.finished(None)
+            raise
+        finally:
+            _in_checkout.reset(token)
+
+        self.metrics.finished((time.perf_counter() - start) * 1000)
+        return entry
+
+    def recreate(self):
+        # Engine.dispose() swaps in a new pool; keep the history across it
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    """
+    QueuePool that records checkout wait times.
+    """
+
+
+class InstrumentedAsyncAdaptedQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    """
+    AsyncAdaptedQueuePool that records checkout wait times.
+    """
+
+
+def engine_options(async_driver: bool = False) -> Dict[str, Any]:
+    """
+    Pool arguments for create_engine / create_async_engine from the settings.
+
+    Args:
+        async_driver: Whether the engine uses asyncpg
+
+    Returns:
+        Keyword arguments for the engine
+    """
+    if settings.DATABASE_PGBOUNCER_TRANSACTION_MODE:
+        # PgBouncer owns the pool; a server connection only lives for one transaction,
+        # so keep no idle connections here and don't rely on prepared statements
+        options: Dict[str, Any] = {"poolclass": NullPool}
+        if async_driver:
+            options["connect_args"] = {"statement_cache_size": 0, "prepared_statement_cache_size": 0}
+        return options
+
+    return {
+        "poolclass": InstrumentedAsyncAdaptedQueuePool if async_driver else InstrumentedQueuePool,
+        "pool_size": settings.DATABASE_POOL_SIZE,
+        "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+        "pool_timeout": settings.DATABASE_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DATABASE_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DATABASE_POOL_PRE_PING,
+    }
+
+
+def pool_metrics(pool: Pool) -> Dict[str, Optional[Any]]:
+    """
+    Current occupancy and checkout wait metrics of a pool.
+
+    Args:
+        pool: The engine's pool
+
+    Returns:
+        Pool class, size, checked in/out connections, overflow and wait metrics
+    """
+    metrics: Dict[str, Optional[Any]] = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        metrics.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "max_overflow": pool._max_overflow,
+        })
+    if isinstance(pool, _InstrumentedPoolMixin):
+        metrics.update(pool.metrics.to_dict())
+    return metrics
@@ -1,15 +1,135 @@
-from sqlalchemy import create_engine
+import threading
+import time
+from typing import Dict, Optional
+
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from app.core.config import settings
+from app.db.pool import engine_options
 
-engine = create_engine(settings.DATABASE_URI)
+engine = create_engine(settings.DATABASE_URI, **engine_options())
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+
+def async_database_uri(uri: str) -> str:
+    """
+    Point a Postgres URI at the asyncpg driver, whatever driver it names.
+    """
+    url = make_url(uri)
+    if url.get_backend_name() != "postgresql":
+        return uri
+    return url.set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+
+# Async endpoints use this engine so their queries don't block the event loop
+async_engine = create_async_engine(
+    async_database_uri(settings.DATABASE_URI), **engine_options(async_driver=True)
+)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+# Optional read-only replica for GET handlers; without one, reads use the primary
+if settings.DATABASE_REPLICA_URI:
+    replica_engine = create_engine(settings.DATABASE_REPLICA_URI, **engine_options())
+    async_replica_engine = create_async_engine(
+        async_database_uri(settings.DATABASE_REPLICA_URI), **engine_options(async_driver=True)
+    )
+else:
+    replica_engine = engine
+    async_replica_engine = async_engine
+
+
+class RecentWriters:
+    """
+    Users who committed a write recently. Their reads go to the primary until the
+    replica has had time to catch up, so they always see their own writes.
+    """
+
+    def __init__(self, window_seconds: float):
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self._last_write: Dict[int, float] = {}
+
+    def mark(self, user_id: int) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._last_write[user_id] = now
+            if len(self._last_write) > 10000:
+                self._last_write = {
+                    uid: at for uid, at in self._last_write.items() if now - at < self.window_seconds
+                }
+
+    def is_sticky(self, user_id: Optional[int]) -> bool:
+        if user_id is None:
+            return False
+        with self._lock:
+            last_write = self._last_write.get(user_id)
+        return last_write is not None and time.monotonic() - last_write < self.window_seconds
+
+
+recent_writers = RecentWriters(settings.DATABASE_REPLICA_STICKINESS_SECONDS)
+
+
+class ReadSession(Session):
+    """
+    Session for read-only handlers. Statements go to the replica, unless the
+    request's user (request.state.user_id, set during authentication) wrote recently.
+    The choice is made on first use and kept for the whole session.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        primary, replica = self.info["primary"], self.info["replica"]
+        if self._flushing:
+            return primary
+
+        if "bind" not in self.info:
+            request = self.info.get("request")
+            user_id = getattr(request.state, "user_id", None) if request is not None else None
+            self.info["bind"] = primary if recent_writers.is_sticky(user_id) else replica
+        return self.info["bind"]
+
+
+@event.listens_for(Session, "after_commit")
+def _mark_recent_writer(session: Session) -> None:
+    # Sessions are tagged with the authenticated user in get_current_user
+    user_id = session.info.get("user_id")
+    if user_id is not None and not isinstance(session, ReadSession):
+        recent_writers.mark(user_id)
+
+
+ReadSessionLocal = sessionmaker(
+    class_=ReadSession, autocommit=False, autoflush=False,
+    info={"primary": engine, "replica": replica_engine}
+)
+AsyncReadSessionLocal = async_sessionmaker(
+    class_=AsyncSession, sync_session_class=ReadSession, autoflush=False, expire_on_commit=False,
+    info={"primary": async_engine.sync_engine, "replica": async_replica_engine.sync_engine}
+)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def get_read_db(request: Request):
+    db = ReadSessionLocal(info={"request": request})
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db(request: Request):
+    async with AsyncReadSessionLocal(info={"request": request}) as db:
+        yield db
@@ -1,9 +1,37 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.endpoints import router as api_router
 from app.core.config import settings
+from app.core.passwords import password_hasher
+from app.core.security import load_revoked_users
+from app.db.instrumentation import (QUERY_COUNT_HEADER, QUERY_TIME_HEADER, QueryStatsMiddleware,
+                                    install_query_instrumentation)
+from app.db.session import async_engine, async_replica_engine, engine, replica_engine
+from app.services.spotify import close_spotify_client, get_spotify_client
+from app.services.typeahead import exercise_typeahead
+from app.services.user_import import import_password_hasher
+from app.utils.pagination import NEXT_CURSOR_HEADER
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the exercise catalog and build the autocomplete index before serving traffic
+    await run_in_threadpool(exercise_typeahead.warm)
+    await run_in_threadpool(load_revoked_users)
+    # Open the shared Spotify client on this loop; sync endpoints reach it through SyncSpotifyService
+    get_spotify_client()
+    yield
+    await close_spotify_client()
+    await async_engine.dispose()
+    await async_replica_engine.dispose()
+    await run_in_threadpool(password_hasher.shutdown)
+    await run_in_threadpool(import_password_hasher.shutdown)
 
-app = FastAPI(title=settings.PROJECT_NAME, version=settings.VERSION)
+
+app = FastAPI(title=settings.PROJECT_NAME, version=settings.VERSION, lifespan=lifespan)
 
 # Set up CORS
 origins = [
@@ -14,14 +42,25 @@ origins = [
     "http://localhost:19006",  # Expo web
 ]
 
+# Let browser clients read the pagination cursor, and the query stats when they are sent
+exposed_headers = [NEXT_CURSOR_HEADER]
+if settings.SQL_INSTRUMENTATION_HEADERS:
+    exposed_headers += [QUERY_COUNT_HEADER, QUERY_TIME_HEADER]
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=exposed_headers,
 )
 
+if settings.SQL_INSTRUMENTATION_ENABLED:
+    for instrumented_engine in (engine, replica_engine, async_engine.sync_engine, async_replica_engine.sync_engine):
+        install_query_instrumentation(instrumented_engine)
+    app.add_middleware(QueryStatsMiddleware)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 
@@ -1,6 +1,6 @@
 from sqlalchemy import Column, Index, Integer, PrimaryKeyConstraint, String, ForeignKey, DateTime, Text, ARRAY, Boolean
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, true
 from app.db.session import Base
 
 class Workout(Base):
@@ -20,6 +20,11 @@ class Workout(Base):
     user = relationship("User", backref="workouts")
     workout_exercises = relationship("WorkoutExercise", back_populates="workout", cascade="all, delete-orphan")
 
+    # Every per-user query filters on a date range
+    __table_args__ = (
+        Index('ix_workouts_user_id_date', 'user_id', 'date'),
+    )
+
 class WorkoutExercise(Base):
     __tablename__ = "workout_exercises"
 
@@ -56,6 +61,20 @@ class Exercise(Base):
     gif_url = Column(String, nullable=True)
     instructions = Column(ARRAY(String), nullable=True)
     
+    # External source sync bookkeeping
+    content_hash = Column(String, nullable=True)  # Hash of the last synced ExerciseDB record
+    is_active = Column(Boolean, default=True, server_default=true())  # False once removed from the source
+    
     # Relationships
     workout_exercises = relationship("WorkoutExercise", back_populates="exercise", cascade="all, delete-orphan")
+    
+    # Trigram indexes backing the ranked exercise search (requires pg_trgm), plus the
+    # exact-match filters of the exercise selector
+    __table_args__ = (
+        Index('ix_exercises_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+        Index('ix_exercises_target_trgm', 'target', postgresql_using='gin', postgresql_ops={'target': 'gin_trgm_ops'}),
+        Index('ix_exercises_equipment_trgm', 'equipment', postgresql_using='gin', postgresql_ops={'equipment': 'gin_trgm_ops'}),
+        Index('ix_exercises_body_part_trgm', 'body_part', postgresql_using='gin', postgresql_ops={'body_part': 'gin_trgm_ops'}),
+        Index('ix_exercises_target_equipment', 'target', 'equipment'),
+    )
 
@@ -25,6 +25,15 @@ class ExerciseResponse(ExerciseBase):
     id: int
     model_config = ConfigDict(alias_generator=to_camel, populate_by_name=True,from_attributes=True)
 
+class ExerciseSuggestion(BaseModel):
+    id: int
+    name: str
+    target: Optional[str] = None
+    equipment: Optional[str] = None
+    gif_url: Optional[str] = None
+    typos: int = 0
+    model_config = ConfigDict(alias_generator=to_camel, populate_by_name=True,from_attributes=True)
+
 class WorkoutExerciseBase(BaseModel):
     order: int
     sets: int
@@ -41,6 +50,10 @@ class WorkoutExerciseUpdate(BaseModel):
     completed_sets: Optional[int] = None
     weights_used: Optional[List[str]] = None
 
+class WorkoutExerciseProgress(WorkoutExerciseUpdate):
+    exercise_id: int
+    model_config = ConfigDict(alias_generator=to_camel, populate_by_name=True)
+
 class WorkoutExerciseResponse(WorkoutExerciseBase):
     model_config = ConfigDict(alias_generator=to_camel, populate_by_name=True,from_attributes=True)
 
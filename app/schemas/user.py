@@ -1,5 +1,5 @@
 from pydantic import BaseModel, ConfigDict, EmailStr
-from typing import Optional
+from typing import List, Optional
 
 class UserBase(BaseModel):
     email: Optional[EmailStr] = None
@@ -17,3 +17,16 @@ class UserResponse(UserBase):
     is_active: bool
 
     model_config = ConfigDict(from_attributes=True)
+
+class UserImportError(BaseModel):
+    row: int
+    email: Optional[str] = None
+    error: str
+
+class UserImportReport(BaseModel):
+    received: int
+    imported: int
+    failed: int
+    errors: List[UserImportError]
+    elapsed_seconds: float
+    rows_per_second: float
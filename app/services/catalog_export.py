@@ -0,0 +1,109 @@
+import gzip
+import hashlib
+import json
+import threading
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.schemas.exercise import ExerciseResponse
+from app.services.exercise_catalog import CatalogSnapshot, ExerciseCatalog, exercise_catalog
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional, gzip is always available
+    brotli = None
+
+
+class CatalogExport:
+    """
+    The whole exercise catalog serialized once, in every supported encoding.
+
+    The ETag is a hash of the uncompressed JSON, so it only changes when the
+    content does, not every time the catalog is reloaded.
+    """
+
+    def __init__(self, snapshot: CatalogSnapshot):
+        self.version = snapshot.version
+        exercises = [
+            ExerciseResponse.model_validate(ex).model_dump(mode="json", by_alias=True)
+            for ex in snapshot.exercises
+        ]
+        body = json.dumps(
+            {"count": len(exercises), "exercises": exercises},
+            separators=(",", ":"),
+            ensure_ascii=False
+        ).encode("utf-8")
+
+        self.etag = hashlib.sha256(body).hexdigest()
+        self.bodies: Dict[str, bytes] = {
+            "identity": body,
+            # A fixed mtime keeps the compressed bytes identical for identical content
+            "gzip": gzip.compress(body, compresslevel=9, mtime=0),
+        }
+        if brotli is not None:
+            self.bodies["br"] = brotli.compress(body, quality=11)
+
+    def negotiate(self, accept_encoding: Optional[str]) -> str:
+        """
+        Pick the smallest encoding accepted by the client.
+
+        Args:
+            accept_encoding: The Accept-Encoding request header
+
+        Returns:
+            "br", "gzip" or "identity"
+        """
+        accepted = set()
+        for part in (accept_encoding or "").lower().split(","):
+            coding, _, params = part.strip().partition(";")
+            quality = params.strip()
+            if quality.startswith("q="):
+                try:
+                    if float(quality[2:]) <= 0:
+                        continue
+                except ValueError:
+                    continue
+            accepted.add(coding.strip())
+
+        for encoding in ("br", "gzip"):
+            if encoding in self.bodies and (encoding in accepted or "*" in accepted):
+                return encoding
+        return "identity"
+
+
+class CatalogExportCache:
+    """
+    Keeps one catalog export per catalog version.
+
+    The export is regenerated the first time it is requested after the catalog
+    changes (e.g. after a sync), never per request.
+    """
+
+    def __init__(self, catalog: ExerciseCatalog = exercise_catalog):
+        self._catalog = catalog
+        self._lock = threading.Lock()
+        self._export: Optional[CatalogExport] = None
+
+    def get(self, db: Session) -> CatalogExport:
+        """
+        Return the export of the current catalog, building it if needed.
+
+        Args:
+            db: The database session used when the catalog has to be (re)loaded
+
+        Returns:
+            The catalog export
+        """
+        snapshot = self._catalog.get(db)
+        export = self._export
+        if export is not None and export.version == snapshot.version:
+            return export
+
+        with self._lock:
+            if self._export is None or self._export.version != snapshot.version:
+                self._export = CatalogExport(snapshot)
+            return self._export
+
+
+exercise_catalog_export = CatalogExportCache()
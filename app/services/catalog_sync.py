@@ -0,0 +1,291 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import literal_column, or_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.workout import Exercise
+from app.services.exercise import ExerciseService
+from app.services.exercise_catalog import exercise_catalog
+from app.utils.helper import safe_int_convert
+
+logger = logging.getLogger(__name__)
+
+SYNCED_COLUMNS = (
+    "name",
+    "body_part",
+    "target",
+    "secondary_muscles",
+    "equipment",
+    "gif_url",
+    "instructions",
+)
+
+
+class CatalogSyncService:
+    """
+    Service for incrementally synchronizing the exercises table with ExerciseDB.
+
+    Records are fetched page by page, hashed, and upserted so unchanged rows are
+    never rewritten. Records that disappear from the source are deactivated
+    instead of deleted, so workouts referencing them keep their history.
+    """
+
+    def __init__(self, db: Session, page_size: Optional[int] = None):
+        self.db = db
+        self.exercise_service = ExerciseService(db)
+        self.page_size = page_size or settings.EXERCISE_SYNC_PAGE_SIZE
+
+    def synchronize(self, on_page: Optional[Callable[[int, int], None]] = None) -> Dict[str, int]:
+        """
+        Synchronize the exercises table with ExerciseDB.
+
+        Each page is written in its own transaction so the table is never locked
+        for the whole sync.
+
+        Args:
+            on_page: Called after each committed page with the number of records
+                fetched and rows written
+
+        Returns:
+            Counts of inserted, updated, unchanged and removed exercises
+        """
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0, "removed": 0}
+        seen_ids: Set[int] = set()
+        offset = 0
+
+        while True:
+            # Always ask the source for fresh pages (replay mode still serves recordings)
+            page = self.exercise_service.get_exercises_from_external_source(
+                params={"limit": self.page_size, "offset": offset}, refresh=True
+            )
+            if not isinstance(page, list):
+                # ExerciseDB reports errors as an object; stop before deactivating anything
+                raise ValueError(f"Unexpected ExerciseDB response: {page}")
+
+            rows = self._to_rows(page)
+            inserted = updated = 0
+            if rows:
+                inserted, updated = self._upsert(rows)
+                self.db.commit()
+                counts["inserted"] += inserted
+                counts["updated"] += updated
+                counts["unchanged"] += len(rows) - inserted - updated
+                seen_ids.update(row["id"] for row in rows)
+            if on_page:
+                on_page(len(page), inserted + updated)
+
+            if len(page) < self.page_size:
+                break
+            offset += self.page_size
+
+        counts["removed"] = self._deactivate_missing(seen_ids)
+        self.db.commit()
+        return counts
+
+    def _to_rows(self, page: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # ON CONFLICT cannot touch the same row twice in one statement, so dedupe by id
+        rows = {}
+        for ex in page:
+            row = {
+                "id": safe_int_convert(ex["id"]),
+                "name": ex.get("name"),
+                "body_part": ex.get("bodyPart"),
+                "target": ex.get("target"),
+                "secondary_muscles": ex.get("secondaryMuscles"),
+                "equipment": ex.get("equipment"),
+                "gif_url": ex.get("gifUrl"),
+                "instructions": ex.get("instructions"),
+            }
+            row["content_hash"] = self._hash_row(row)
+            row["is_active"] = True
+            rows[row["id"]] = row
+        return list(rows.values())
+
+    @staticmethod
+    def _hash_row(row: Dict[str, Any]) -> str:
+        payload = json.dumps({column: row[column] for column in SYNCED_COLUMNS}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _upsert(self, rows: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """
+        Insert new rows and update changed ones in a single statement.
+
+        Returns:
+            The number of inserted and updated rows
+        """
+        stmt = insert(Exercise).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Exercise.id],
+            set_={
+                **{column: stmt.excluded[column] for column in SYNCED_COLUMNS},
+                "content_hash": stmt.excluded.content_hash,
+                "is_active": True,
+            },
+            # Rows whose hash did not change are left untouched
+            where=or_(
+                Exercise.content_hash.is_distinct_from(stmt.excluded.content_hash),
+                Exercise.is_active.isnot(True),
+            ),
+        ).returning(literal_column("xmax = 0").label("inserted"))
+
+        written = self.db.execute(stmt).all()
+        inserted = sum(1 for row in written if row.inserted)
+        return inserted, len(written) - inserted
+
+    def _deactivate_missing(self, seen_ids: Set[int]) -> int:
+        """
+        Deactivate synced exercises that are no longer returned by ExerciseDB.
+
+        Exercises created locally (without a content hash) are never touched, and an
+        empty source is treated as an outage rather than as every exercise being removed.
+        """
+        if not seen_ids:
+            return 0
+
+        result = self.db.execute(
+            update(Exercise)
+            .where(
+                Exercise.is_active.is_(True),
+                Exercise.content_hash.isnot(None),
+                Exercise.id.notin_(seen_ids),
+            )
+            .values(is_active=False)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+
+class CatalogSyncJob:
+    """
+    Progress of one background catalog sync.
+    """
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.status = "pending"
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.pages_fetched = 0
+        self.records_fetched = 0
+        self.rows_written = 0
+        self.errors: List[str] = []
+        self.result: Optional[Dict[str, int]] = None
+        self._started = 0.0
+        self._elapsed: Optional[float] = None
+
+    def record_page(self, records_fetched: int, rows_written: int) -> None:
+        self.pages_fetched += 1
+        self.records_fetched += records_fetched
+        self.rows_written += rows_written
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = self._elapsed
+        if elapsed is None:
+            elapsed = time.monotonic() - self._started if self._started else 0.0
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "pages_fetched": self.pages_fetched,
+            "records_fetched": self.records_fetched,
+            "rows_written": self.rows_written,
+            "errors": list(self.errors),
+            "records_per_second": round(self.records_fetched / elapsed, 1) if elapsed else 0.0,
+            "result": self.result,
+        }
+
+
+class SyncAlreadyRunning(Exception):
+    """
+    Raised when a catalog sync is requested while another one is still running.
+    """
+
+    def __init__(self, job: CatalogSyncJob):
+        super().__init__(f"Catalog sync {job.id} is already running")
+        self.job = job
+
+
+class CatalogSyncJobManager:
+    """
+    Runs catalog syncs on a dedicated background thread, one at a time.
+
+    Jobs get their own database session so the HTTP request that started them can
+    return immediately. The most recent jobs are kept in memory for progress polling.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal, max_history: int = 20):
+        self._session_factory = session_factory
+        self._max_history = max_history
+        # Guards _running and _jobs; a sync is running exactly while _running is set
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="catalog-sync")
+        self._jobs: "OrderedDict[str, CatalogSyncJob]" = OrderedDict()
+        self._running: Optional[CatalogSyncJob] = None
+
+    def start(self) -> CatalogSyncJob:
+        """
+        Start a background sync.
+
+        Returns:
+            The new job
+
+        Raises:
+            SyncAlreadyRunning: If another sync has not finished yet
+        """
+        with self._lock:
+            if self._running is not None:
+                raise SyncAlreadyRunning(self._running)
+
+            job = CatalogSyncJob()
+            self._running = job
+            self._jobs[job.id] = job
+            while len(self._jobs) > self._max_history:
+                self._jobs.popitem(last=False)
+
+            try:
+                self._executor.submit(self._run, job)
+            except Exception:
+                self._running = None
+                raise
+        return job
+
+    def get(self, job_id: str) -> Optional[CatalogSyncJob]:
+        return self._jobs.get(job_id)
+
+    def _run(self, job: CatalogSyncJob) -> None:
+        db = self._session_factory()
+        job.status = "running"
+        job.started_at = datetime.now(timezone.utc)
+        job._started = time.monotonic()
+        try:
+            job.result = CatalogSyncService(db).synchronize(on_page=job.record_page)
+            job.status = "succeeded"
+        except Exception as e:
+            logger.exception("Catalog sync %s failed", job.id)
+            db.rollback()
+            job.errors.append(str(e))
+            job.status = "failed"
+        finally:
+            db.close()
+            job._elapsed = time.monotonic() - job._started
+            job.finished_at = datetime.now(timezone.utc)
+            # Pages committed before a failure are already visible
+            exercise_catalog.invalidate()
+            with self._lock:
+                self._running = None
+
+
+catalog_sync_jobs = CatalogSyncJobManager()
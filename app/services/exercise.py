@@ -1,77 +1,127 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from app.core.config import settings
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, case, cast, func, literal, or_, select
+from sqlalchemy.dialects.postgresql import DOUBLE_PRECISION
+from sqlalchemy.orm import Session, aliased
 
 from app.models.workout import Exercise
+from app.services.http_cache import ResponseCache, exercise_api_cache
+
+logger = logging.getLogger(__name__)
+
+# Process-wide cap on concurrent ExerciseDB requests, shared by every fan-out
+_external_request_slots = threading.BoundedSemaphore(settings.EXERCISE_API_MAX_CONCURRENCY)
+
+
+def _contains_pattern(value: str) -> str:
+    """
+    Build an ILIKE pattern matching values containing the given text literally.
+    """
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
 
 class ExerciseService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, response_cache: Optional[ResponseCache] = None):
         self.api_key = settings.EXERCISE_API_KEY
         self.api_host = settings.EXERCISE_API_HOST
         self.api_url = "https://exercisedb.p.rapidapi.com"
         self.db = db
+        self.response_cache = response_cache or exercise_api_cache
     
-    def get_exercises_from_external_source(self, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    def _get_from_external_source(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        refresh: bool = False
+    ) -> Any:
         """
-        Get a list of exercises.
+        Call the ExerciseDB API through the response cache.
         """
+        url = f"{self.api_url}{path}"
         headers = {
             "X-RapidAPI-Key": self.api_key,
             "X-RapidAPI-Host": self.api_host
         }
         
-        response = requests.get(f"{self.api_url}/exercises", headers=headers, params=params)
-        return response.json()
+        def fetch() -> requests.Response:
+            # Only actual network calls take a slot, cache hits never wait
+            with _external_request_slots:
+                return requests.get(url, headers=headers, params=params)
+        
+        return self.response_cache.get_json(url, fetch, params=params, refresh=refresh)
+    
+    def get_exercises_from_external_source(self, params: Optional[Dict[str, Any]] = None, refresh: bool = False) -> List[Dict[str, Any]]:
+        """
+        Get a list of exercises.
+        """
+        return self._get_from_external_source("/exercises", params=params, refresh=refresh)
     
     def get_exercise_by_id_from_external_source(self, exercise_id: str) -> Dict[str, Any]:
         """
         Get an exercise by ID.
         """
-        headers = {
-            "X-RapidAPI-Key": self.api_key,
-            "X-RapidAPI-Host": self.api_host
-        }
-        
-        response = requests.get(f"{self.api_url}/exercises/exercise/{exercise_id}", headers=headers)
-        return response.json()
+        return self._get_from_external_source(f"/exercises/exercise/{exercise_id}")
     
     def get_exercises_by_muscle_from_external_source(self, muscle: str) -> List[Dict[str, Any]]:
         """
         Get exercises by target muscle.
         Accepted params: ["abductors","abs","adductors","biceps","calves","cardiovascular system","delts","forearms","glutes","hamstrings","lats","levator scapulae","pectorals","quads","serratus anterior","spine","traps","triceps","upper back"]
         """
-        headers = {
-            "X-RapidAPI-Key": self.api_key,
-            "X-RapidAPI-Host": self.api_host
-        }
-        
-        response = requests.get(f"{self.api_url}/exercises/target/{muscle}", headers=headers)
-        return response.json()
+        return self._get_from_external_source(f"/exercises/target/{muscle}")
     
     def get_exercises_by_equipment_from_external_source(self, equipment: str) -> List[Dict[str, Any]]:
         """
         Get exercises by equipment.
         """
-        headers = {
-            "X-RapidAPI-Key": self.api_key,
-            "X-RapidAPI-Host": self.api_host
-        }
-        
-        response = requests.get(f"{self.api_url}/exercises/equipment/{equipment}", headers=headers)
-        return response.json()
+        return self._get_from_external_source(f"/exercises/equipment/{equipment}")
     
     def get_exercise_by_name_external_source(self, name: str) -> List[Dict[str, Any]]:
         """
         Get exercises by name.
         """
-        headers = {
-            "X-RapidAPI-Key": self.api_key,
-            "X-RapidAPI-Host": self.api_host
-        }
+        return self._get_from_external_source(f"/exercises/name/{name}")
+    
+    def prefetch_exercises_by_muscles_from_external_source(self, muscles: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Fetch exercises for several target muscles concurrently.
+        
+        Each distinct muscle is fetched once. The result can be passed to
+        generate_workout so workouts sharing muscles reuse the same response.
+        
+        Args:
+            muscles: Target muscles, duplicates are fetched once
+            
+        Returns:
+            Exercises by muscle; muscles whose fetch failed are left out
+        """
+        unique_muscles = list(dict.fromkeys(muscles))
+        if not unique_muscles:
+            return {}
+        
+        workers = min(len(unique_muscles), settings.EXERCISE_API_MAX_CONCURRENCY)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="exercisedb") as executor:
+            futures = {
+                muscle: executor.submit(self.get_exercises_by_muscle_from_external_source, muscle)
+                for muscle in unique_muscles
+            }
         
-        response = requests.get(f"{self.api_url}/exercises/name/{name}", headers=headers)
-        return response.json()
+        exercises_by_muscle = {}
+        for muscle, future in futures.items():
+            try:
+                exercises = future.result()
+            except Exception:
+                logger.warning("Fetching exercises for %s failed", muscle, exc_info=True)
+                continue
+            # ExerciseDB reports errors as an object instead of a list
+            if isinstance(exercises, list):
+                exercises_by_muscle[muscle] = exercises
+        return exercises_by_muscle
     
     # End of external source methods
     
@@ -100,15 +150,111 @@ class ExerciseService:
         """
         return self.db.query(Exercise).filter(Exercise.equipment == equipment).all()
     
+    def get_exercises_by_muscles(
+        self,
+        muscles: List[str],
+        equipment: Optional[List[str]] = None,
+        per_group_limit: Optional[int] = None
+    ) -> List[Exercise]:
+        """
+        Get exercises for several target muscles in a single query.
+        
+        Args:
+            muscles: Target muscles to fetch exercises for
+            equipment: Only return exercises needing no equipment or one of these, or any equipment when None
+            per_group_limit: Maximum number of exercises per target muscle, or no limit when None
+            
+        Returns:
+            Exercises grouped by target muscle in the order given, ordered by ID within a group
+        """
+        if not muscles:
+            return []
+        
+        ranked = select(
+            Exercise,
+            func.row_number().over(partition_by=Exercise.target, order_by=Exercise.id).label("rank")
+        ).filter(Exercise.target.in_(muscles), Exercise.is_active.is_(True))
+        if equipment is not None:
+            # Like the catalog's bitmask filter, exercises without equipment are always available
+            ranked = ranked.filter(or_(Exercise.equipment.is_(None), Exercise.equipment.in_(equipment)))
+        ranked = ranked.subquery()
+        
+        ranked_exercise = aliased(Exercise, ranked)
+        query = self.db.query(ranked_exercise)
+        if per_group_limit is not None:
+            query = query.filter(ranked.c.rank <= per_group_limit)
+        muscle_order = {muscle: position for position, muscle in enumerate(dict.fromkeys(muscles))}
+        return query.order_by(case(muscle_order, value=ranked_exercise.target), ranked_exercise.id).all()
+    
+    def search_exercises(
+        self,
+        name: Optional[str] = None,
+        body_part: Optional[str] = None,
+        target: Optional[str] = None,
+        equipment: Optional[str] = None,
+        limit: int = 20,
+        after: Optional[Tuple[float, int]] = None
+    ) -> List[Tuple[Exercise, float]]:
+        """
+        Search active exercises, best matches first.
+        
+        Every given term must be contained in its column (served by the pg_trgm GIN
+        indexes); matches are ranked by the sum of their trigram similarities.
+        
+        Args:
+            name: Text contained in the exercise name
+            body_part: Text contained in the body part
+            target: Text contained in the target muscle
+            equipment: Text contained in the equipment
+            limit: Maximum number of exercises to return
+            after: The (score, id) of the last exercise of the previous page
+        
+        Returns:
+            Exercises with their score, ordered by score descending then ID
+        """
+        terms = [
+            (column, value)
+            for column, value in (
+                (Exercise.name, name),
+                (Exercise.body_part, body_part),
+                (Exercise.target, target),
+                (Exercise.equipment, equipment),
+            )
+            if value
+        ]
+        
+        # Cast to double precision so scores survive the cursor round trip exactly
+        score = cast(literal(0.0), DOUBLE_PRECISION)
+        for column, value in terms:
+            score = score + cast(func.similarity(func.coalesce(column, ""), value), DOUBLE_PRECISION)
+        score = score.label("score")
+        
+        query = self.db.query(Exercise, score).filter(Exercise.is_active.is_(True))
+        for column, value in terms:
+            query = query.filter(column.ilike(_contains_pattern(value), escape="\\"))
+        if after is not None:
+            after_score, after_id = after
+            query = query.filter(or_(
+                score < after_score,
+                and_(score == after_score, Exercise.id > after_id)
+            ))
+        
+        rows = query.order_by(score.desc(), Exercise.id).limit(limit).all()
+        return [(exercise, exercise_score) for exercise, exercise_score in rows]
+    
     def generate_workout(
         self,
         muscle_groups: List[str],
         available_equipment: List[str],
         fitness_level: str,
-        workout_duration_minutes: int
+        workout_duration_minutes: int,
+        exercises_by_muscle: Optional[Dict[str, List[Dict[str, Any]]]] = None
     ) -> List[Dict[str, Any]]:
         """
         Generate a workout based on user preferences.
+        
+        When exercises_by_muscle is given (see prefetch_exercises_by_muscles_from_external_source),
+        muscles are looked up there instead of calling the external API.
         """
         # This is a placeholder for the actual workout generation logic
         # In a real implementation, we would:
@@ -123,7 +269,10 @@ class ExerciseService:
         # Get some exercises for each muscle group
         for muscle in muscle_groups:
             try:
-                muscle_exercises = self.get_exercises_by_muscle_from_external_source(muscle)
+                if exercises_by_muscle is not None:
+                    muscle_exercises = exercises_by_muscle.get(muscle, [])
+                else:
+                    muscle_exercises = self.get_exercises_by_muscle_from_external_source(muscle)
                 # Filter by available equipment
                 filtered_exercises = [
                     ex for ex in muscle_exercises
@@ -0,0 +1,207 @@
+import threading
+from array import array
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.db.session import ReadSession, SessionLocal
+from app.models.workout import Exercise
+from app.utils.bitmask import available_equipment_mask, equipment_mask
+
+
+class CatalogExercise:
+    """
+    Session-independent copy of an ``Exercise`` row.
+
+    Instances are shared between requests and threads, so they must never be
+    mutated after the catalog has been built.
+    """
+
+    __slots__ = (
+        "id",
+        "name",
+        "body_part",
+        "target",
+        "secondary_muscles",
+        "equipment",
+        "gif_url",
+        "instructions",
+    )
+
+    def __init__(self, exercise: Exercise):
+        self.id = exercise.id
+        self.name = exercise.name
+        self.body_part = exercise.body_part
+        self.target = exercise.target
+        self.secondary_muscles = tuple(exercise.secondary_muscles or ())
+        self.equipment = exercise.equipment
+        self.gif_url = exercise.gif_url
+        self.instructions = tuple(exercise.instructions or ())
+
+    def __repr__(self) -> str:
+        return f"CatalogExercise(id={self.id!r}, name={self.name!r})"
+
+
+class CatalogMasks:
+    """
+    Equipment bitmasks of every catalog exercise, stored column-wise.
+
+    Position ``i`` of each array describes ``CatalogSnapshot.exercises[i]``.
+    """
+
+    __slots__ = ("equipment",)
+
+    def __init__(self, exercises: Iterable[CatalogExercise]):
+        self.equipment = array("Q")
+        for ex in exercises:
+            self.equipment.append(equipment_mask(ex.equipment))
+
+
+class CatalogSnapshot:
+    """
+    Immutable view of the exercise catalog keyed by id, target, equipment and body part.
+    """
+
+    def __init__(self, exercises: List[CatalogExercise], version: int):
+        self.version = version
+        self.exercises: Tuple[CatalogExercise, ...] = tuple(exercises)
+        self.masks = CatalogMasks(self.exercises)
+        self._by_id: Dict[int, CatalogExercise] = {ex.id: ex for ex in self.exercises}
+        self._by_target = self._group_by("target")
+        self._by_equipment = self._group_by("equipment")
+        self._by_body_part = self._group_by("body_part")
+        self._positions_by_target = self._group_positions_by_target()
+
+    def _group_positions_by_target(self) -> Dict[str, Tuple[int, ...]]:
+        groups: Dict[str, List[int]] = defaultdict(list)
+        for position, ex in enumerate(self.exercises):
+            groups[ex.target].append(position)
+        return {key: tuple(values) for key, values in groups.items()}
+
+    def _group_by(self, attribute: str) -> Dict[str, Tuple[CatalogExercise, ...]]:
+        groups: Dict[str, List[CatalogExercise]] = defaultdict(list)
+        for ex in self.exercises:
+            groups[getattr(ex, attribute)].append(ex)
+        return {key: tuple(values) for key, values in groups.items()}
+
+    def __len__(self) -> int:
+        return len(self.exercises)
+
+    def get_exercise_by_id(self, exercise_id: int) -> Optional[CatalogExercise]:
+        """
+        Get an exercise by ID.
+        """
+        return self._by_id.get(exercise_id)
+
+    def get_exercises_by_muscle(self, muscle: str) -> Tuple[CatalogExercise, ...]:
+        """
+        Get exercises by target muscle.
+        """
+        return self._by_target.get(muscle, ())
+
+    def get_exercises_by_equipment(self, equipment: str) -> Tuple[CatalogExercise, ...]:
+        """
+        Get exercises by equipment.
+        """
+        return self._by_equipment.get(equipment, ())
+
+    def get_exercises_by_body_part(self, body_part: str) -> Tuple[CatalogExercise, ...]:
+        """
+        Get exercises by body part.
+        """
+        return self._by_body_part.get(body_part, ())
+
+    def get_exercises_by_muscles(
+        self,
+        muscles: List[str],
+        available_equipment: Optional[List[str]] = None,
+        per_group_limit: Optional[int] = None
+    ) -> List[CatalogExercise]:
+        """
+        Get exercises for several target muscles that only use the available equipment.
+
+        Args:
+            muscles: Target muscles, in the order the result should be grouped by
+            available_equipment: Equipment the user owns, or None to skip the equipment filter
+            per_group_limit: Maximum number of exercises per target muscle, or no limit when None
+
+        Returns:
+            A list of exercises grouped by target muscle
+        """
+        equipment = self.masks.equipment
+        unavailable = ~available_equipment_mask(available_equipment) if available_equipment is not None else 0
+        result: List[CatalogExercise] = []
+        for muscle in muscles:
+            matches = [
+                position for position in self._positions_by_target.get(muscle, ())
+                if equipment[position] & unavailable == 0
+            ]
+            result.extend(self.exercises[position] for position in matches[:per_group_limit])
+        return result
+
+
+class ExerciseCatalog:
+    """
+    Process-wide, read-mostly index over the ``exercises`` table.
+
+    The catalog is loaded lazily with a single query on first use and kept until
+    ``invalidate`` is called by a code path that changes the table. It is always
+    loaded from the primary: a lagging replica would freeze stale rows into the
+    snapshot until the next invalidation.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        self._session_factory = session_factory
+        self._lock = threading.Lock()
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._version = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def get(self, db: Session) -> CatalogSnapshot:
+        """
+        Return the current snapshot, loading it from the database if needed.
+
+        Args:
+            db: The database session used when the catalog has to be (re)loaded.
+                Read sessions are not used, a primary session is opened instead
+
+        Returns:
+            The current catalog snapshot
+        """
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+
+        with self._lock:
+            if self._snapshot is None:
+                version = self._version
+                exercises = [CatalogExercise(ex) for ex in self._load_exercises(db)]
+                # A concurrent invalidate() bumps the version; only publish if we are still current
+                if version == self._version:
+                    self._snapshot = CatalogSnapshot(exercises, version)
+                else:
+                    return CatalogSnapshot(exercises, version)
+            return self._snapshot
+
+    def invalidate(self) -> None:
+        """
+        Drop the current snapshot so the next reader reloads it.
+        """
+        self._version += 1
+        self._snapshot = None
+
+    def _load_exercises(self, db: Session) -> List[Exercise]:
+        if isinstance(db, ReadSession):
+            primary = self._session_factory()
+            try:
+                return self._load_exercises(primary)
+            finally:
+                primary.close()
+        return db.query(Exercise).filter(Exercise.is_active.is_(True)).order_by(Exercise.id).all()
+
+
+exercise_catalog = ExerciseCatalog()
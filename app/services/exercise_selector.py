@@ -1,9 +1,11 @@
 import random
 from typing import List, Dict, Any, Optional
 
-from app.models.workout import Exercise
+from app.core.config import settings
 from app.schemas.exercise import WorkoutExerciseResponse
 from app.services.exercise import ExerciseService
+from app.services.exercise_catalog import exercise_catalog
+from app.utils.bitmask import available_equipment_mask, equipment_names
 from app.utils.helper import safe_int_convert
 from sqlalchemy.orm import Session
 
@@ -14,6 +16,7 @@ class ExerciseSelectorService:
     """
     
     def __init__(self, db: Session):
+        self.db = db
         self.exercise_service = ExerciseService(db)
     
     def select_exercises_for_workout(
@@ -39,47 +42,26 @@ class ExerciseSelectorService:
         """
         if not recently_used_exercises:
             recently_used_exercises = []
+        if not available_equipment:
+            available_equipment = []
         
         # Get muscle groups for he focus
         muscle_groups = self._get_muscle_groups_for_focus(focus)
         
-        # Get exercises for each muscle group
-        all_exercises: List[Exercise] = []
-        for muscle in muscle_groups:
-            try:
-                muscle_exercises = self.exercise_service.get_exercises_by_muscle(muscle)[:3]
-                # Filter by available equipment
-                filtered_exercises = [
-                    ex for ex in muscle_exercises
-                    if ex.equipment in available_equipment
-                ]
-                # Filter out recently used exercises
-                filtered_exercises = [
-                    ex for ex in filtered_exercises
-                    if ex.id not in recently_used_exercises
-                ]
-                all_exercises.extend(filtered_exercises)
-            except Exception:
-                # If API call fails, continue with other muscle groups
-                continue
+        # Get up to 3 exercises for each muscle group with the user's equipment
+        all_exercises = [
+            ex for ex in self._get_candidate_exercises(muscle_groups, available_equipment, per_group_limit=3)
+            if ex.id not in recently_used_exercises
+        ]
         
         # If we don't have enough exercises after filtering, include some recently used ones
         if len(all_exercises) < 3:
-            for muscle in muscle_groups:
-                try:
-                    muscle_exercises = self.exercise_service.get_exercises_by_muscle(muscle)
-                    # Filter by available equipment only
-                    filtered_exercises = [
-                        ex for ex in muscle_exercises
-                        if ex.equipment in available_equipment
-                    ]
-                    # Add exercises that weren't already added
-                    for ex in filtered_exercises:
-                        if not any(e.id == ex.id for e in all_exercises):
-                            all_exercises.append(ex)
-                except Exception:
-                    # If API call fails, continue with other muscle groups
-                    continue
+            selected_ids = {ex.id for ex in all_exercises}
+            for ex in self._get_candidate_exercises(muscle_groups, available_equipment):
+                # Add exercises that weren't already added
+                if ex.id not in selected_ids:
+                    selected_ids.add(ex.id)
+                    all_exercises.append(ex)
         
         # Shuffle exercises to ensure variety
         random.shuffle(all_exercises)
@@ -147,44 +129,28 @@ class ExerciseSelectorService:
         if exercise_id not in recently_used_exercises:
             recently_used_exercises.append(exercise_id)
         
-        # Get exercises for the muscle group
+        if not available_equipment:
+            available_equipment = []
+        
+        # Get exercises for the muscle group with the user's equipment, filtered like
+        # select_exercises_for_workout so both agree on what the user can do
         try:
-            muscle_exercises = self.exercise_service.get_exercises_by_muscle(muscle_group)
-            
-            # Filter by available equipment
-            filtered_exercises = [
-                ex for ex in muscle_exercises
-                if not ex.get("equipment") or ex.get("equipment") in available_equipment
-            ]
+            muscle_exercises = self._get_candidate_exercises([muscle_group], available_equipment)
             
             # Filter out recently used exercises
             filtered_exercises = [
-                ex for ex in filtered_exercises
-                if ex.get("id") not in recently_used_exercises
+                ex for ex in muscle_exercises
+                if ex.id not in recently_used_exercises
             ]
             
             # If we don't have any exercises after filtering, include some recently used ones
             if not filtered_exercises:
-                filtered_exercises = [
-                    ex for ex in muscle_exercises
-                    if not ex.get("equipment") or ex.get("equipment") in available_equipment
-                ]
+                filtered_exercises = list(muscle_exercises)
             
             # If we still don't have any exercises, try to get exercises for a similar muscle group
             if not filtered_exercises:
                 similar_muscles = self._get_similar_muscle_groups(muscle_group)
-                for similar_muscle in similar_muscles:
-                    try:
-                        similar_exercises = self.exercise_service.get_exercises_by_muscle(similar_muscle)
-                        # Filter by available equipment
-                        similar_filtered = [
-                            ex for ex in similar_exercises
-                            if not ex.get("equipment") or ex.get("equipment") in available_equipment
-                        ]
-                        filtered_exercises.extend(similar_filtered)
-                    except Exception:
-                        # If API call fails, continue with other muscle groups
-                        continue
+                filtered_exercises.extend(self._get_candidate_exercises(similar_muscles, available_equipment))
             
             # If we still don't have any exercises, return a default exercise
             if not filtered_exercises:
@@ -217,11 +183,11 @@ class ExerciseSelectorService:
                 rest_seconds = 30
             
             return {
-                "exercise_id": new_exercise.get("id"),
-                "name": new_exercise.get("name"),
-                "description": new_exercise.get("instructions", []),
-                "muscle_group": new_exercise.get("target"),
-                "equipment": new_exercise.get("equipment"),
+                "exercise_id": new_exercise.id,
+                "name": new_exercise.name,
+                "description": list(new_exercise.instructions or []),
+                "muscle_group": new_exercise.target,
+                "equipment": new_exercise.equipment,
                 "sets": sets,
                 "reps": reps,
                 "rest_seconds": rest_seconds
@@ -240,6 +206,39 @@ class ExerciseSelectorService:
                 "rest_seconds": 60
             }
     
+    def _get_candidate_exercises(
+        self,
+        muscle_groups: List[str],
+        available_equipment: Optional[List[str]] = None,
+        per_group_limit: Optional[int] = None
+    ) -> List[Any]:
+        """
+        Get candidate exercises for several muscle groups at once.
+        
+        Reads from the in-memory catalog index when it is enabled, otherwise issues a
+        single query through the exercise service.
+        
+        Args:
+            muscle_groups: The target muscle groups
+            available_equipment: Only return exercises using this equipment, or any when None
+            per_group_limit: Maximum number of exercises per muscle group, or no limit when None
+            
+        Returns:
+            A list of exercises grouped by muscle group in the order given
+        """
+        if not settings.EXERCISE_CATALOG_ENABLED:
+            # Apply the same equipment implications as the catalog's bitmask filter
+            equipment = None
+            if available_equipment is not None:
+                equipment = equipment_names(available_equipment_mask(available_equipment))
+            return self.exercise_service.get_exercises_by_muscles(
+                muscle_groups, equipment=equipment, per_group_limit=per_group_limit
+            )
+        
+        return exercise_catalog.get(self.db).get_exercises_by_muscles(
+            muscle_groups, available_equipment=available_equipment, per_group_limit=per_group_limit
+        )
+    
     def _get_muscle_groups_for_focus(self, focus: str) -> List[str]:
         """
         Get the muscle groups for a given workout focus.
@@ -0,0 +1,177 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+import requests
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CACHE_MODES = ("off", "readthrough", "record", "replay")
+
+
+class ResponseNotRecorded(LookupError):
+    """
+    Raised in replay mode when no recorded response exists for a request.
+    """
+
+
+class ResponseCache:
+    """
+    Content-addressed on-disk cache for JSON HTTP responses.
+
+    Entries are keyed by a hash of the URL and query parameters. Modes:
+
+    - ``off``: always call the source
+    - ``readthrough``: serve fresh entries, serve stale ones while revalidating in
+      the background, and fetch on a miss
+    - ``record``: always call the source and store the response
+    - ``replay``: only serve recorded responses, never touch the network
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        mode: str = "readthrough",
+        ttl_seconds: int = 60 * 60 * 24,
+        stale_seconds: int = 60 * 60 * 24 * 7
+    ):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode {mode!r}, expected one of {CACHE_MODES}")
+        self.directory = directory
+        self.mode = mode
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self._revalidating = set()
+        self._revalidating_lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @staticmethod
+    def key(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Get the cache key of a request.
+        """
+        payload = json.dumps({"url": url, "params": params or {}}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get_json(
+        self,
+        url: str,
+        fetch: Callable[[], requests.Response],
+        params: Optional[Dict[str, Any]] = None,
+        refresh: bool = False
+    ) -> Any:
+        """
+        Get the JSON body of a request, from the cache when possible.
+
+        Args:
+            url: The request URL
+            fetch: Performs the actual request
+            params: The request query parameters
+            refresh: Skip cached entries (but still store the response); ignored in replay mode
+
+        Returns:
+            The decoded JSON body
+
+        Raises:
+            ResponseNotRecorded: In replay mode, if the request was never recorded
+        """
+        if self.mode == "off":
+            return fetch().json()
+
+        key = self.key(url, params)
+        entry = self._read(key)
+
+        if self.mode == "replay":
+            if entry is None:
+                raise ResponseNotRecorded(f"No recorded response for {url} {params or ''}".strip())
+            return entry["body"]
+
+        if self.mode == "readthrough" and entry is not None and not refresh:
+            age = time.time() - entry["fetched_at"]
+            if age < self.ttl_seconds:
+                return entry["body"]
+            if age < self.ttl_seconds + self.stale_seconds:
+                self._revalidate(key, url, params, fetch)
+                return entry["body"]
+
+        return self._fetch_and_store(key, url, params, fetch)
+
+    def _fetch_and_store(
+        self,
+        key: str,
+        url: str,
+        params: Optional[Dict[str, Any]],
+        fetch: Callable[[], requests.Response]
+    ) -> Any:
+        response = fetch()
+        body = response.json()
+        # Only successful responses are cached; errors are returned but retried next time
+        if response.ok:
+            self._write(key, {"url": url, "params": params, "fetched_at": time.time(), "body": body})
+        return body
+
+    def _revalidate(
+        self,
+        key: str,
+        url: str,
+        params: Optional[Dict[str, Any]],
+        fetch: Callable[[], requests.Response]
+    ) -> None:
+        with self._revalidating_lock:
+            if key in self._revalidating:
+                return
+            self._revalidating.add(key)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="response-cache")
+
+        def revalidate():
+            try:
+                self._fetch_and_store(key, url, params, fetch)
+            except Exception:
+                logger.warning("Revalidating cached response for %s failed", url, exc_info=True)
+            finally:
+                with self._revalidating_lock:
+                    self._revalidating.discard(key)
+
+        self._executor.submit(revalidate)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            logger.warning("Ignoring unreadable cache entry %s", key, exc_info=True)
+            return None
+
+    def _write(self, key: str, entry: Dict[str, Any]) -> None:
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temporary file first so readers never see a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            logger.warning("Could not write cache entry for %s", entry["url"], exc_info=True)
+
+
+exercise_api_cache = ResponseCache(
+    directory=settings.EXERCISE_API_CACHE_DIR,
+    mode=settings.EXERCISE_API_CACHE_MODE,
+    ttl_seconds=settings.EXERCISE_API_CACHE_TTL_SECONDS,
+    stale_seconds=settings.EXERCISE_API_CACHE_STALE_SECONDS,
+)
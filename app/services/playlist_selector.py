@@ -1,14 +1,15 @@
 import random
 from typing import List, Dict, Any, Optional
-from app.services.spotify import SpotifyService
+from app.services.spotify import SyncSpotifyService
 
 class PlaylistSelectorService:
     """
     Service for selecting playlists based on workout type and user preferences.
     """
     
-    def __init__(self):
-        self.spotify_service = SpotifyService()
+    def __init__(self, spotify_service: Optional[SyncSpotifyService] = None):
+        # Blocking facade: the selector runs in sync endpoints
+        self.spotify_service = spotify_service or SyncSpotifyService()
         self.energy_map = {
             "Full Body": 0.8,
             "Upper Body": 0.7,
@@ -1,7 +1,10 @@
 import random
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
+from app.models.workout import Workout, WorkoutExercise
 from app.services.exercise import ExerciseService
+from app.utils.helper import safe_int_convert
+from sqlalchemy import delete, insert
 from sqlalchemy.orm import Session
 
 class SchedulerService:
@@ -10,6 +13,7 @@ class SchedulerService:
     """
     
     def __init__(self, db: Session):
+        self.db = db
         self.exercise_service = ExerciseService(db)
     
     def generate_weekly_schedule(
@@ -62,10 +66,18 @@ class SchedulerService:
         # Determine workout split based on available days and fitness goal
         workout_split = self._determine_workout_split(available_days, fitness_goal)
         
+        # Plan every day first so all the exercise fetches can happen at once
+        focus_by_day = [workout_split[i % len(workout_split)] for i in range(len(available_days))]
+        muscle_groups_by_day = [self._get_muscle_groups_for_focus(focus) for focus in focus_by_day]
+        
+        # Fetch each distinct muscle once, concurrently; days sharing a focus reuse the result
+        exercises_by_muscle = self.exercise_service.prefetch_exercises_by_muscles_from_external_source(
+            [muscle for muscle_groups in muscle_groups_by_day for muscle in muscle_groups]
+        )
+        
         # Generate workouts for each available day
         workouts = []
-        for i, day in enumerate(available_days):
-            focus = workout_split[i % len(workout_split)]
+        for day, focus, muscle_groups in zip(available_days, focus_by_day, muscle_groups_by_day):
             workout_date = day_map[day]
             
             # Create workout
@@ -78,12 +90,12 @@ class SchedulerService:
             }
             
             # Generate exercises for this workout
-            muscle_groups = self._get_muscle_groups_for_focus(focus)
             exercises = self.exercise_service.generate_workout(
                 muscle_groups=muscle_groups,
                 available_equipment=available_equipment,
                 fitness_level=fitness_level,
-                workout_duration_minutes=workout_duration_minutes
+                workout_duration_minutes=workout_duration_minutes,
+                exercises_by_muscle=exercises_by_muscle
             )
             
             workout["exercises"] = exercises
@@ -91,6 +103,87 @@ class SchedulerService:
         
         return workouts
     
+    def save_weekly_schedule(
+        self,
+        workouts: List[Dict[str, Any]],
+        replace_workout_ids: Optional[List[int]] = None
+    ) -> List[int]:
+        """
+        Persist a generated schedule in a single transaction.
+        
+        The number of statements does not depend on the number of workouts or
+        exercises: one delete for the replaced workouts (their exercises go with
+        them through ON DELETE CASCADE), one bulk insert of the workouts and one
+        executemany insert of all their exercises.
+        
+        Args:
+            workouts: Workouts as returned by generate_weekly_schedule
+            replace_workout_ids: IDs of existing workouts to delete in the same transaction
+            
+        Returns:
+            The IDs of the created workouts, in the order they were given
+        """
+        try:
+            if replace_workout_ids:
+                self.db.execute(
+                    delete(Workout)
+                    .where(Workout.id.in_(replace_workout_ids))
+                    .execution_options(synchronize_session=False)
+                )
+            
+            workout_ids: List[int] = []
+            if workouts:
+                workout_rows = [
+                    {key: value for key, value in workout.items() if key != "exercises"}
+                    for workout in workouts
+                ]
+                workout_ids = list(self.db.execute(
+                    insert(Workout).returning(Workout.id, sort_by_parameter_order=True),
+                    workout_rows
+                ).scalars())
+            
+            exercise_rows = [
+                row
+                for workout_id, workout in zip(workout_ids, workouts)
+                for row in self._workout_exercise_rows(workout_id, workout.get("exercises", []))
+            ]
+            if exercise_rows:
+                self.db.execute(insert(WorkoutExercise), exercise_rows)
+            
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return workout_ids
+    
+    @staticmethod
+    def _workout_exercise_rows(workout_id: int, exercises: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Map generated exercises to workout_exercises rows.
+        
+        Generated exercises carry display fields (name, description, ...) that are
+        not columns; those are dropped. An exercise can only appear once per
+        workout, so duplicates are skipped and the order is renumbered.
+        """
+        rows = []
+        seen = set()
+        for exercise in exercises:
+            exercise_id = safe_int_convert(exercise.get("exercise_id"))
+            if not exercise_id or exercise_id in seen:
+                continue
+            seen.add(exercise_id)
+            rows.append({
+                "workout_id": workout_id,
+                "exercise_id": exercise_id,
+                "sets": exercise.get("sets"),
+                "reps": exercise.get("reps"),
+                "rest_seconds": exercise.get("rest_seconds"),
+                "order": len(rows) + 1,
+                "completed_sets": 0,
+                "weights_used": [],
+            })
+        return rows
+    
     def _determine_workout_split(self, available_days: List[str], fitness_goal: str) -> List[str]:
         """
         Determine the workout split based on available days and fitness goal.
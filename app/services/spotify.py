@@ -1,16 +1,79 @@
+import asyncio
 import base64
-import requests
-from typing import Dict, List, Optional, Any
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
 from app.core.config import settings
 
+# One pooled, keep-alive client for the whole app, opened at startup (or on
+# first use) and closed when the app shuts down, with the loop it belongs to
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _default_timeout() -> httpx.Timeout:
+    return httpx.Timeout(settings.SPOTIFY_TIMEOUT_SECONDS, connect=settings.SPOTIFY_CONNECT_TIMEOUT_SECONDS)
+
+
+def get_spotify_client() -> httpx.AsyncClient:
+    """
+    Get the app-scoped Spotify HTTP client. Must be called on the event loop.
+    """
+    global _client, _client_loop
+    if _client is None or _client.is_closed:
+        _client_loop = asyncio.get_running_loop()
+        _client = httpx.AsyncClient(
+            timeout=_default_timeout(),
+            limits=httpx.Limits(
+                max_connections=settings.SPOTIFY_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.SPOTIFY_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.SPOTIFY_KEEPALIVE_EXPIRY_SECONDS,
+            ),
+        )
+    return _client
+
+
+async def close_spotify_client() -> None:
+    """
+    Close the app-scoped Spotify HTTP client and its pooled connections.
+    """
+    global _client, _client_loop
+    client, _client, _client_loop = _client, None, None
+    if client is not None:
+        await client.aclose()
+
+
 class SpotifyService:
-    def __init__(self):
+    def __init__(self, client: Optional[httpx.AsyncClient] = None, timeout: Optional[httpx.Timeout] = None):
         self.client_id = settings.SPOTIFY_CLIENT_ID
         self.client_secret = settings.SPOTIFY_CLIENT_SECRET
         self.auth_url = "https://accounts.spotify.com/authorize"
         self.token_url = "https://accounts.spotify.com/api/token"
         self.api_base_url = "https://api.spotify.com/v1"
-    
+        self._client = client
+        self.timeout = timeout or _default_timeout()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self._client or get_spotify_client()
+
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Send a request on the pooled client, bounded by this service's timeout.
+        """
+        return await self.client.request(method, url, timeout=self.timeout, **kwargs)
+
+    def _bearer(self, access_token: str) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {access_token}"}
+
+    def _basic(self) -> Dict[str, str]:
+        auth_header = base64.b64encode(f"{self.client_id}:{self.client_secret}".encode()).decode()
+        return {
+            "Authorization": f"Basic {auth_header}",
+            "Content-Type": "application/x-www-form-urlencoded"
+        }
+
     def get_auth_url(self, redirect_uri: str, state: Optional[str] = None) -> str:
         """
         Get the Spotify authorization URL.
@@ -23,67 +86,51 @@ class SpotifyService:
         }
         if state:
             params["state"] = state
-        
+
         auth_url = f"{self.auth_url}?" + "&".join([f"{k}={v}" for k, v in params.items()])
         return auth_url
-    
-    def get_access_token(self, code: str, redirect_uri: str) -> Dict[str, Any]:
+
+    async def get_access_token(self, code: str, redirect_uri: str) -> Dict[str, Any]:
         """
         Exchange authorization code for access token.
         """
-        auth_header = base64.b64encode(f"{self.client_id}:{self.client_secret}".encode()).decode()
-        headers = {
-            "Authorization": f"Basic {auth_header}",
-            "Content-Type": "application/x-www-form-urlencoded"
-        }
         data = {
             "grant_type": "authorization_code",
             "code": code,
             "redirect_uri": redirect_uri
         }
-        
-        response = requests.post(self.token_url, headers=headers, data=data)
+
+        response = await self._request("POST", self.token_url, headers=self._basic(), data=data)
         return response.json()
-    
-    def refresh_access_token(self, refresh_token: str) -> Dict[str, Any]:
+
+    async def refresh_access_token(self, refresh_token: str) -> Dict[str, Any]:
         """
         Refresh an access token.
         """
-        auth_header = base64.b64encode(f"{self.client_id}:{self.client_secret}".encode()).decode()
-        headers = {
-            "Authorization": f"Basic {auth_header}",
-            "Content-Type": "application/x-www-form-urlencoded"
-        }
         data = {
             "grant_type": "refresh_token",
             "refresh_token": refresh_token
         }
-        
-        response = requests.post(self.token_url, headers=headers, data=data)
+
+        response = await self._request("POST", self.token_url, headers=self._basic(), data=data)
         return response.json()
-    
+
     async def get_user_profile(self, access_token: str) -> Dict[str, Any]:
         """
         Get the user's Spotify profile.
         """
-        headers = {
-            "Authorization": f"Bearer {access_token}"
-        }
-        
-        response = requests.get(f"{self.api_base_url}/me", headers=headers)
+        response = await self._request("GET", f"{self.api_base_url}/me", headers=self._bearer(access_token))
         return response.json()
-    
+
     async def get_user_playlists(self, access_token: str, limit: int = 50) -> Dict[str, Any]:
         """
         Get the user's playlists.
         """
-        headers = {
-            "Authorization": f"Bearer {access_token}"
-        }
-        
-        response = requests.get(f"{self.api_base_url}/me/playlists?limit={limit}", headers=headers)
+        response = await self._request(
+            "GET", f"{self.api_base_url}/me/playlists", headers=self._bearer(access_token), params={"limit": limit}
+        )
         return response.json()
-    
+
     async def create_playlist(
         self,
         access_token: str,
@@ -95,23 +142,20 @@ class SpotifyService:
         """
         Create a new playlist.
         """
-        headers = {
-            "Authorization": f"Bearer {access_token}",
-            "Content-Type": "application/json"
-        }
         data = {
             "name": name,
             "description": description,
             "public": public
         }
-        
-        response = requests.post(
+
+        response = await self._request(
+            "POST",
             f"{self.api_base_url}/users/{user_id}/playlists",
-            headers=headers,
+            headers=self._bearer(access_token),
             json=data
         )
         return response.json()
-    
+
     async def add_tracks_to_playlist(
         self,
         access_token: str,
@@ -121,27 +165,47 @@ class SpotifyService:
         """
         Add tracks to a playlist.
         """
-        headers = {
-            "Authorization": f"Bearer {access_token}",
-            "Content-Type": "application/json"
-        }
         data = {
             "uris": track_uris
         }
-        
-        response = requests.post(
+
+        response = await self._request(
+            "POST",
             f"{self.api_base_url}/playlists/{playlist_id}/tracks",
-            headers=headers,
+            headers=self._bearer(access_token),
             json=data
         )
         return response.json()
-    
+
+    async def get_recommendations(
+        self,
+        access_token: str,
+        seed_genres: Optional[List[str]] = None,
+        seed_tracks: Optional[List[str]] = None,
+        limit: int = 20,
+        target_energy: Optional[float] = None,
+        target_tempo: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Get track recommendations for up to 5 seed genres and tracks.
+        """
+        params: Dict[str, Any] = {"limit": limit}
+        if seed_genres:
+            params["seed_genres"] = ",".join(seed_genres[:5])
+        if seed_tracks:
+            params["seed_tracks"] = ",".join(seed_tracks[:5])
+        if target_energy is not None:
+            params["target_energy"] = target_energy
+        if target_tempo is not None:
+            params["target_tempo"] = target_tempo
+
+        response = await self._request(
+            "GET", f"{self.api_base_url}/recommendations", headers=self._bearer(access_token), params=params
+        )
+        return response.json()
+
     async def get_seed_tracks(self, access_token: str, genres: list, workout_type: str) -> list:
         """Get seed tracks based on genres and workout type."""
-        headers = {
-            "Authorization": f"Bearer {access_token}"
-        }
-        
         # Map workout types to appropriate genres
         workout_genres = {
             "cardio": ["electronic", "dance", "pop"],
@@ -150,7 +214,7 @@ class SpotifyService:
         }
 
         # Combine workout-specific genres with user preferences
-        selected_genres = workout_genres.get(workout_type, [])
+        selected_genres = list(workout_genres.get(workout_type, []))
         if genres:
             selected_genres.extend([g for g in genres if g not in selected_genres])
         selected_genres = selected_genres[:5]  # Spotify allows max 5 seed genres
@@ -160,27 +224,28 @@ class SpotifyService:
             "seed_genres": ",".join(selected_genres[:5]),
             "limit": 2  # Get 2 tracks to use as seeds
         }
-        
-        response = requests.get(
+
+        response = await self._request(
+            "GET",
             f"{self.api_base_url}/recommendations",
-            headers=headers,
+            headers=self._bearer(access_token),
             params=params
         )
-        
+
         if response.status_code != 200:
             raise Exception(f"Failed to get seed tracks: {response.json()}")
-            
+
         tracks = response.json().get("tracks", [])
         return [track["id"] for track in tracks]
 
 
-    def create_workout_playlist(self, access_token: str, track_uris: list, 
+    async def create_workout_playlist(self, access_token: str, track_uris: list,
                               workout_type: str, user_id: str) -> dict:
         """Create a new playlist with the recommended tracks."""
         # Get user profile for display name
-        user_profile = self.get_user_profile(access_token)
+        user_profile = await self.get_user_profile(access_token)
         display_name = user_profile.get("display_name", "User")
-        
+
         # Create playlist name and description
         workout_names = {
             "cardio": "Cardio Boost",
@@ -189,29 +254,29 @@ class SpotifyService:
         }
         playlist_name = f"{workout_names.get(workout_type, 'Workout')} for {display_name}"
         description = f"Custom {workout_type.title()} workout playlist created by SyncNSweat"
-        
+
         # Create the playlist
-        playlist = self.create_playlist(
+        playlist = await self.create_playlist(
             access_token=access_token,
             user_id=user_id,
             name=playlist_name,
             description=description,
             public=False  # Keep private by default
         )
-        
+
         if "id" not in playlist:
             raise Exception(f"Failed to create playlist: {playlist}")
-        
+
         # Add tracks to the playlist
-        result = self.add_tracks_to_playlist(
+        result = await self.add_tracks_to_playlist(
             access_token=access_token,
             playlist_id=playlist["id"],
             track_uris=track_uris
         )
-        
+
         if "snapshot_id" not in result:
             raise Exception(f"Failed to add tracks to playlist: {result}")
-        
+
         # Return playlist details
         return {
             "id": playlist["id"],
@@ -222,11 +287,8 @@ class SpotifyService:
 
     async def get_current_user_top_tracks(self, access_token: str) -> dict:
         """Get the user's top tracks."""
-        headers = {
-            "Authorization": f"Bearer {access_token}"
-        }
-        try: 
-            response = requests.get(f"{self.api_base_url}/me/top/tracks", headers=headers)
+        try:
+            response = await self._request("GET", f"{self.api_base_url}/me/top/tracks", headers=self._bearer(access_token))
             return {
                 "items": response.json().get("items", [])
             }
@@ -234,16 +296,13 @@ class SpotifyService:
             return {
                 "items": []
             }
-        
-    
-    
+
+
+
     async def get_current_user_top_artists(self, access_token: str) -> dict:
         """Get the user's top artists."""
-        headers = {
-            "Authorization": f"Bearer {access_token}"
-        }
         try:
-            response = requests.get(f"{self.api_base_url}/me/top/artists", headers=headers)
+            response = await self._request("GET", f"{self.api_base_url}/me/top/artists", headers=self._bearer(access_token))
             return {
                 "items": response.json().get("items", [])
             }
@@ -251,14 +310,65 @@ class SpotifyService:
             return {
                 "items": []
             }
-        
+
     async def search_tracks(self, access_token: str, search_query: str) -> dict:
         """Search for tracks."""
-        headers = {
-            "Authorization": f"Bearer {access_token}"
-        }
-        response = requests.get(f"{self.api_base_url}/search", headers=headers, params={"q": search_query, "type": "track"})
+        response = await self._request(
+            "GET",
+            f"{self.api_base_url}/search",
+            headers=self._bearer(access_token),
+            params={"q": search_query, "type": "track"}
+        )
         return response.json()
 
 
+class SyncSpotifyService:
+    """
+    Blocking access to SpotifyService for sync code such as sync endpoints.
+
+    From worker threads (where FastAPI runs sync endpoints) calls are sent to
+    the event loop that owns the app-scoped client. Without a running app
+    (scripts, tests) each call runs in its own event loop with a short-lived
+    client. Must not be used on the event loop itself; await SpotifyService there.
+    """
+
+    def __init__(self, service: Optional[SpotifyService] = None):
+        self.service = service or SpotifyService()
+
+    def _run(self, method: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        loop = _client_loop
+        if loop is not None and loop.is_running():
+            return asyncio.run_coroutine_threadsafe(method(*args, **kwargs), loop).result()
+        return asyncio.run(self._run_with_own_client(method.__name__, *args, **kwargs))
+
+    async def _run_with_own_client(self, name: str, *args, **kwargs) -> Any:
+        # Pooled connections belong to the loop that opened them
+        async with httpx.AsyncClient(timeout=self.service.timeout) as client:
+            service = SpotifyService(client=client, timeout=self.service.timeout)
+            return await getattr(service, name)(*args, **kwargs)
+
+    def get_auth_url(self, redirect_uri: str, state: Optional[str] = None) -> str:
+        return self.service.get_auth_url(redirect_uri, state)
+
+    def get_access_token(self, code: str, redirect_uri: str) -> Dict[str, Any]:
+        return self._run(self.service.get_access_token, code, redirect_uri)
+
+    def refresh_access_token(self, refresh_token: str) -> Dict[str, Any]:
+        return self._run(self.service.refresh_access_token, refresh_token)
+
+    def get_user_profile(self, access_token: str) -> Dict[str, Any]:
+        return self._run(self.service.get_user_profile, access_token)
+
+    def get_user_playlists(self, access_token: str, limit: int = 50) -> Dict[str, Any]:
+        return self._run(self.service.get_user_playlists, access_token, limit=limit)
+
+    def create_playlist(self, access_token: str, user_id: str, name: str, description: str = "", public: bool = False) -> Dict[str, Any]:
+        return self._run(
+            self.service.create_playlist, access_token, user_id=user_id, name=name, description=description, public=public
+        )
+
+    def add_tracks_to_playlist(self, access_token: str, playlist_id: str, track_uris: List[str]) -> Dict[str, Any]:
+        return self._run(self.service.add_tracks_to_playlist, access_token, playlist_id=playlist_id, track_uris=track_uris)
 
+    def get_recommendations(self, access_token: str, **kwargs) -> Dict[str, Any]:
+        return self._run(self.service.get_recommendations, access_token, **kwargs)
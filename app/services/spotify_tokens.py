@@ -0,0 +1,160 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+from fastapi import HTTPException, status
+from sqlalchemy import func, literal, select, update
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.config import settings
+from app.core.principal import principal_cache
+from app.db.session import SessionLocal
+from app.models.preferences import Preferences
+from app.services.spotify import SpotifyService, SyncSpotifyService
+
+# Striped locks: one refresh per user at a time, without a lock per user ever seen
+_LOCK_STRIPES = 64
+
+
+def spotify_token_fields(token_data: Dict[str, Any], now: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Token fields to store in Preferences.spotify_data from a Spotify token response.
+
+    Args:
+        token_data: The response of the token endpoint
+        now: The time the token was issued, as a Unix timestamp
+
+    Returns:
+        The token fields with their absolute expiry (expires_at). refresh_token is
+        only included when Spotify sent one, refreshes usually keep the old one
+    """
+    issued_at = time.time() if now is None else now
+    fields = {
+        "access_token": token_data.get("access_token"),
+        "expires_in": token_data.get("expires_in"),
+        "expires_at": issued_at + (token_data.get("expires_in") or 0),
+        "token_type": token_data.get("token_type"),
+    }
+    if token_data.get("refresh_token"):
+        fields["refresh_token"] = token_data["refresh_token"]
+    return fields
+
+
+class SpotifyTokenManager:
+    """
+    Hands out Spotify access tokens, refreshing them shortly before they expire.
+
+    Concurrent requests of the same user wait for a single refresh instead of
+    each spending the refresh token: threads of this process queue on a striped
+    lock, and other worker processes on a row lock (SELECT ... FOR UPDATE) on the
+    user's preferences, held until the refresh is committed. Refreshed tokens are
+    merged into the stored spotify_data in place, without reloading the
+    preferences, and committed in their own short session so the request's
+    session and objects are untouched.
+
+    The row lock and its pooled connection are held for the duration of the
+    call to Spotify, so that call is bounded by
+    settings.SPOTIFY_TOKEN_REFRESH_TIMEOUT_SECONDS instead of the general
+    Spotify timeout; a refresh that times out is rolled back and reported as 503.
+    """
+
+    def __init__(
+        self,
+        spotify_service: Optional[SyncSpotifyService] = None,
+        refresh_margin_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.time,
+        session_factory: Callable[[], Session] = SessionLocal,
+    ):
+        self.spotify_service = spotify_service or SyncSpotifyService(
+            SpotifyService(timeout=httpx.Timeout(settings.SPOTIFY_TOKEN_REFRESH_TIMEOUT_SECONDS))
+        )
+        self.session_factory = session_factory
+        self.refresh_margin_seconds = (
+            settings.SPOTIFY_TOKEN_REFRESH_MARGIN_SECONDS if refresh_margin_seconds is None else refresh_margin_seconds
+        )
+        self._clock = clock
+        self._locks = [threading.Lock() for _ in range(_LOCK_STRIPES)]
+
+    def needs_refresh(self, spotify_data: Optional[Dict[str, Any]]) -> bool:
+        """
+        Whether a stored token expires within the refresh margin.
+
+        Tokens stored before expires_at was recorded are treated as expired.
+        """
+        if not spotify_data or not spotify_data.get("refresh_token"):
+            # Nothing to refresh with
+            return False
+        expires_at = spotify_data.get("expires_at")
+        return expires_at is None or expires_at - self.refresh_margin_seconds <= self._clock()
+
+    def get_access_token(self, user_id: int, preferences: Preferences) -> str:
+        """
+        Get a Spotify access token for the user, refreshing it first if needed.
+
+        Args:
+            user_id: The id of the user the preferences belong to
+            preferences: The user's preferences, with a connected Spotify account
+
+        Returns:
+            A valid access token
+
+        Raises:
+            HTTPException: 400 if Spotify refuses to refresh the token, 503 if it
+                does not answer in time
+        """
+        spotify_data = preferences.spotify_data or {}
+        if not self.needs_refresh(spotify_data):
+            return spotify_data.get("access_token")
+
+        with self._locks[user_id % _LOCK_STRIPES]:
+            db = self.session_factory()
+            try:
+                # Another request or worker may have refreshed it while we waited. The
+                # row stays locked until _refresh commits or the session is closed, which
+                # blocks other refreshes and writes of this row (plain reads are not
+                # blocked) for at most the refresh timeout
+                current = db.scalar(
+                    select(Preferences.spotify_data).where(Preferences.id == preferences.id).with_for_update()
+                ) or {}
+                if self.needs_refresh(current):
+                    current = {**current, **self._refresh(db, preferences.id, current["refresh_token"])}
+                    principal_cache.invalidate(user_id)
+            finally:
+                db.close()
+
+        # Keep the request's copy current without marking it changed
+        set_committed_value(preferences, "spotify_data", current)
+        return current.get("access_token")
+
+    def _refresh(self, db: Session, preferences_id: int, refresh_token: str) -> Dict[str, Any]:
+        try:
+            token_data = self.spotify_service.refresh_access_token(refresh_token)
+        except httpx.HTTPError as e:
+            # Closing the session rolls back and releases the row for the next attempt
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Spotify token refresh failed: {e.__class__.__name__}",
+            )
+        if "error" in token_data:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Spotify token refresh error: {token_data['error']}",
+            )
+
+        fields = spotify_token_fields(token_data, now=self._clock())
+        # Merge into the stored document with jsonb ||, keeping keys we don't own
+        db.execute(
+            update(Preferences)
+            .where(Preferences.id == preferences_id)
+            .values(
+                spotify_data=func.coalesce(Preferences.spotify_data, literal({}, JSONB)).op("||")(literal(fields, JSONB))
+            )
+        )
+        db.commit()
+        return fields
+
+
+spotify_tokens = SpotifyTokenManager()
@@ -0,0 +1,248 @@
+import heapq
+import logging
+import re
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.services.exercise_catalog import CatalogExercise, ExerciseCatalog, exercise_catalog
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Typo tolerance kicks in from this query token length; shorter tokens are prefix-only
+MIN_FUZZY_LENGTH = 3
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """
+    Split text into lowercase alphanumeric tokens.
+    """
+    return _TOKEN_PATTERN.findall((text or "").lower())
+
+
+def max_edits(token: str) -> int:
+    """
+    Number of typos tolerated for a query token of this length.
+    """
+    if len(token) < MIN_FUZZY_LENGTH:
+        return 0
+    return 1 if len(token) < 6 else 2
+
+
+def _bigrams(token: str) -> Set[str]:
+    # Left padding only: the query is compared with word prefixes, not whole words
+    padded = f"${token}"
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+
+def prefix_edit_distance(query: str, word: str, max_distance: int) -> int:
+    """
+    Edit distance between the query and the closest prefix of the word.
+
+    The computation gives up as soon as the distance exceeds max_distance.
+
+    Returns:
+        The distance, or max_distance + 1 if it is larger than max_distance
+    """
+    # previous[j] is the distance between the current prefix of word and query[:j]
+    previous = list(range(len(query) + 1))
+    best = previous[-1]
+    for i, char in enumerate(word[:len(query) + max_distance], 1):
+        current = [i]
+        for j, query_char in enumerate(query, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (query_char != char)
+            ))
+        best = min(best, current[-1])
+        if min(current) > max_distance:
+            break
+        previous = current
+    return best if best <= max_distance else max_distance + 1
+
+
+class _TrieNode:
+    __slots__ = ("children", "words")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        # Ids of every vocabulary word starting with the prefix this node spells
+        self.words: List[int] = []
+
+
+class TypeaheadIndex:
+    """
+    Immutable autocomplete index over exercise names.
+
+    Every word of every name is stored once in a vocabulary. A prefix trie maps
+    each prefix to the words starting with it, and a bigram inverted index finds
+    candidate words for misspelled query tokens, which are then confirmed with a
+    bounded edit distance.
+    """
+
+    def __init__(self, exercises: Iterable[CatalogExercise], version: int):
+        self.version = version
+        self.exercises: Tuple[CatalogExercise, ...] = tuple(ex for ex in exercises if ex.name)
+        self._normalized_names = tuple(" ".join(tokenize(ex.name)) for ex in self.exercises)
+
+        word_ids: Dict[str, int] = {}
+        postings: Dict[int, Set[int]] = defaultdict(set)
+        for position, name in enumerate(self._normalized_names):
+            for word in name.split():
+                word_id = word_ids.setdefault(word, len(word_ids))
+                postings[word_id].add(position)
+
+        self._words: Tuple[str, ...] = tuple(word_ids)
+        self._postings: Tuple[frozenset, ...] = tuple(frozenset(postings[i]) for i in range(len(self._words)))
+        self._trie = _TrieNode()
+        self._bigram_index: Dict[str, List[int]] = defaultdict(list)
+        for word_id, word in enumerate(self._words):
+            node = self._trie
+            for char in word:
+                node = node.children.setdefault(char, _TrieNode())
+                node.words.append(word_id)
+            for bigram in _bigrams(word):
+                self._bigram_index[bigram].append(word_id)
+
+    def __len__(self) -> int:
+        return len(self.exercises)
+
+    def suggest(self, query: str, limit: int = 10) -> List[Tuple[CatalogExercise, int]]:
+        """
+        Suggest exercises whose names match the query as it is being typed.
+
+        Every query token must match the start of a word of the name, in any
+        order. Tokens without any prefix match are matched with up to one or two
+        typos, depending on their length.
+
+        Args:
+            query: The text typed so far
+            limit: Maximum number of suggestions
+
+        Returns:
+            Exercises with their number of typos, best matches first
+        """
+        tokens = tokenize(query)
+        if not tokens or limit <= 0:
+            return []
+
+        # Match the tokens with the fewest candidates first so the intersection shrinks fast
+        matches = sorted((self._match_token(token) for token in tokens), key=len)
+        candidates: Optional[Dict[int, int]] = None
+        for word_distances in matches:
+            positions: Dict[int, int] = {}
+            for word_id, distance in word_distances.items():
+                for position in self._postings[word_id]:
+                    if candidates is not None and position not in candidates:
+                        continue
+                    if distance < positions.get(position, distance + 1):
+                        positions[position] = distance
+            if candidates is not None:
+                positions = {position: distance + candidates[position] for position, distance in positions.items()}
+            candidates = positions
+            if not candidates:
+                return []
+
+        first_token = tokens[0]
+        best = heapq.nsmallest(
+            limit,
+            candidates.items(),
+            key=lambda item: (
+                item[1],
+                not self._normalized_names[item[0]].startswith(first_token),
+                len(self._normalized_names[item[0]]),
+                self.exercises[item[0]].id,
+            )
+        )
+        return [(self.exercises[position], distance) for position, distance in best]
+
+    def _match_token(self, token: str) -> Dict[int, int]:
+        """
+        Map vocabulary words matching a query token to their edit distance.
+        """
+        node = self._trie
+        for char in token:
+            node = node.children.get(char)
+            if node is None:
+                break
+        else:
+            return dict.fromkeys(node.words, 0)
+
+        distance_limit = max_edits(token)
+        if not distance_limit:
+            return {}
+
+        # Count filter: each edit destroys at most two of the token's bigrams
+        bigrams = _bigrams(token)
+        min_shared = max(1, len(bigrams) - 2 * distance_limit)
+        shared: Dict[int, int] = defaultdict(int)
+        for bigram in bigrams:
+            for word_id in self._bigram_index.get(bigram, ()):
+                shared[word_id] += 1
+
+        result = {}
+        for word_id, count in shared.items():
+            if count < min_shared:
+                continue
+            distance = prefix_edit_distance(token, self._words[word_id], distance_limit)
+            if distance <= distance_limit:
+                result[word_id] = distance
+        return result
+
+
+class ExerciseTypeahead:
+    """
+    Keeps a typeahead index in step with the exercise catalog.
+
+    The index is rebuilt whenever the catalog version changes, e.g. after an
+    exercise is edited or a catalog sync finishes.
+    """
+
+    def __init__(self, catalog: ExerciseCatalog = exercise_catalog):
+        self._catalog = catalog
+        self._lock = threading.Lock()
+        self._index: Optional[TypeaheadIndex] = None
+
+    def get(self, db: Session) -> TypeaheadIndex:
+        """
+        Return the index of the current catalog, building it if needed.
+
+        Args:
+            db: The database session used when the catalog has to be (re)loaded
+
+        Returns:
+            The typeahead index
+        """
+        snapshot = self._catalog.get(db)
+        index = self._index
+        if index is not None and index.version == snapshot.version:
+            return index
+
+        with self._lock:
+            if self._index is None or self._index.version != snapshot.version:
+                self._index = TypeaheadIndex(snapshot.exercises, snapshot.version)
+            return self._index
+
+    def warm(self, session_factory: Callable[[], Session] = SessionLocal) -> None:
+        """
+        Build the index ahead of the first request.
+
+        Failures are logged and not raised, the index is then built on first use.
+        """
+        db = session_factory()
+        try:
+            index = self.get(db)
+            logger.info("Typeahead index built with %d exercises", len(index))
+        except Exception:
+            logger.warning("Could not build the typeahead index at startup", exc_info=True)
+        finally:
+            db.close()
+
+
+exercise_typeahead = ExerciseTypeahead()
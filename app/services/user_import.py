@@ -0,0 +1,239 @@
+import csv
+import io
+import json
+import logging
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.passwords import PasswordHasher
+from app.models.preferences import Preferences
+from app.models.profile import Profile
+from app.models.user import User
+from app.schemas.user import UserCreate
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = ("ndjson", "csv")
+
+# The import endpoint hashes on a pool of its own, so a large upload never queues
+# ahead of logins and registrations on password_hasher. Room for two chunks' jobs
+# covers those of the last chunk still finishing up.
+import_password_hasher = PasswordHasher(
+    settings.BCRYPT_ROUNDS,
+    max_workers=settings.USER_IMPORT_HASH_WORKERS,
+    max_pending=2 * settings.USER_IMPORT_HASH_WORKERS,
+)
+
+
+def detect_format(filename: Optional[str]) -> str:
+    """
+    Guess the import format from a file name, defaulting to NDJSON.
+    """
+    if filename and filename.lower().endswith(".csv"):
+        return "csv"
+    return "ndjson"
+
+
+def read_rows(stream: TextIO, file_format: str) -> Iterator[Tuple[int, Any]]:
+    """
+    Read the records of an NDJSON or CSV file with their line numbers.
+
+    NDJSON lines that are not valid JSON are yielded as the error message so they
+    can be reported with the other per-row errors. Blank lines are skipped.
+
+    Args:
+        stream: The text to read
+        file_format: "ndjson" or "csv" (with an email,password,name header)
+
+    Returns:
+        (line number, record or error message) pairs
+    """
+    if file_format == "csv":
+        reader = csv.DictReader(stream)
+        for record in reader:
+            # Empty cells are missing values, not empty strings
+            yield reader.line_num, {key: value for key, value in record.items() if value not in (None, "")}
+        return
+
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError as e:
+            yield line_number, f"Invalid JSON: {e}"
+
+
+class UserImportService:
+    """
+    Service for onboarding many users at once.
+
+    Records are validated, then handled in chunks: the passwords of a chunk are
+    hashed in parallel by the given hasher, and its users, profiles and
+    preferences are written with three set-based inserts in one transaction.
+    A chunk that cannot be hashed or written is rolled back and reported without
+    stopping the import.
+
+    The hasher should be a pool of its own, such as import_password_hasher, not
+    the password_hasher serving logins, so that an import never queues ahead of
+    users signing in.
+    """
+
+    def __init__(self, db: Session, hasher: PasswordHasher, chunk_size: Optional[int] = None):
+        self.db = db
+        self.hasher = hasher
+        self.chunk_size = chunk_size or settings.USER_IMPORT_CHUNK_SIZE
+
+    def import_users(self, rows: Iterable[Tuple[int, Any]]) -> Dict[str, Any]:
+        """
+        Import users from parsed records.
+
+        Args:
+            rows: (line number, record or error message) pairs, as from read_rows
+
+        Returns:
+            Counts of received, imported and failed rows, the per-row errors,
+            the elapsed time and the throughput in rows per second
+        """
+        started = time.perf_counter()
+        report = {"received": 0, "imported": 0, "failed": 0, "errors": []}
+        seen_emails = set()
+        chunk: List[Tuple[int, UserCreate]] = []
+
+        for line_number, record in rows:
+            report["received"] += 1
+            user_in, error = self._validate(record)
+            if user_in is not None and user_in.email in seen_emails:
+                error = "Duplicate email in import"
+            if error is not None:
+                self._fail(report, line_number, record, error)
+                continue
+
+            seen_emails.add(user_in.email)
+            chunk.append((line_number, user_in))
+            if len(chunk) >= self.chunk_size:
+                self._import_chunk(chunk, report)
+                chunk = []
+
+        if chunk:
+            self._import_chunk(chunk, report)
+
+        elapsed = time.perf_counter() - started
+        report["elapsed_seconds"] = round(elapsed, 3)
+        report["rows_per_second"] = round(report["received"] / elapsed, 1) if elapsed > 0 else 0.0
+        return report
+
+    @staticmethod
+    def _validate(record: Any) -> Tuple[Optional[UserCreate], Optional[str]]:
+        if isinstance(record, str):
+            return None, record
+        if not isinstance(record, dict):
+            return None, "Expected an object with email, password and name"
+        try:
+            user_in = UserCreate.model_validate(record)
+        except ValidationError as e:
+            return None, "; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+            )
+        if not user_in.password:
+            return None, "password: must not be empty"
+        return user_in, None
+
+    @staticmethod
+    def _fail(report: Dict[str, Any], line_number: int, record: Any, error: str) -> None:
+        email = record.get("email") if isinstance(record, dict) else None
+        report["failed"] += 1
+        report["errors"].append({"row": line_number, "email": email, "error": error})
+
+    def _import_chunk(self, chunk: List[Tuple[int, UserCreate]], report: Dict[str, Any]) -> None:
+        # Skip the bcrypt work for emails that are already registered
+        existing = set(self.db.scalars(
+            select(User.email).where(User.email.in_([user_in.email for _, user_in in chunk]))
+        ))
+        for line_number, user_in in chunk:
+            if user_in.email in existing:
+                self._fail(report, line_number, {"email": user_in.email}, "Email already registered")
+        chunk = [(line_number, user_in) for line_number, user_in in chunk if user_in.email not in existing]
+        if not chunk:
+            self.db.rollback()
+            return
+
+        try:
+            hashed_passwords = self.hasher.hash_many([user_in.password for _, user_in in chunk])
+        except HTTPException as e:
+            # The pool is full; this chunk fails and the next one gets another try
+            self.db.rollback()
+            logger.warning("User import chunk of %d rows could not be hashed: %s", len(chunk), e.detail)
+            for line_number, user_in in chunk:
+                self._fail(report, line_number, {"email": user_in.email}, f"Password hashing unavailable: {e.detail}")
+            return
+
+        try:
+            inserted = self._insert(chunk, hashed_passwords)
+            self.db.commit()
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            logger.warning("User import chunk of %d rows failed", len(chunk), exc_info=True)
+            for line_number, user_in in chunk:
+                self._fail(report, line_number, {"email": user_in.email}, f"Database error: {e.__class__.__name__}")
+            return
+
+        for line_number, user_in in chunk:
+            if user_in.email in inserted:
+                report["imported"] += 1
+            else:
+                # Registered by someone else since the lookup above
+                self._fail(report, line_number, {"email": user_in.email}, "Email already registered")
+
+    def _insert(self, chunk: List[Tuple[int, UserCreate]], hashed_passwords: List[str]) -> Dict[str, int]:
+        """
+        Insert the users of a chunk with their profiles and preferences.
+
+        Returns:
+            The ids of the inserted users keyed by email
+        """
+        user_ids = dict(self.db.execute(
+            insert(User)
+            .on_conflict_do_nothing(index_elements=[User.email])
+            .returning(User.email, User.id),
+            [
+                {"email": user_in.email, "hashed_password": hashed_password, "is_active": True}
+                for (_, user_in), hashed_password in zip(chunk, hashed_passwords)
+            ],
+        ).all())
+
+        # Like register, only users with a name get a profile and preferences
+        profiles = [
+            {"user_id": user_ids[user_in.email], "name": user_in.name}
+            for _, user_in in chunk
+            if user_in.name and user_in.email in user_ids
+        ]
+        if profiles:
+            profile_ids = self.db.scalars(insert(Profile).returning(Profile.id), profiles).all()
+            self.db.execute(insert(Preferences), [{"profile_id": profile_id} for profile_id in profile_ids])
+
+        return user_ids
+
+
+def import_users_from_stream(
+    db: Session, stream: TextIO, file_format: str, hasher: PasswordHasher = import_password_hasher
+) -> Dict[str, Any]:
+    """
+    Import users from an NDJSON or CSV text stream.
+    """
+    return UserImportService(db, hasher=hasher).import_users(read_rows(stream, file_format))
+
+
+def text_stream(binary: io.BufferedIOBase) -> TextIO:
+    """
+    Wrap an uploaded binary file for reading as UTF-8 text, ignoring a BOM.
+    """
+    return io.TextIOWrapper(binary, encoding="utf-8-sig", newline="")
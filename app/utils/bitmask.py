@@ -0,0 +1,70 @@
+from functools import reduce
+from operator import or_
+from typing import Dict, Iterable, List, Optional
+
+from app.utils.constant import (
+    ALWAYS_AVAILABLE_EQUIPMENT,
+    AVAILABLE_EQUIPMENT,
+    EQUIPMENT_BITS,
+    EQUIPMENT_IMPLICATIONS,
+)
+
+# Equipment outside AVAILABLE_EQUIPMENT gets a bit no user can own, so it never matches
+UNKNOWN_EQUIPMENT_BIT = 1 << 63
+
+
+def _build_equipment_closure() -> Dict[str, int]:
+    closure = {}
+    for equipment in AVAILABLE_EQUIPMENT:
+        mask = 0
+        pending = [equipment]
+        seen = set()
+        while pending:
+            current = pending.pop()
+            if current in seen:
+                continue
+            seen.add(current)
+            mask |= EQUIPMENT_BITS.get(current, 0)
+            pending.extend(EQUIPMENT_IMPLICATIONS.get(current, []))
+        closure[equipment] = mask
+    return closure
+
+
+# Precomputed once: equipment name -> mask of everything owning it makes usable
+_EQUIPMENT_CLOSURE = _build_equipment_closure()
+_ALWAYS_AVAILABLE_MASK = reduce(or_, (_EQUIPMENT_CLOSURE[equipment] for equipment in ALWAYS_AVAILABLE_EQUIPMENT), 0)
+
+
+def equipment_mask(equipment: Optional[str]) -> int:
+    """
+    Get the mask of the equipment an exercise requires.
+
+    Args:
+        equipment: The exercise's equipment, or None if it needs none
+
+    Returns:
+        The equipment bit, 0 for no equipment or UNKNOWN_EQUIPMENT_BIT for unknown values
+    """
+    if not equipment:
+        return 0
+    return EQUIPMENT_BITS.get(equipment, UNKNOWN_EQUIPMENT_BIT)
+
+
+def available_equipment_mask(available_equipment: Iterable[str]) -> int:
+    """
+    Get the mask of equipment a user can train with.
+
+    Includes the always-available equipment and everything implied by what the user owns.
+    Unknown names are ignored.
+    """
+    mask = _ALWAYS_AVAILABLE_MASK
+    for equipment in available_equipment:
+        mask |= _EQUIPMENT_CLOSURE.get(equipment, 0)
+    return mask
+
+
+def equipment_names(mask: int) -> List[str]:
+    """
+    Get the equipment names set in a mask, in AVAILABLE_EQUIPMENT order.
+    """
+    return [equipment for equipment in AVAILABLE_EQUIPMENT if mask & EQUIPMENT_BITS[equipment]]
@@ -1,2 +1,17 @@
 AVAILABLE_EQUIPMENT = ["assisted","band","barbell","body weight","bosu ball","cable","dumbbell","elliptical machine","ez barbell","hammer","kettlebell","leverage machine","medicine ball","olympic barbell","resistance band","roller","rope","skierg machine","sled machine","smith machine","stability ball","stationary bike","stepmill machine","tire","trap bar","upper body ergometer","weighted","wheel roller"]
 ACCEPTED_FOCUS_PART =  ["abductors","abs","adductors","biceps","calves","cardiovascular system","delts","forearms","glutes","hamstrings","lats","levator scapulae","pectorals","quads","serratus anterior","spine","traps","triceps","upper back"]
+
+# Bit position of every equipment type, used by app.utils.bitmask
+EQUIPMENT_BITS = {equipment: 1 << i for i, equipment in enumerate(AVAILABLE_EQUIPMENT)}
+
+# Equipment every user can train with
+ALWAYS_AVAILABLE_EQUIPMENT = ["body weight"]
+# Owning the key also makes the listed equipment usable (applied transitively)
+EQUIPMENT_IMPLICATIONS = {
+    "olympic barbell": ["barbell"],
+    "band": ["resistance band"],
+    "resistance band": ["band"],
+    "dumbbell": ["weighted"],
+    "kettlebell": ["weighted"],
+    "medicine ball": ["weighted"],
+}
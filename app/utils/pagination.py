@@ -0,0 +1,52 @@
+import base64
+import binascii
+import json
+from typing import Any, Dict, Optional
+
+# Response header carrying the cursor of the next page; absent on the last page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursor(ValueError):
+    """
+    Raised when a pagination cursor cannot be decoded.
+    """
+
+
+def encode_cursor(position: Dict[str, Any]) -> str:
+    """
+    Encode a keyset position into an opaque, URL-safe cursor.
+
+    Args:
+        position: The sort key values of the last row of a page
+
+    Returns:
+        The cursor
+    """
+    payload = json.dumps(position, separators=(",", ":"), sort_keys=True, default=str)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor: The cursor, or None for the first page
+
+    Returns:
+        The keyset position, or None for the first page
+
+    Raises:
+        InvalidCursor: If the cursor is malformed
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise InvalidCursor("Invalid pagination cursor") from e
+    if not isinstance(position, dict):
+        raise InvalidCursor("Invalid pagination cursor")
+    return position
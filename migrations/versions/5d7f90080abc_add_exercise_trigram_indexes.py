@@ -0,0 +1,41 @@
+"""add exercise trigram indexes
+
+Revision ID: 5d7f90080abc
+Revises: 96caa46f1171
+Create Date: 2026-10-17 11:02:17.304518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d7f90080abc'
+down_revision: Union[str, None] = '96caa46f1171'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRIGRAM_COLUMNS = ('name', 'target', 'equipment', 'body_part')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for column in TRIGRAM_COLUMNS:
+        op.create_index(
+            f'ix_exercises_{column}_trgm',
+            'exercises',
+            [column],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_ops={column: 'gin_trgm_ops'},
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for column in reversed(TRIGRAM_COLUMNS):
+        op.drop_index(f'ix_exercises_{column}_trgm', table_name='exercises', postgresql_using='gin')
+    # The pg_trgm extension is left installed, other objects may depend on it
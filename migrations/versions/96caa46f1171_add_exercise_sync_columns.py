@@ -0,0 +1,30 @@
+"""add exercise sync columns
+
+Revision ID: 96caa46f1171
+Revises: b0f9e987f21d
+Create Date: 2026-10-17 09:12:40.518213
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '96caa46f1171'
+down_revision: Union[str, None] = 'b0f9e987f21d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('exercises', sa.Column('content_hash', sa.String(), nullable=True))
+    op.add_column('exercises', sa.Column('is_active', sa.Boolean(), server_default=sa.true(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('exercises', 'is_active')
+    op.drop_column('exercises', 'content_hash')
@@ -0,0 +1,30 @@
+"""add workout and exercise filter indexes
+
+Revision ID: c41e7a2b9d13
+Revises: 5d7f90080abc
+Create Date: 2026-10-17 15:26:48.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41e7a2b9d13'
+down_revision: Union[str, None] = '5d7f90080abc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_workouts_user_id_date', 'workouts', ['user_id', 'date'], unique=False)
+    op.create_index('ix_exercises_target_equipment', 'exercises', ['target', 'equipment'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_exercises_target_equipment', table_name='exercises')
+    op.drop_index('ix_workouts_user_id_date', table_name='workouts')
@@ -0,0 +1,36 @@
+from contextlib import contextmanager
+import os
+import sys
+
+import pytest
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.db.instrumentation import install_query_instrumentation, track_queries
+from app.db.session import engine
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Fail the test if a block runs more SQL statements than allowed.
+
+    Usage:
+        def test_read_workout(client, query_budget):
+            with query_budget(3):
+                client.get("/api/v1/workouts/1")
+
+    Statements run by the app engine, including inside TestClient requests, are counted.
+    Pass ``engine=`` to count another engine as well.
+    """
+    @contextmanager
+    def budget(max_statements, engine=engine):
+        install_query_instrumentation(engine)
+        with track_queries() as stats:
+            yield stats
+        assert stats.count <= max_statements, (
+            f"Query budget exceeded: {stats.count} > {max_statements}\n{stats.summary()}"
+        )
+
+    return budget
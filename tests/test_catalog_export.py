@@ -0,0 +1,76 @@
+import gzip
+import json
+import unittest
+from unittest.mock import MagicMock, patch
+import os
+import sys
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.endpoints.exercises import router
+from app.db.session import get_read_db
+from app.models.workout import Exercise
+from app.services.catalog_export import CatalogExportCache
+from app.services.exercise_catalog import ExerciseCatalog
+
+CATALOG_ROWS = [
+    Exercise(id=1, name="Barbell Bench Press", target="pectorals", equipment="barbell", secondary_muscles=["triceps"]),
+    Exercise(id=2, name="Push-up", target="pectorals", equipment="body weight"),
+]
+
+
+class TestCatalogSnapshotEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.db = MagicMock()
+        self.db.query.return_value.filter.return_value.order_by.return_value.all.return_value = CATALOG_ROWS
+        self.catalog = ExerciseCatalog()
+        self.export_cache = CatalogExportCache(self.catalog)
+
+        app = FastAPI()
+        app.include_router(router, prefix="/exercises")
+        app.dependency_overrides[get_read_db] = lambda: self.db
+        self.client = TestClient(app)
+        patcher = patch('app.api.endpoints.exercises.exercise_catalog_export', self.export_cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_snapshot_is_compressed_and_revalidated(self):
+        response = self.client.get("/exercises/snapshot", headers={"Accept-Encoding": "gzip"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["content-encoding"], "gzip")
+        body = response.json()
+        self.assertEqual(body["count"], 2)
+        self.assertEqual(body["exercises"][0]["secondaryMuscles"], ["triceps"])
+
+        not_modified = self.client.get("/exercises/snapshot", headers={"If-None-Match": response.headers["etag"]})
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b"")
+
+    def test_export_is_built_once_per_catalog_version(self):
+        first = self.export_cache.get(self.db)
+        self.assertIs(self.export_cache.get(self.db), first)
+
+        # Reloading identical content keeps the ETag
+        self.catalog.invalidate()
+        rebuilt = self.export_cache.get(self.db)
+        self.assertIsNot(rebuilt, first)
+        self.assertEqual(rebuilt.etag, first.etag)
+        self.assertEqual(json.loads(gzip.decompress(rebuilt.bodies["gzip"])), json.loads(rebuilt.bodies["identity"]))
+
+    def test_negotiate_prefers_smallest_accepted_encoding(self):
+        export = self.export_cache.get(self.db)
+
+        self.assertEqual(export.negotiate("gzip, deflate"), "gzip")
+        self.assertEqual(export.negotiate("gzip;q=0, identity"), "identity")
+        self.assertEqual(export.negotiate(None), "identity")
+        if "br" in export.bodies:
+            self.assertEqual(export.negotiate("gzip, br"), "br")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+from types import SimpleNamespace
+import os
+import sys
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.catalog_sync import CatalogSyncJobManager, CatalogSyncService, SyncAlreadyRunning
+
+
+def external_exercise(exercise_id, name):
+    return {
+        "id": exercise_id,
+        "name": name,
+        "bodyPart": "chest",
+        "target": "pectorals",
+        "secondaryMuscles": ["triceps"],
+        "equipment": "barbell",
+        "gifUrl": f"https://example.com/{exercise_id}.gif",
+        "instructions": ["Push"],
+    }
+
+
+class TestCatalogSyncService(unittest.TestCase):
+    def setUp(self):
+        self.db = MagicMock()
+        self.sync_service = CatalogSyncService(self.db, page_size=2)
+        self.sync_service.exercise_service = MagicMock()
+
+    def test_synchronize_pages_and_counts_changes(self):
+        self.sync_service.exercise_service.get_exercises_from_external_source.side_effect = [
+            [external_exercise("0001", "Bench Press"), external_exercise("0002", "Push-up")],
+            [external_exercise("0003", "Dip")],
+        ]
+        upsert_page_1 = MagicMock()
+        upsert_page_1.all.return_value = [SimpleNamespace(inserted=True)]
+        upsert_page_2 = MagicMock()
+        upsert_page_2.all.return_value = [SimpleNamespace(inserted=False)]
+        deactivate = MagicMock(rowcount=4)
+        self.db.execute.side_effect = [upsert_page_1, upsert_page_2, deactivate]
+
+        counts = self.sync_service.synchronize()
+
+        self.assertEqual(counts, {"inserted": 1, "updated": 1, "unchanged": 1, "removed": 4})
+        calls = self.sync_service.exercise_service.get_exercises_from_external_source.call_args_list
+        self.assertEqual(calls[0].kwargs["params"], {"limit": 2, "offset": 0})
+        self.assertEqual(calls[1].kwargs["params"], {"limit": 2, "offset": 2})
+        # One commit per page plus the deactivation
+        self.assertEqual(self.db.commit.call_count, 3)
+
+    def test_synchronize_stops_on_error_response(self):
+        self.sync_service.exercise_service.get_exercises_from_external_source.return_value = {
+            "message": "You have exceeded the rate limit"
+        }
+
+        with self.assertRaises(ValueError):
+            self.sync_service.synchronize()
+
+        self.db.execute.assert_not_called()
+
+    def test_hash_ignores_bookkeeping_and_detects_changes(self):
+        first = self.sync_service._to_rows([external_exercise("0001", "Bench Press")])[0]
+        same = self.sync_service._to_rows([external_exercise("0001", "Bench Press")])[0]
+        renamed = self.sync_service._to_rows([external_exercise("0001", "Flat Bench Press")])[0]
+
+        self.assertEqual(first["id"], 1)
+        self.assertEqual(first["content_hash"], same["content_hash"])
+        self.assertNotEqual(first["content_hash"], renamed["content_hash"])
+
+
+class TestCatalogSyncJobManager(unittest.TestCase):
+    def setUp(self):
+        self.db = MagicMock()
+        self.manager = CatalogSyncJobManager(session_factory=lambda: self.db)
+
+    @patch('app.services.catalog_sync.CatalogSyncService')
+    def test_only_one_sync_runs_at_a_time(self, mock_sync_service):
+        release = threading.Event()
+
+        def synchronize(on_page):
+            on_page(200, 150)
+            release.wait(5)
+            on_page(50, 0)
+            return {"inserted": 150, "updated": 0, "unchanged": 100, "removed": 0}
+
+        mock_sync_service.return_value.synchronize.side_effect = synchronize
+
+        job = self.manager.start()
+        with self.assertRaises(SyncAlreadyRunning) as raised:
+            self.manager.start()
+        self.assertIs(raised.exception.job, job)
+
+        release.set()
+        self.manager._executor.shutdown(wait=True)
+
+        progress = self.manager.get(job.id).to_dict()
+        self.assertEqual(progress["status"], "succeeded")
+        self.assertEqual(progress["pages_fetched"], 2)
+        self.assertEqual(progress["records_fetched"], 250)
+        self.assertEqual(progress["rows_written"], 150)
+        self.assertEqual(progress["result"]["unchanged"], 100)
+        self.db.close.assert_called_once()
+
+    @patch('app.services.catalog_sync.CatalogSyncService')
+    def test_concurrent_starts_always_name_the_running_job(self, mock_sync_service):
+        release = threading.Event()
+        mock_sync_service.return_value.synchronize.side_effect = lambda on_page: release.wait(5) and {}
+        barrier = threading.Barrier(8)
+        started, conflicts = [], []
+
+        def start():
+            barrier.wait()
+            try:
+                started.append(self.manager.start())
+            except SyncAlreadyRunning as e:
+                conflicts.append(e.job)
+
+        threads = [threading.Thread(target=start) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(started), 1)
+        self.assertEqual(conflicts, [started[0]] * 7)
+
+        # Once the job has finished, the next start succeeds instead of seeing a half-cleared job
+        release.set()
+        self.manager._executor.submit(lambda: None).result()
+        second = self.manager.start()
+        self.assertIsNot(second, started[0])
+        self.manager._executor.shutdown(wait=True)
+
+    @patch('app.services.catalog_sync.CatalogSyncService')
+    def test_failed_sync_records_error_and_releases_lock(self, mock_sync_service):
+        mock_sync_service.return_value.synchronize.side_effect = ValueError("rate limited")
+
+        job = self.manager.start()
+        self.manager._executor.submit(lambda: None).result()
+
+        self.assertEqual(job.status, "failed")
+        self.assertEqual(job.errors, ["rate limited"])
+        self.db.rollback.assert_called_once()
+        # The lock is free again
+        second = self.manager.start()
+        self.manager._executor.shutdown(wait=True)
+        self.assertEqual(second.status, "failed")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+from unittest.mock import MagicMock, create_autospec
+import os
+import sys
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.db.session import ReadSession
+from app.models.workout import Exercise
+from app.services.exercise_catalog import ExerciseCatalog
+from app.utils.bitmask import available_equipment_mask, equipment_mask, equipment_names
+
+
+def make_exercise(exercise_id, name, target, equipment, body_part="chest"):
+    return Exercise(
+        id=exercise_id,
+        name=name,
+        target=target,
+        equipment=equipment,
+        body_part=body_part,
+        secondary_muscles=["triceps"],
+        instructions=["Step 1"],
+    )
+
+
+class TestExerciseCatalog(unittest.TestCase):
+    def setUp(self):
+        self.db = MagicMock()
+        self.db.query.return_value.filter.return_value.order_by.return_value.all.return_value = [
+            make_exercise(1, "Barbell Bench Press", "pectorals", "barbell"),
+            make_exercise(2, "Push-up", "pectorals", "body weight"),
+            make_exercise(3, "Barbell Curl", "biceps", "barbell", body_part="upper arms"),
+        ]
+        self.catalog = ExerciseCatalog()
+
+    def test_indexes_by_target_equipment_and_body_part(self):
+        snapshot = self.catalog.get(self.db)
+
+        self.assertEqual(len(snapshot), 3)
+        self.assertEqual([ex.id for ex in snapshot.get_exercises_by_muscle("pectorals")], [1, 2])
+        self.assertEqual([ex.id for ex in snapshot.get_exercises_by_equipment("barbell")], [1, 3])
+        self.assertEqual([ex.id for ex in snapshot.get_exercises_by_body_part("upper arms")], [3])
+        self.assertEqual(snapshot.get_exercise_by_id(2).name, "Push-up")
+        self.assertEqual(snapshot.get_exercises_by_muscle("quads"), ())
+        self.assertIsNone(snapshot.get_exercise_by_id(42))
+
+    def test_loads_once_until_invalidated(self):
+        first = self.catalog.get(self.db)
+        second = self.catalog.get(self.db)
+
+        self.assertIs(first, second)
+        self.db.query.assert_called_once()
+
+        self.catalog.invalidate()
+        third = self.catalog.get(self.db)
+
+        self.assertIsNot(first, third)
+        self.assertEqual(self.db.query.call_count, 2)
+        self.assertGreater(third.version, first.version)
+
+    def test_reload_after_invalidate_uses_the_primary(self):
+        primary = self.db
+        catalog = ExerciseCatalog(session_factory=lambda: primary)
+        catalog.get(primary)
+        catalog.invalidate()
+
+        read_db = create_autospec(ReadSession, instance=True)
+        snapshot = catalog.get(read_db)
+
+        self.assertEqual(len(snapshot), 3)
+        read_db.query.assert_not_called()
+        self.assertEqual(primary.query.call_count, 2)
+        primary.close.assert_called_once()
+
+    def test_get_exercises_by_muscles_filters_equipment_with_masks(self):
+        snapshot = self.catalog.get(self.db)
+
+        # Body weight is always available, barbell has to be owned
+        result = snapshot.get_exercises_by_muscles(["biceps", "pectorals"], available_equipment=["dumbbell"])
+        self.assertEqual([ex.id for ex in result], [2])
+
+        result = snapshot.get_exercises_by_muscles(["biceps", "pectorals"], available_equipment=["barbell"], per_group_limit=1)
+        self.assertEqual([ex.id for ex in result], [3, 1])
+
+        result = snapshot.get_exercises_by_muscles(["pectorals"])
+        self.assertEqual([ex.id for ex in result], [1, 2])
+
+
+class TestBitmask(unittest.TestCase):
+    def test_equipment_implications_are_transitive_and_precomputed(self):
+        available = available_equipment_mask(["olympic barbell", "resistance band"])
+
+        self.assertEqual(
+            equipment_names(available),
+            ["band", "barbell", "body weight", "olympic barbell", "resistance band"]
+        )
+        self.assertEqual(equipment_mask("barbell") & ~available, 0)
+        self.assertNotEqual(equipment_mask("dumbbell") & ~available, 0)
+        self.assertEqual(equipment_mask(None), 0)
+        self.assertNotEqual(equipment_mask("space station") & ~available, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import os
+import sys
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models.workout import Exercise
+from app.services.exercise_catalog import ExerciseCatalog
+from app.services.exercise_selector import ExerciseSelectorService
+
+
+CATALOG_ROWS = [
+    Exercise(id=1, name="Barbell Bench Press", target="pectorals", equipment="barbell"),
+    Exercise(id=2, name="Push-up", target="pectorals", equipment="body weight"),
+    Exercise(id=3, name="Cable Fly", target="pectorals", equipment="cable"),
+    Exercise(id=4, name="Dumbbell Fly", target="pectorals", equipment="dumbbell"),
+    Exercise(id=5, name="Scapula Push-up", target="serratus anterior", equipment="body weight"),
+]
+
+
+class TestExerciseSelectorService(unittest.TestCase):
+    def setUp(self):
+        self.db = MagicMock()
+        self.db.query.return_value.filter.return_value.order_by.return_value.all.return_value = CATALOG_ROWS
+        self.catalog = ExerciseCatalog()
+        self.selector = ExerciseSelectorService(self.db)
+
+    def test_select_exercises_from_catalog(self):
+        with patch('app.services.exercise_selector.exercise_catalog', self.catalog):
+            result = self.selector.select_exercises_for_workout(
+                focus="Chest",
+                fitness_level="beginner",
+                available_equipment=["barbell", "body weight", "dumbbell"],
+                workout_duration_minutes=60
+            )
+
+        # Cable Fly is filtered out by equipment, everything else fits in the per-muscle limit
+        self.assertEqual(sorted(ex["exercise_id"] for ex in result), [1, 2, 4, 5])
+        self.assertEqual([ex["order"] for ex in result], [1, 2, 3, 4])
+        self.db.query.assert_called_once()
+
+    @patch('app.services.exercise_selector.settings')
+    def test_select_exercises_with_catalog_disabled_uses_single_query(self, mock_settings):
+        mock_settings.EXERCISE_CATALOG_ENABLED = False
+        self.selector.exercise_service = MagicMock()
+        self.selector.exercise_service.get_exercises_by_muscles.return_value = CATALOG_ROWS[:3]
+
+        result = self.selector.select_exercises_for_workout(
+            focus="Chest",
+            fitness_level="advanced",
+            available_equipment=["barbell", "body weight", "cable"],
+            workout_duration_minutes=30
+        )
+
+        self.assertEqual(len(result), 3)
+        self.assertEqual(result[0]["sets"], 5)
+        self.selector.exercise_service.get_exercises_by_muscles.assert_called_once_with(
+            ["pectorals", "serratus anterior"],
+            equipment=["barbell", "body weight", "cable"],
+            per_group_limit=3
+        )
+
+    def test_swap_applies_the_same_equipment_rules(self):
+        with patch('app.services.exercise_selector.exercise_catalog', self.catalog):
+            # An olympic barbell also allows barbell exercises, cable and dumbbell ones are out
+            result = self.selector.swap_exercise(
+                exercise_id=2,
+                muscle_group="pectorals",
+                equipment="body weight",
+                fitness_level="beginner",
+                available_equipment=["olympic barbell"]
+            )
+
+        self.assertEqual(result["exercise_id"], 1)
+        self.assertEqual(result["equipment"], "barbell")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,13 +7,18 @@ import sys
 # Add the parent directory to the path so we can import the app modules
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Query, Session
+
 from app.services.exercise import ExerciseService
+from app.services.http_cache import ResponseCache
 from app.core.config import settings
 
 class TestExerciseService(unittest.TestCase):
     # Have to import db session
     def setUp(self):
-        self.exercise_service = ExerciseService()
+        # Bypass the on-disk response cache so every call reaches the mocked API
+        self.exercise_service = ExerciseService(MagicMock(), response_cache=ResponseCache("unused", mode="off"))
     
     @patch('requests.get')
     def test_get_exercises_from_external_source(self, mock_get):
@@ -190,5 +195,18 @@ class TestExerciseService(unittest.TestCase):
         self.assertEqual(result[0]["reps"], "10-12")  # intermediate level
         self.assertEqual(result[0]["rest_seconds"], 45)  # intermediate level
 
+    def test_get_exercises_by_muscles_query(self):
+        statements = []
+        with patch.object(Query, 'all', lambda query: statements.append(query.statement) or []):
+            ExerciseService(Session()).get_exercises_by_muscles(
+                ["triceps", "pectorals"], equipment=["barbell"], per_group_limit=3
+            )
+
+        sql = str(statements[0].compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+        # Exercises without equipment are kept, as in the catalog
+        self.assertIn("exercises.equipment IS NULL OR exercises.equipment IN ('barbell')", sql)
+        # Grouped in the order the muscles were given, not alphabetically
+        self.assertIn("ORDER BY CASE anon_1.target WHEN 'triceps' THEN 0 WHEN 'pectorals' THEN 1 END, anon_1.id", sql)
+
 if __name__ == '__main__':
     unittest.main()
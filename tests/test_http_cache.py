@@ -0,0 +1,85 @@
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+import os
+import sys
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.http_cache import ResponseCache, ResponseNotRecorded
+
+URL = "https://exercisedb.p.rapidapi.com/exercises/target/pectorals"
+
+
+def make_response(body, ok=True):
+    response = MagicMock()
+    response.ok = ok
+    response.json.return_value = body
+    return response
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.directory = self.tmp_dir.name
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_key_is_independent_of_param_order(self):
+        self.assertEqual(
+            ResponseCache.key(URL, {"limit": 10, "offset": 0}),
+            ResponseCache.key(URL, {"offset": 0, "limit": 10})
+        )
+        self.assertNotEqual(ResponseCache.key(URL, {"limit": 10}), ResponseCache.key(URL, {"limit": 20}))
+
+    def test_readthrough_serves_fresh_entries_from_disk(self):
+        cache = ResponseCache(self.directory, mode="readthrough")
+        fetch = MagicMock(return_value=make_response([{"id": "0001"}]))
+
+        first = cache.get_json(URL, fetch)
+        second = cache.get_json(URL, fetch)
+
+        self.assertEqual(first, [{"id": "0001"}])
+        self.assertEqual(second, first)
+        fetch.assert_called_once()
+
+    def test_error_responses_are_not_cached(self):
+        cache = ResponseCache(self.directory, mode="readthrough")
+        fetch = MagicMock(return_value=make_response({"message": "rate limited"}, ok=False))
+
+        cache.get_json(URL, fetch)
+        cache.get_json(URL, fetch)
+
+        self.assertEqual(fetch.call_count, 2)
+
+    def test_stale_entries_are_served_while_revalidating(self):
+        cache = ResponseCache(self.directory, mode="readthrough", ttl_seconds=60, stale_seconds=600)
+        cache.get_json(URL, MagicMock(return_value=make_response(["old"])))
+
+        refetch = MagicMock(return_value=make_response(["new"]))
+        with patch("app.services.http_cache.time.time", return_value=time.time() + 120):
+            stale = cache.get_json(URL, refetch)
+        cache._executor.shutdown(wait=True)
+
+        self.assertEqual(stale, ["old"])
+        refetch.assert_called_once()
+        self.assertEqual(cache.get_json(URL, MagicMock()), ["new"])
+
+    def test_replay_serves_recordings_only(self):
+        ResponseCache(self.directory, mode="record").get_json(
+            URL, MagicMock(return_value=make_response(["recorded"])), params={"limit": 5}
+        )
+        replay = ResponseCache(self.directory, mode="replay")
+        fetch = MagicMock()
+
+        self.assertEqual(replay.get_json(URL, fetch, params={"limit": 5}, refresh=True), ["recorded"])
+        with self.assertRaises(ResponseNotRecorded):
+            replay.get_json(URL, fetch, params={"limit": 6})
+        fetch.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
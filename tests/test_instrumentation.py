@@ -0,0 +1,83 @@
+import logging
+import os
+import sys
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.db.instrumentation import (QUERY_COUNT_HEADER, QUERY_TIME_HEADER, QueryStatsMiddleware, fingerprint,
+                                    install_query_instrumentation)
+
+
+@pytest.fixture
+def sqlite_engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    install_query_instrumentation(engine)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE exercises (id INTEGER PRIMARY KEY, name TEXT)"))
+        conn.execute(text("INSERT INTO exercises (id, name) VALUES (1, 'Push-up'), (2, 'Dip'), (3, 'Row')"))
+    yield engine
+    engine.dispose()
+
+
+def make_client(sqlite_engine, expose_headers):
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware, repeat_threshold=2, expose_headers=expose_headers)
+
+    @app.get("/exercises/n-plus-one")
+    def n_plus_one():
+        with sqlite_engine.connect() as conn:
+            ids = conn.execute(text("SELECT id FROM exercises ORDER BY id")).scalars().all()
+            return [conn.execute(text("SELECT name FROM exercises WHERE id = :id"), {"id": i}).scalar() for i in ids]
+
+    @app.get("/exercises/batched")
+    def batched():
+        with sqlite_engine.connect() as conn:
+            return conn.execute(text("SELECT name FROM exercises ORDER BY id")).scalars().all()
+
+    return TestClient(app)
+
+
+@pytest.fixture
+def client(sqlite_engine):
+    return make_client(sqlite_engine, expose_headers=True)
+
+
+def test_fingerprint_ignores_literals_and_list_lengths():
+    assert fingerprint("SELECT * FROM workouts WHERE id = 1") == fingerprint("SELECT *  FROM workouts\nWHERE id = 42")
+    assert fingerprint("SELECT * FROM t WHERE id IN (%(a)s, %(b)s)") == fingerprint("SELECT * FROM t WHERE id IN (%(a)s)")
+    assert fingerprint("SELECT * FROM t WHERE name = 'x'") != fingerprint("SELECT * FROM u WHERE name = 'x'")
+
+
+def test_middleware_reports_statements_and_warns_on_repeats(client, caplog):
+    with caplog.at_level(logging.WARNING, logger="app.db.instrumentation"):
+        response = client.get("/exercises/n-plus-one")
+
+    assert response.json() == ["Push-up", "Dip", "Row"]
+    assert response.headers[QUERY_COUNT_HEADER] == "4"
+    assert float(response.headers[QUERY_TIME_HEADER]) >= 0
+    assert "ran the same statement 3 times" in caplog.text
+
+
+def test_stats_are_logged_not_sent_by_default(sqlite_engine, caplog):
+    with caplog.at_level(logging.INFO, logger="app.db.instrumentation"):
+        response = make_client(sqlite_engine, expose_headers=False).get("/exercises/batched")
+
+    assert QUERY_COUNT_HEADER not in response.headers
+    assert QUERY_TIME_HEADER not in response.headers
+    assert "GET /exercises/batched ran 1 statements in" in caplog.text
+
+
+def test_query_budget(client, sqlite_engine, query_budget):
+    with query_budget(1, engine=sqlite_engine):
+        client.get("/exercises/batched")
+
+    with pytest.raises(AssertionError, match="Query budget exceeded: 4 > 1"):
+        with query_budget(1, engine=sqlite_engine):
+            client.get("/exercises/n-plus-one")
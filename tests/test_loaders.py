@@ -0,0 +1,42 @@
+import unittest
+import os
+import sys
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.db.loaders import WORKOUT_DETAIL, WORKOUT_EXERCISES, WORKOUT_LIST
+from app.models.workout import Workout, WorkoutExercise
+
+
+def compile_sql(statement):
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+class TestLoaderProfiles(unittest.TestCase):
+    def test_detail_loads_everything_in_one_query(self):
+        sql = compile_sql(select(Workout).options(*WORKOUT_DETAIL))
+
+        self.assertIn("LEFT OUTER JOIN workout_exercises", sql)
+        self.assertIn("LEFT OUTER JOIN exercises", sql)
+        self.assertIn("exercises_1.instructions", sql)
+        self.assertNotIn("content_hash", sql)
+
+    def test_list_loads_exercises_separately(self):
+        sql = compile_sql(select(Workout).options(*WORKOUT_LIST))
+
+        # The exercises come from a second, batched query instead of a join per workout row
+        self.assertNotIn("JOIN", sql)
+
+    def test_workout_exercises_join_the_catalog(self):
+        sql = compile_sql(select(WorkoutExercise).options(*WORKOUT_EXERCISES))
+
+        self.assertIn("LEFT OUTER JOIN exercises", sql)
+        self.assertNotIn("is_active", sql)
+
+
+if __name__ == '__main__':
+    unittest.main()
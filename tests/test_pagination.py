@@ -0,0 +1,80 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import os
+import sys
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import HTTPException, Response
+
+from app.api.endpoints.exercises import read_exercises, search_exercises
+from app.models.workout import Exercise
+from app.schemas.exercise import ExerciseSearch
+from app.utils.pagination import NEXT_CURSOR_HEADER, InvalidCursor, decode_cursor, encode_cursor
+
+
+class TestCursor(unittest.TestCase):
+    def test_round_trip(self):
+        position = {"score": 0.4000000059604645, "id": 42}
+        cursor = encode_cursor(position)
+
+        self.assertNotIn("=", cursor)
+        self.assertEqual(decode_cursor(cursor), position)
+        self.assertIsNone(decode_cursor(None))
+
+    def test_malformed_cursor(self):
+        for cursor in ("not a cursor!", encode_cursor(["score", 1])[:-2], "WzEsMl0"):
+            with self.assertRaises(InvalidCursor):
+                decode_cursor(cursor)
+
+
+class TestSearchExercisesEndpoint(unittest.TestCase):
+    @patch('app.api.endpoints.exercises.ExerciseService')
+    def test_next_cursor_only_when_more_results(self, mock_service):
+        rows = [(Exercise(id=i, name=f"Press {i}", target="pectorals"), 1.0 - i / 10) for i in range(1, 4)]
+        mock_service.return_value.search_exercises.return_value = rows
+        response = Response()
+
+        page = search_exercises(ExerciseSearch(name="press"), response, limit=2, cursor=None, db=MagicMock())
+
+        self.assertEqual([exercise.id for exercise in page], [1, 2])
+        self.assertEqual(decode_cursor(response.headers[NEXT_CURSOR_HEADER]), {"score": 0.8, "id": 2})
+        self.assertEqual(mock_service.return_value.search_exercises.call_args.kwargs["limit"], 3)
+
+        mock_service.return_value.search_exercises.return_value = rows[2:]
+        last_response = Response()
+        search_exercises(
+            ExerciseSearch(name="press"), last_response, limit=2,
+            cursor=response.headers[NEXT_CURSOR_HEADER], db=MagicMock()
+        )
+
+        self.assertEqual(mock_service.return_value.search_exercises.call_args.kwargs["after"], (0.8, 2))
+        self.assertNotIn(NEXT_CURSOR_HEADER, last_response.headers)
+
+    def test_invalid_cursor_is_rejected(self):
+        with self.assertRaises(HTTPException) as raised:
+            search_exercises(ExerciseSearch(), Response(), limit=2, cursor=encode_cursor({"id": 1}), db=MagicMock())
+        self.assertEqual(raised.exception.status_code, 400)
+
+
+class TestReadExercisesEndpoint(unittest.TestCase):
+    def test_cursor_replaces_offset(self):
+        db = MagicMock()
+        query = db.query.return_value.filter.return_value
+        query.filter.return_value.order_by.return_value.limit.return_value.all.return_value = [
+            Exercise(id=11, name="Dip", target="triceps"),
+            Exercise(id=12, name="Row", target="upper back"),
+        ]
+        response = Response()
+
+        page = read_exercises(response, skip=5, limit=1, cursor=encode_cursor({"id": 10}), db=db)
+
+        self.assertEqual([exercise.id for exercise in page], [11])
+        self.assertEqual(decode_cursor(response.headers[NEXT_CURSOR_HEADER]), {"id": 11})
+        query.offset.assert_not_called()
+        query.filter.return_value.order_by.return_value.limit.assert_called_once_with(2)
+
+
+if __name__ == '__main__':
+    unittest.main()
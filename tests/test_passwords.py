@@ -0,0 +1,155 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import AsyncMock, MagicMock, patch
+import os
+import sys
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import HTTPException
+
+from app.api.endpoints.auth import login, register
+from app.api.endpoints.users import update_user_me
+from app.core import passwords
+from app.core.passwords import PasswordHasher
+from app.schemas.user import UserCreate, UserUpdate
+
+
+def thread_pool(max_workers):
+    return ThreadPoolExecutor(max_workers=max_workers)
+
+
+class TestPasswordHasher(unittest.TestCase):
+    def test_work_runs_in_the_pool_with_configured_rounds(self):
+        hasher = PasswordHasher(rounds=13, max_workers=1, max_pending=2, executor_factory=thread_pool)
+        self.addCleanup(hasher.shutdown)
+        caller = threading.get_ident()
+        calls = []
+
+        def fake_hash(password, rounds):
+            calls.append((password, rounds, threading.get_ident()))
+            return "hashed"
+
+        with patch.object(passwords, '_hash_password', fake_hash):
+            self.assertEqual(hasher.hash("secret"), "hashed")
+
+        self.assertEqual(calls[0][:2], ("secret", 13))
+        self.assertNotEqual(calls[0][2], caller)
+        self.assertEqual(hasher.pending, 0)
+
+    def test_full_queue_is_rejected_with_retry_after(self):
+        hasher = PasswordHasher(rounds=4, max_workers=1, max_pending=2, executor_factory=thread_pool)
+        self.addCleanup(hasher.shutdown)
+        release = threading.Event()
+
+        def blocked_hash(password, rounds):
+            release.wait(5)
+            return "hashed"
+
+        with patch.object(passwords, '_hash_password', blocked_hash):
+            futures = [hasher._submit(passwords._hash_password, "secret", 4) for _ in range(2)]
+
+            with self.assertRaises(HTTPException) as raised:
+                hasher.hash("secret")
+
+            release.set()
+            self.assertEqual([future.result() for future in futures], ["hashed", "hashed"])
+
+        self.assertEqual(raised.exception.status_code, 503)
+        self.assertIn("Retry-After", raised.exception.headers)
+        self.assertEqual(hasher.pending, 0)
+
+    def test_hash_many_splits_over_workers_and_keeps_order(self):
+        hasher = PasswordHasher(rounds=4, max_workers=3, max_pending=3, executor_factory=thread_pool)
+        self.addCleanup(hasher.shutdown)
+        slices = []
+
+        def fake_hash_passwords(batch, rounds):
+            slices.append(list(batch))
+            return [f"hashed:{password}" for password in batch]
+
+        passwords_in = [str(number) for number in range(7)]
+        with patch.object(passwords, '_hash_passwords', fake_hash_passwords):
+            hashed = hasher.hash_many(passwords_in)
+
+        self.assertEqual(hashed, [f"hashed:{password}" for password in passwords_in])
+        self.assertEqual(sorted(slices), [["0", "1", "2"], ["3", "4", "5"], ["6"]])
+        self.assertEqual(hasher.hash_many([]), [])
+
+    def test_outdated_work_factor_is_upgraded(self):
+        try:
+            old_hash = passwords._hash_password("secret", 4)
+        except ValueError:
+            self.skipTest("passlib cannot use the installed bcrypt backend")
+
+        self.assertEqual(passwords._verify_and_update("secret", old_hash, 4), (True, None))
+        verified, new_hash = passwords._verify_and_update("secret", old_hash, 5)
+        self.assertTrue(verified)
+        self.assertTrue(new_hash.startswith("$2b$05$"))
+        self.assertEqual(passwords._verify_and_update("wrong", old_hash, 5), (False, None))
+
+
+class TestLoginRehash(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.db = AsyncMock()
+        self.user = MagicMock(id=7, email="ana@example.com", hashed_password="$2b$10$old", is_active=True)
+        self.db.scalar.return_value = self.user
+        self.form = MagicMock(username="ana@example.com", password="secret")
+
+    @patch('app.api.endpoints.auth.principal_cache')
+    @patch('app.api.endpoints.auth.password_hasher')
+    async def test_outdated_hash_is_replaced_at_login(self, mock_hasher, mock_cache):
+        mock_hasher.verify_and_update_async = AsyncMock(return_value=(True, "$2b$12$new"))
+
+        token = await login(self.form, db=self.db)
+
+        self.assertEqual(token["token_type"], "bearer")
+        self.assertEqual(self.user.hashed_password, "$2b$12$new")
+        self.db.commit.assert_awaited_once()
+        mock_cache.invalidate.assert_called_once_with(7)
+
+    @patch('app.api.endpoints.auth.password_hasher')
+    async def test_wrong_password_is_rejected(self, mock_hasher):
+        mock_hasher.verify_and_update_async = AsyncMock(return_value=(False, None))
+
+        with self.assertRaises(HTTPException) as raised:
+            await login(self.form, db=self.db)
+
+        self.assertEqual(raised.exception.status_code, 401)
+        self.db.commit.assert_not_awaited()
+
+
+class TestAsyncPasswordChanges(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.db = AsyncMock()
+        self.db.add = MagicMock()
+        self.db.scalar.return_value = None
+
+    @patch('app.api.endpoints.auth.password_hasher')
+    async def test_register_hashes_without_blocking(self, mock_hasher):
+        mock_hasher.hash_async = AsyncMock(return_value="$2b$12$new")
+
+        user = await register(UserCreate(email="ana@example.com", password="secret"), db=self.db)
+
+        self.assertEqual(user.hashed_password, "$2b$12$new")
+        mock_hasher.hash_async.assert_awaited_once_with("secret")
+        mock_hasher.hash.assert_not_called()
+        self.db.commit.assert_awaited_once()
+
+    @patch('app.api.endpoints.users.principal_cache')
+    @patch('app.api.endpoints.users.password_hasher')
+    async def test_password_update_hashes_without_blocking(self, mock_hasher, mock_cache):
+        mock_hasher.hash_async = AsyncMock(return_value="$2b$12$new")
+        user = MagicMock(id=7, email="ana@example.com")
+
+        await update_user_me(UserUpdate(password="secret"), db=self.db, current_user=user)
+
+        self.assertEqual(user.hashed_password, "$2b$12$new")
+        mock_hasher.hash.assert_not_called()
+        mock_cache.invalidate.assert_called_once_with(7)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+from unittest.mock import patch
+import os
+import sys
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, exc
+from sqlalchemy.pool import NullPool
+
+from app.db.pool import InstrumentedAsyncAdaptedQueuePool, InstrumentedQueuePool, engine_options, pool_metrics
+
+
+class TestInstrumentedPool(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine(
+            "sqlite://", poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.05
+        )
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def test_checkouts_and_timeouts_are_recorded(self):
+        with self.engine.connect():
+            metrics = pool_metrics(self.engine.pool)
+            self.assertEqual(metrics["checked_out"], 1)
+
+            with self.assertRaises(exc.TimeoutError):
+                self.engine.connect()
+
+        metrics = pool_metrics(self.engine.pool)
+        self.assertEqual(metrics["checkouts"], 1)
+        self.assertEqual(metrics["timeouts"], 1)
+        self.assertEqual(metrics["waiting"], 0)
+        self.assertEqual(metrics["checked_out"], 0)
+        self.assertEqual(sum(bucket["count"] for bucket in metrics["wait_histogram"]), 1)
+
+    def test_metrics_survive_dispose(self):
+        with self.engine.connect():
+            pass
+        self.engine.dispose()
+
+        self.assertEqual(pool_metrics(self.engine.pool)["checkouts"], 1)
+
+
+class TestEngineOptions(unittest.TestCase):
+    def test_pool_settings(self):
+        with patch('app.db.pool.settings') as settings:
+            settings.DATABASE_PGBOUNCER_TRANSACTION_MODE = False
+            settings.DATABASE_POOL_SIZE = 7
+
+            self.assertIs(engine_options()["poolclass"], InstrumentedQueuePool)
+            self.assertIs(engine_options(async_driver=True)["poolclass"], InstrumentedAsyncAdaptedQueuePool)
+            self.assertEqual(engine_options()["pool_size"], 7)
+
+    def test_pgbouncer_transaction_mode(self):
+        with patch('app.db.pool.settings') as settings:
+            settings.DATABASE_PGBOUNCER_TRANSACTION_MODE = True
+
+            self.assertEqual(engine_options(), {"poolclass": NullPool})
+            self.assertEqual(engine_options(async_driver=True)["connect_args"]["statement_cache_size"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
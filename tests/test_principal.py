@@ -0,0 +1,127 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import os
+import sys
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import HTTPException
+from sqlalchemy import inspect
+from sqlalchemy.dialects import postgresql
+
+from app.core.principal import PrincipalCache, load_principal, principal_query
+from app.core.security import create_access_token, get_current_principal
+from app.models.preferences import Preferences
+from app.models.profile import Profile
+from app.models.user import User
+from app.utils.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache(unittest.TestCase):
+    def test_entries_expire(self):
+        clock = FakeClock()
+        cache = TTLCache(max_entries=10, ttl_seconds=5, clock=clock)
+        cache.set("a", 1)
+
+        clock.now = 4.9
+        self.assertEqual(cache.get("a"), 1)
+        clock.now = 5
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+    def test_least_recently_used_is_evicted(self):
+        cache = TTLCache(max_entries=2, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.pop("c"), 3)
+
+
+def loaded_row():
+    user = User(id=7, email="ana@example.com", hashed_password="hash", is_active=True)
+    profile = Profile(id=3, user_id=7, name="Ana", available_days=["Monday"])
+    preferences = Preferences(
+        id=5, profile_id=3, music_genres=["rock"], spotify_connected=True, spotify_data={"access_token": "a"}
+    )
+    return user, profile, preferences
+
+
+class TestPrincipalLoader(unittest.TestCase):
+    def setUp(self):
+        self.cache = PrincipalCache(max_entries=10, ttl_seconds=60)
+        patcher = patch('app.core.principal.principal_cache', self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_one_joined_query(self):
+        sql = str(principal_query("ana@example.com").compile(dialect=postgresql.dialect()))
+
+        self.assertIn("LEFT OUTER JOIN profiles", sql)
+        self.assertIn("LEFT OUTER JOIN preferences", sql)
+
+    def test_warm_principal_needs_no_query(self):
+        cold_db = MagicMock()
+        cold_db.execute.return_value.first.return_value = loaded_row()
+        cold = load_principal(cold_db, "ana@example.com")
+        cold_db.execute.assert_called_once()
+
+        warm_db = MagicMock()
+        warm = load_principal(warm_db, "ana@example.com")
+
+        warm_db.execute.assert_not_called()
+        self.assertEqual(warm.user.id, 7)
+        self.assertEqual(warm.preferences.spotify_data, {"access_token": "a"})
+        self.assertIsNot(warm.user, cold.user)
+        # Restored as persistent rows of the request's session, not new ones to insert
+        self.assertTrue(inspect(warm.profile).detached)
+        self.assertEqual(warm_db.add.call_count, 3)
+
+    def test_requests_do_not_share_mutable_values(self):
+        db = MagicMock()
+        db.execute.return_value.first.return_value = loaded_row()
+        load_principal(db, "ana@example.com")
+
+        load_principal(MagicMock(), "ana@example.com").profile.available_days.append("Friday")
+
+        self.assertEqual(load_principal(MagicMock(), "ana@example.com").profile.available_days, ["Monday"])
+
+    def test_invalidate_and_email_change(self):
+        db = MagicMock()
+        db.execute.return_value.first.return_value = loaded_row()
+        load_principal(db, "ana@example.com")
+
+        self.cache.invalidate(7)
+        load_principal(db, "ana@example.com")
+        self.assertEqual(db.execute.call_count, 2)
+
+        db.execute.return_value.first.return_value = None
+        self.assertIsNone(load_principal(db, "old@example.com"))
+
+
+class TestGetCurrentPrincipal(unittest.TestCase):
+    @patch('app.core.security.load_principal')
+    def test_unknown_user_is_rejected(self, mock_load):
+        mock_load.return_value = None
+        token = create_access_token({"sub": "ghost@example.com"})
+
+        with self.assertRaises(HTTPException) as raised:
+            get_current_principal(MagicMock(), token=token, db=MagicMock())
+
+        self.assertEqual(raised.exception.status_code, 401)
+
+
+if __name__ == '__main__':
+    unittest.main()
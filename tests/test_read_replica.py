@@ -0,0 +1,68 @@
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+import os
+import sys
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.session import ReadSession, RecentWriters
+
+
+def make_engine(name):
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE source (name TEXT)"))
+        conn.execute(text("INSERT INTO source VALUES (:name)"), {"name": name})
+    return engine
+
+
+class TestReadReplicaRouting(unittest.TestCase):
+    def setUp(self):
+        self.primary = make_engine("primary")
+        self.replica = make_engine("replica")
+        self.PrimarySession = sessionmaker(bind=self.primary)
+        self.ReadSessionLocal = sessionmaker(
+            class_=ReadSession, info={"primary": self.primary, "replica": self.replica}
+        )
+        self.recent_writers = RecentWriters(window_seconds=60)
+        patcher = patch('app.db.session.recent_writers', self.recent_writers)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def read_source(self, user_id):
+        request = SimpleNamespace(state=SimpleNamespace(user_id=user_id))
+        with self.ReadSessionLocal(info={"request": request}) as db:
+            return db.execute(text("SELECT name FROM source")).scalar()
+
+    def test_reads_go_to_the_replica(self):
+        self.assertEqual(self.read_source(user_id=1), "replica")
+        self.assertEqual(self.read_source(user_id=None), "replica")
+
+    def test_writer_reads_from_primary_within_window(self):
+        with self.PrimarySession(info={"user_id": 1}) as db:
+            db.execute(text("INSERT INTO source VALUES ('written')"))
+            db.commit()
+
+        self.assertEqual(self.read_source(user_id=1), "primary")
+        self.assertEqual(self.read_source(user_id=2), "replica")
+
+        self.recent_writers.window_seconds = 0
+        self.assertEqual(self.read_source(user_id=1), "replica")
+
+    def test_read_sessions_do_not_mark_writers(self):
+        request = SimpleNamespace(state=SimpleNamespace(user_id=1))
+        with self.ReadSessionLocal(info={"request": request, "user_id": 1}) as db:
+            db.execute(text("SELECT 1"))
+            db.commit()
+
+        self.assertFalse(self.recent_writers.is_sticky(1))
+
+
+if __name__ == '__main__':
+    unittest.main()
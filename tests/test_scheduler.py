@@ -0,0 +1,125 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import threading
+import time
+from datetime import datetime
+import os
+import sys
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.exercise import ExerciseService
+from app.services.http_cache import ResponseCache
+from app.services.scheduler import SchedulerService
+
+
+def generated_exercise(exercise_id, order):
+    return {
+        "exercise_id": exercise_id,
+        "name": f"Exercise {exercise_id}",
+        "description": ["Push"],
+        "muscle_group": "pectorals",
+        "equipment": "barbell",
+        "sets": 3,
+        "reps": "8-10",
+        "rest_seconds": 60,
+        "order": order,
+    }
+
+
+class TestSaveWeeklySchedule(unittest.TestCase):
+    def setUp(self):
+        self.db = MagicMock()
+        self.scheduler = SchedulerService(self.db)
+
+    def test_schedule_is_saved_with_a_fixed_number_of_statements(self):
+        self.db.execute.return_value.scalars.return_value = iter([10, 11])
+        workouts = [
+            {"user_id": 1, "date": datetime(2026, 10, 19), "focus": "Push", "duration_minutes": 60, "completed": False,
+             "exercises": [generated_exercise("0001", 1), generated_exercise("0002", 2), generated_exercise("0001", 3)]},
+            {"user_id": 1, "date": datetime(2026, 10, 21), "focus": "Pull", "duration_minutes": 60, "completed": False,
+             "exercises": [generated_exercise("0003", 1)]},
+        ]
+
+        workout_ids = self.scheduler.save_weekly_schedule(workouts, replace_workout_ids=[3, 4])
+
+        self.assertEqual(workout_ids, [10, 11])
+        # Delete, insert workouts, insert exercises
+        self.assertEqual(self.db.execute.call_count, 3)
+        self.db.commit.assert_called_once()
+        self.db.add.assert_not_called()
+
+        workout_rows = self.db.execute.call_args_list[1].args[1]
+        self.assertNotIn("exercises", workout_rows[0])
+        exercise_rows = self.db.execute.call_args_list[2].args[1]
+        self.assertEqual(
+            [(row["workout_id"], row["exercise_id"], row["order"]) for row in exercise_rows],
+            [(10, 1, 1), (10, 2, 2), (11, 3, 1)]
+        )
+        self.assertNotIn("name", exercise_rows[0])
+
+    def test_failed_save_is_rolled_back(self):
+        self.db.execute.side_effect = RuntimeError("connection lost")
+
+        with self.assertRaises(RuntimeError):
+            self.scheduler.save_weekly_schedule([], replace_workout_ids=[3])
+
+        self.db.rollback.assert_called_once()
+        self.db.commit.assert_not_called()
+
+
+class TestScheduleFanOut(unittest.TestCase):
+    def test_each_muscle_is_fetched_once(self):
+        scheduler = SchedulerService(MagicMock())
+        fetch = MagicMock(side_effect=lambda muscle: [generated_exercise(f"{muscle}-1", 1)])
+        days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+
+        with patch.object(ExerciseService, 'get_exercises_by_muscle_from_external_source', fetch):
+            workouts = scheduler.generate_weekly_schedule(
+                user_id=1,
+                available_days=days,
+                fitness_goal="muscle_gain",
+                fitness_level="beginner",
+                available_equipment=["barbell"],
+                target_muscle_groups=[],
+                workout_duration_minutes=60
+            )
+
+        self.assertEqual(len(workouts), 5)
+        fetched = [call.args[0] for call in fetch.call_args_list]
+        planned = [muscle for workout in workouts for muscle in scheduler._get_muscle_groups_for_focus(workout["focus"])]
+        self.assertEqual(sorted(fetched), sorted(set(planned)))
+        self.assertLess(len(fetched), len(planned))
+
+    @patch('app.services.exercise.requests.get')
+    def test_prefetch_respects_global_concurrency_cap(self, mock_get):
+        in_flight = []
+        peak = []
+        lock = threading.Lock()
+
+        def slow_get(url, headers=None, params=None):
+            with lock:
+                in_flight.append(url)
+                peak.append(len(in_flight))
+            time.sleep(0.02)
+            with lock:
+                in_flight.remove(url)
+            response = MagicMock()
+            response.json.return_value = [{"id": "0001", "target": url.rsplit("/", 1)[-1]}]
+            return response
+
+        mock_get.side_effect = slow_get
+        exercise_service = ExerciseService(MagicMock(), response_cache=ResponseCache("unused", mode="off"))
+        muscles = ["abs", "biceps", "calves", "delts", "glutes", "lats", "quads", "traps", "abs"]
+
+        with patch('app.services.exercise._external_request_slots', threading.BoundedSemaphore(2)):
+            result = exercise_service.prefetch_exercises_by_muscles_from_external_source(muscles)
+
+        self.assertEqual(set(result), set(muscles))
+        self.assertEqual(mock_get.call_count, 8)
+        self.assertLessEqual(max(peak), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import asyncio
+import unittest
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+import os
+import sys
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import HTTPException
+from jose import JWTError, jwt
+
+from app.api.endpoints.auth import login
+from app.core import security
+from app.core.security import (RevokedUsers, access_token_claims, create_access_token, decode_token,
+                               get_current_principal)
+from app.utils.cache import TTLCache
+
+
+class TestDecodeTokenCache(unittest.TestCase):
+    def setUp(self):
+        patcher = patch.object(security, '_verified_tokens', TTLCache(max_entries=10, ttl_seconds=0))
+        self.cache = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_token_is_verified_once(self):
+        token = create_access_token({"sub": "ana@example.com", "uid": 7}, timedelta(minutes=5))
+
+        with patch('app.core.security.jwt.decode', wraps=jwt.decode) as verify:
+            first = decode_token(token)
+            second = decode_token(token)
+
+        self.assertEqual(verify.call_count, 1)
+        self.assertEqual(first, second)
+        self.assertEqual(second["uid"], 7)
+
+    def test_cache_entry_expires_with_the_token(self):
+        token = create_access_token({"sub": "ana@example.com"}, timedelta(minutes=5))
+        decode_token(token)
+
+        _, (expires_at, _) = next(iter(self.cache._entries.items()))
+        self.assertAlmostEqual(expires_at - self.cache._clock(), 300, delta=2)
+
+    def test_invalid_tokens_are_not_cached(self):
+        with self.assertRaises(JWTError):
+            decode_token(create_access_token({"sub": "ana@example.com"})[:-2])
+        with self.assertRaises(JWTError):
+            decode_token(create_access_token({"sub": "ana@example.com"}, timedelta(minutes=-1)))
+
+        self.assertEqual(len(self.cache), 0)
+
+
+class TestStatelessClaims(unittest.TestCase):
+    def setUp(self):
+        patcher = patch.object(security, 'revoked_users', RevokedUsers(ttl_seconds=60))
+        self.revoked_users = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_claims_carry_id_and_status(self):
+        user = MagicMock(id=7, email="ana@example.com", is_active=True)
+
+        self.assertEqual(access_token_claims(user), {"sub": "ana@example.com", "uid": 7, "active": True})
+
+    @patch('app.core.security.load_principal')
+    def test_revoked_user_is_rejected_without_lookup(self, mock_load):
+        token = create_access_token(access_token_claims(MagicMock(id=7, email="ana@example.com", is_active=True)))
+        self.revoked_users.revoke(7)
+
+        with self.assertRaises(HTTPException) as raised:
+            get_current_principal(MagicMock(), token=token, db=MagicMock())
+
+        self.assertEqual(raised.exception.status_code, 400)
+        mock_load.assert_not_called()
+
+        self.revoked_users.restore(7)
+        get_current_principal(MagicMock(), token=token, db=MagicMock())
+        self.assertEqual(mock_load.call_args.kwargs["user_id"], 7)
+
+    @patch('app.core.security.load_principal')
+    def test_deactivated_user_is_revoked_once_seen(self, mock_load):
+        mock_load.return_value.user = MagicMock(id=8, is_active=False)
+        token = create_access_token({"sub": "bo@example.com", "uid": 8, "active": True})
+
+        with self.assertRaises(HTTPException):
+            get_current_principal(MagicMock(), token=token, db=MagicMock())
+
+        self.assertIn(8, self.revoked_users)
+
+    @patch('app.core.security.load_principal')
+    def test_reactivated_user_is_let_through_again(self, mock_load):
+        user = MagicMock(id=8, email="bo@example.com", is_active=False)
+        mock_load.return_value.user = user
+        token = create_access_token(access_token_claims(MagicMock(id=8, email="bo@example.com", is_active=True)))
+
+        with self.assertRaises(HTTPException):
+            get_current_principal(MagicMock(), token=token, db=MagicMock())
+
+        # Reactivated in the database: rejected before the lookup until the entry expires or they log in
+        user.is_active = True
+        with self.assertRaises(HTTPException):
+            get_current_principal(MagicMock(), token=token, db=MagicMock())
+
+        with patch('app.api.endpoints.auth.revoked_users', self.revoked_users):
+            login_with_password(user)
+        self.assertEqual(get_current_principal(MagicMock(), token=token, db=MagicMock()).user, user)
+
+    def test_revocations_expire(self):
+        clock = MagicMock(return_value=0.0)
+        revoked = RevokedUsers(ttl_seconds=60, clock=clock)
+        revoked.revoke(8)
+
+        clock.return_value = 59.9
+        self.assertIn(8, revoked)
+        clock.return_value = 60
+        self.assertNotIn(8, revoked)
+
+    @patch('app.core.security.load_principal')
+    def test_active_user_is_restored_once_seen(self, mock_load):
+        mock_load.return_value.user = MagicMock(id=8, is_active=True)
+        self.revoked_users.revoke(8)
+        token = create_access_token({"sub": "bo@example.com"})
+
+        get_current_principal(MagicMock(), token=token, db=MagicMock())
+
+        self.assertNotIn(8, self.revoked_users)
+
+
+def login_with_password(user):
+    db = AsyncMock()
+    db.scalar.return_value = user
+    form = MagicMock(username=user.email, password="secret")
+    with patch('app.api.endpoints.auth.password_hasher') as mock_hasher:
+        mock_hasher.verify_and_update_async = AsyncMock(return_value=(True, None))
+        return asyncio.run(login(form, db=db))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,21 +1,64 @@
+import asyncio
+import threading
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import MagicMock, patch
 import json
 import os
 import sys
+from urllib.parse import parse_qs
 
 # Add the parent directory to the path so we can import the app modules
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from app.services.spotify import SpotifyService
+import httpx
+
+from app.services import spotify
+from app.services.playlist_selector import PlaylistSelectorService
+from app.services.spotify import SpotifyService, SyncSpotifyService
 from app.core.config import settings
 
-class TestSpotifyService(unittest.TestCase):
+
+class SpotifyStub:
+    """
+    MockTransport handler recording requests and answering with canned JSON.
+    """
+
+    def __init__(self, responses=None):
+        self.responses = responses or {}
+        self.requests = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        return httpx.Response(200, json=self.responses.get(request.url.path, {}))
+
+    def client(self):
+        return httpx.AsyncClient(transport=httpx.MockTransport(self))
+
+
+class TestSpotifyService(unittest.IsolatedAsyncioTestCase):
     def setUp(self):
-        self.spotify_service = SpotifyService()
+        self.stub = SpotifyStub({
+            "/api/token": {
+                "access_token": "test_access_token",
+                "token_type": "Bearer",
+                "expires_in": 3600,
+                "refresh_token": "test_refresh_token"
+            },
+            "/v1/me": {
+                "id": "test_user_id",
+                "display_name": "Test User",
+                "email": "test@example.com"
+            },
+            "/v1/recommendations": {"tracks": [{"id": "t1", "uri": "spotify:track:t1"}]},
+        })
+        self.client = self.stub.client()
+        self.spotify_service = SpotifyService(client=self.client)
         self.test_code = "test_code"
         self.test_redirect_uri = "http://localhost:8000/callback"
-    
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
     def test_get_auth_url(self):
         # Test without state
         auth_url = self.spotify_service.get_auth_url(self.test_redirect_uri)
@@ -23,93 +66,118 @@ class TestSpotifyService(unittest.TestCase):
         self.assertIn("response_type=code", auth_url)
         self.assertIn(f"redirect_uri={self.test_redirect_uri}", auth_url)
         self.assertIn("scope=", auth_url)
-        
+
         # Test with state
         state = "test_state"
         auth_url_with_state = self.spotify_service.get_auth_url(self.test_redirect_uri, state)
         self.assertIn(f"state={state}", auth_url_with_state)
-    
-    @patch('requests.post')
-    def test_get_access_token(self, mock_post):
-        # Mock the response from the Spotify API
-        mock_response = MagicMock()
-        mock_response.json.return_value = {
-            "access_token": "test_access_token",
-            "token_type": "Bearer",
-            "expires_in": 3600,
-            "refresh_token": "test_refresh_token"
-        }
-        mock_post.return_value = mock_response
-        
-        # Call the method
-        result = self.spotify_service.get_access_token(self.test_code, self.test_redirect_uri)
-        
+
+    async def test_get_access_token(self):
+        result = await self.spotify_service.get_access_token(self.test_code, self.test_redirect_uri)
+
         # Check the result
         self.assertEqual(result["access_token"], "test_access_token")
         self.assertEqual(result["token_type"], "Bearer")
         self.assertEqual(result["expires_in"], 3600)
         self.assertEqual(result["refresh_token"], "test_refresh_token")
-        
-        # Check that the request was made correctly
-        mock_post.assert_called_once()
-        args, kwargs = mock_post.call_args
-        self.assertEqual(args[0], "https://accounts.spotify.com/api/token")
-        self.assertIn("Authorization", kwargs["headers"])
-        self.assertEqual(kwargs["data"]["grant_type"], "authorization_code")
-        self.assertEqual(kwargs["data"]["code"], self.test_code)
-        self.assertEqual(kwargs["data"]["redirect_uri"], self.test_redirect_uri)
-    
-    @patch('requests.post')
-    def test_refresh_access_token(self, mock_post):
-        # Mock the response from the Spotify API
-        mock_response = MagicMock()
-        mock_response.json.return_value = {
-            "access_token": "new_access_token",
-            "token_type": "Bearer",
-            "expires_in": 3600
-        }
-        mock_post.return_value = mock_response
-        
-        # Call the method
-        result = self.spotify_service.refresh_access_token("test_refresh_token")
-        
-        # Check the result
-        self.assertEqual(result["access_token"], "new_access_token")
-        self.assertEqual(result["token_type"], "Bearer")
-        self.assertEqual(result["expires_in"], 3600)
-        
+
         # Check that the request was made correctly
-        mock_post.assert_called_once()
-        args, kwargs = mock_post.call_args
-        self.assertEqual(args[0], "https://accounts.spotify.com/api/token")
-        self.assertIn("Authorization", kwargs["headers"])
-        self.assertEqual(kwargs["data"]["grant_type"], "refresh_token")
-        self.assertEqual(kwargs["data"]["refresh_token"], "test_refresh_token")
-    
-    @patch('requests.get')
-    def test_get_user_profile(self, mock_get):
-        # Mock the response from the Spotify API
-        mock_response = MagicMock()
-        mock_response.json.return_value = {
-            "id": "test_user_id",
-            "display_name": "Test User",
-            "email": "test@example.com"
-        }
-        mock_get.return_value = mock_response
-        
-        # Call the method
-        result = self.spotify_service.get_user_profile("test_access_token")
-        
+        request, = self.stub.requests
+        form = parse_qs(request.content.decode())
+        self.assertEqual(str(request.url), "https://accounts.spotify.com/api/token")
+        self.assertTrue(request.headers["Authorization"].startswith("Basic "))
+        self.assertEqual(form["grant_type"], ["authorization_code"])
+        self.assertEqual(form["code"], [self.test_code])
+        self.assertEqual(form["redirect_uri"], [self.test_redirect_uri])
+
+    async def test_refresh_access_token(self):
+        result = await self.spotify_service.refresh_access_token("test_refresh_token")
+
+        self.assertEqual(result["access_token"], "test_access_token")
+
+        request, = self.stub.requests
+        form = parse_qs(request.content.decode())
+        self.assertEqual(str(request.url), "https://accounts.spotify.com/api/token")
+        self.assertEqual(form["grant_type"], ["refresh_token"])
+        self.assertEqual(form["refresh_token"], ["test_refresh_token"])
+
+    async def test_get_user_profile(self):
+        result = await self.spotify_service.get_user_profile("test_access_token")
+
         # Check the result
         self.assertEqual(result["id"], "test_user_id")
         self.assertEqual(result["display_name"], "Test User")
         self.assertEqual(result["email"], "test@example.com")
-        
+
         # Check that the request was made correctly
-        mock_get.assert_called_once()
-        args, kwargs = mock_get.call_args
-        self.assertEqual(args[0], "https://api.spotify.com/v1/me")
-        self.assertEqual(kwargs["headers"]["Authorization"], "Bearer test_access_token")
+        request, = self.stub.requests
+        self.assertEqual(str(request.url), "https://api.spotify.com/v1/me")
+        self.assertEqual(request.headers["Authorization"], "Bearer test_access_token")
+        self.assertEqual(request.extensions["timeout"]["read"], settings.SPOTIFY_TIMEOUT_SECONDS)
+
+    async def test_get_recommendations(self):
+        result = await self.spotify_service.get_recommendations(
+            "test_access_token", seed_genres=["rock", "pop"], limit=5, target_tempo=130
+        )
+
+        self.assertEqual(result["tracks"][0]["id"], "t1")
+        params = self.stub.requests[0].url.params
+        self.assertEqual(params["seed_genres"], "rock,pop")
+        self.assertEqual(params["limit"], "5")
+        self.assertEqual(params["target_tempo"], "130")
+        self.assertNotIn("target_energy", params)
+
+    async def test_requests_share_one_client(self):
+        await self.spotify_service.get_user_profile("a")
+        await SpotifyService(client=self.client).get_user_profile("b")
+
+        self.assertEqual(len(self.stub.requests), 2)
+        self.assertFalse(self.client.is_closed)
+
+
+class TestSyncSpotifyService(unittest.TestCase):
+    def test_runs_on_the_loop_that_owns_the_client(self):
+        stub = SpotifyStub({"/v1/me": {"id": "test_user_id"}})
+        loop = asyncio.new_event_loop()
+        loop_thread = threading.Thread(target=loop.run_forever, daemon=True)
+        loop_thread.start()
+        self.addCleanup(loop.close)
+        client = stub.client()
+
+        with patch.object(spotify, '_client_loop', loop):
+            facade = SyncSpotifyService(SpotifyService(client=client))
+            self.assertEqual(facade.get_user_profile("test_access_token")["id"], "test_user_id")
+
+        asyncio.run_coroutine_threadsafe(client.aclose(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        loop_thread.join()
+
+    def test_without_a_running_app_uses_its_own_client(self):
+        stub = SpotifyStub({"/v1/me/playlists": {"items": []}})
+        original = httpx.AsyncClient
+
+        with patch('app.services.spotify.httpx.AsyncClient', lambda **kwargs: original(transport=httpx.MockTransport(stub))):
+            result = SyncSpotifyService().get_user_playlists("test_access_token", limit=3)
+
+        self.assertEqual(result, {"items": []})
+        self.assertEqual(stub.requests[0].url.params["limit"], "3")
+
+    def test_playlist_selector_uses_recommendations(self):
+        facade = MagicMock()
+        facade.get_recommendations.return_value = {"tracks": [{"uri": "spotify:track:t1"}]}
+        facade.get_user_profile.return_value = {"id": "test_user_id"}
+        facade.create_playlist.return_value = {"id": "p1", "name": "Push Workout Mix", "description": ""}
+
+        playlist = PlaylistSelectorService(spotify_service=facade).select_playlist_for_workout(
+            "test_access_token", "Push", ["rock"], "fast"
+        )
+
+        self.assertEqual(playlist["id"], "p1")
+        self.assertEqual(facade.get_recommendations.call_args.kwargs["target_tempo"], 160)
+        facade.add_tracks_to_playlist.assert_called_once_with(
+            access_token="test_access_token", playlist_id="p1", track_uris=["spotify:track:t1"]
+        )
+
 
 if __name__ == '__main__':
     unittest.main()
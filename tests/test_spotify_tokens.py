@@ -0,0 +1,156 @@
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+import os
+import sys
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import httpx
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+
+from app.models.preferences import Preferences
+from app.services.spotify_tokens import SpotifyTokenManager, spotify_token_fields
+
+NOW = 1_000_000.0
+
+
+class FakeStore:
+    """
+    Session factory over one stored spotify_data document, applying the merge updates.
+    """
+
+    def __init__(self, spotify_data):
+        self.spotify_data = dict(spotify_data)
+        self.updates = []
+        self.reads = []
+        self.sessions = []
+
+    def __call__(self):
+        db = MagicMock()
+        self.sessions.append(db)
+
+        def scalar(stmt):
+            self.reads.append(stmt)
+            return dict(self.spotify_data)
+
+        db.scalar.side_effect = scalar
+
+        def execute(stmt):
+            self.updates.append(stmt)
+            merged, = [value for value in stmt.compile().params.values() if value and isinstance(value, dict)]
+            self.spotify_data.update(merged)
+
+        db.execute.side_effect = execute
+        return db
+
+
+def manager(store, refresh):
+    spotify_service = MagicMock()
+    spotify_service.refresh_access_token.side_effect = refresh
+    return SpotifyTokenManager(
+        spotify_service=spotify_service, refresh_margin_seconds=300, clock=lambda: NOW, session_factory=store
+    )
+
+
+def preferences_with(spotify_data):
+    return Preferences(id=5, profile_id=3, spotify_connected=True, spotify_data=dict(spotify_data))
+
+
+class TestSpotifyTokenFields(unittest.TestCase):
+    def test_records_absolute_expiry(self):
+        fields = spotify_token_fields({"access_token": "a", "expires_in": 3600, "token_type": "Bearer"}, now=NOW)
+
+        self.assertEqual(fields["expires_at"], NOW + 3600)
+        # Refresh responses usually omit it, the stored one must be kept
+        self.assertNotIn("refresh_token", fields)
+
+
+class TestSpotifyTokenManager(unittest.TestCase):
+    def setUp(self):
+        patcher = patch('app.services.spotify_tokens.principal_cache')
+        self.principal_cache = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_fresh_token_is_used_as_is(self):
+        store = FakeStore({})
+        tokens = manager(store, refresh=None)
+        preferences = preferences_with({"access_token": "a", "refresh_token": "r", "expires_at": NOW + 301})
+
+        self.assertEqual(tokens.get_access_token(7, preferences), "a")
+        tokens.spotify_service.refresh_access_token.assert_not_called()
+
+    def test_token_close_to_expiry_is_refreshed_and_merged(self):
+        stored = {"access_token": "a", "refresh_token": "r", "expires_at": NOW + 60, "scope": "kept"}
+        store = FakeStore(stored)
+        tokens = manager(store, refresh=lambda token: {"access_token": "b", "expires_in": 3600})
+        preferences = preferences_with(stored)
+
+        self.assertEqual(tokens.get_access_token(7, preferences), "b")
+
+        tokens.spotify_service.refresh_access_token.assert_called_once_with("r")
+        self.assertEqual(store.spotify_data["refresh_token"], "r")
+        self.assertEqual(store.spotify_data["scope"], "kept")
+        self.assertEqual(preferences.spotify_data["expires_at"], NOW + 3600)
+        self.principal_cache.invalidate.assert_called_once_with(7)
+
+        sql = str(store.updates[0].compile(dialect=postgresql.dialect()))
+        self.assertIn("coalesce(preferences.spotify_data", sql)
+        self.assertIn("||", sql)
+        # Other worker processes wait on the row until the refresh is committed
+        self.assertTrue(str(store.reads[0].compile(dialect=postgresql.dialect())).endswith("FOR UPDATE"))
+
+    def test_concurrent_requests_refresh_once(self):
+        stored = {"access_token": "a", "refresh_token": "r"}  # Stored before expiry was recorded
+        store = FakeStore(stored)
+
+        def slow_refresh(token):
+            time.sleep(0.05)
+            return {"access_token": "b", "expires_in": 3600}
+
+        tokens = manager(store, refresh=slow_refresh)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(lambda _: tokens.get_access_token(7, preferences_with(stored)), range(4)))
+
+        self.assertEqual(results, ["b"] * 4)
+        self.assertEqual(tokens.spotify_service.refresh_access_token.call_count, 1)
+        self.assertEqual(len(store.updates), 1)
+
+    def test_refused_refresh_is_reported(self):
+        store = FakeStore({"access_token": "a", "refresh_token": "r", "expires_at": NOW - 1})
+        tokens = manager(store, refresh=lambda token: {"error": "invalid_grant"})
+
+        with self.assertRaises(HTTPException) as raised:
+            tokens.get_access_token(7, preferences_with(store.spotify_data))
+
+        self.assertEqual(raised.exception.status_code, 400)
+        self.assertEqual(store.updates, [])
+
+    def test_refresh_timeout_releases_the_row(self):
+        store = FakeStore({"access_token": "a", "refresh_token": "r", "expires_at": NOW - 1})
+
+        def timed_out(token):
+            raise httpx.ReadTimeout("timed out")
+
+        tokens = manager(store, refresh=timed_out)
+
+        with self.assertRaises(HTTPException) as raised:
+            tokens.get_access_token(7, preferences_with(store.spotify_data))
+
+        self.assertEqual(raised.exception.status_code, 503)
+        self.assertEqual(store.updates, [])
+        store.sessions[0].close.assert_called_once()
+
+    def test_default_refresh_call_uses_the_short_timeout(self):
+        with patch('app.services.spotify_tokens.settings') as mock_settings:
+            mock_settings.SPOTIFY_TOKEN_REFRESH_TIMEOUT_SECONDS = 3
+            tokens = SpotifyTokenManager(refresh_margin_seconds=300)
+
+        self.assertEqual(tokens.spotify_service.service.timeout, httpx.Timeout(3))
+
+
+if __name__ == '__main__':
+    unittest.main()
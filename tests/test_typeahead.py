@@ -0,0 +1,68 @@
+import unittest
+from unittest.mock import MagicMock
+import os
+import sys
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models.workout import Exercise
+from app.services.exercise_catalog import CatalogExercise, ExerciseCatalog
+from app.services.typeahead import ExerciseTypeahead, TypeaheadIndex, prefix_edit_distance
+
+CATALOG_ROWS = [
+    Exercise(id=1, name="Barbell Bench Press", target="pectorals", equipment="barbell"),
+    Exercise(id=2, name="Dumbbell Bench Press", target="pectorals", equipment="dumbbell"),
+    Exercise(id=3, name="Barbell Curl", target="biceps", equipment="barbell"),
+    Exercise(id=4, name="Push-up", target="pectorals", equipment="body weight"),
+    Exercise(id=5, name="Bent Over Row", target="upper back", equipment="barbell"),
+]
+
+
+class TestTypeaheadIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = TypeaheadIndex([CatalogExercise(ex) for ex in CATALOG_ROWS], version=0)
+
+    def suggest_ids(self, query, limit=10):
+        return [(exercise.id, typos) for exercise, typos in self.index.suggest(query, limit=limit)]
+
+    def test_prefix_matches_words_in_any_order(self):
+        self.assertEqual(self.suggest_ids("ben"), [(5, 0), (1, 0), (2, 0)])
+        self.assertEqual(self.suggest_ids("press bar"), [(1, 0)])
+        self.assertEqual(self.suggest_ids("push up"), [(4, 0)])
+        self.assertEqual(self.suggest_ids("ben", limit=1), [(5, 0)])
+
+    def test_typos_are_tolerated(self):
+        self.assertEqual(self.suggest_ids("dumbell bench"), [(2, 1)])
+        self.assertEqual(self.suggest_ids("barbel cuel"), [(3, 1)])
+        self.assertEqual(self.suggest_ids("bemch prss"), [(1, 2), (2, 2)])
+
+    def test_short_tokens_are_prefix_only(self):
+        self.assertEqual(self.suggest_ids("bx"), [])
+        self.assertEqual(self.suggest_ids(""), [])
+        self.assertEqual(self.suggest_ids("squat"), [])
+
+    def test_prefix_edit_distance(self):
+        self.assertEqual(prefix_edit_distance("bech", "bench", 1), 1)
+        self.assertEqual(prefix_edit_distance("benchh", "bench", 1), 1)
+        self.assertEqual(prefix_edit_distance("curl", "bench", 2), 3)
+
+
+class TestExerciseTypeahead(unittest.TestCase):
+    def test_index_is_rebuilt_when_catalog_changes(self):
+        db = MagicMock()
+        db.query.return_value.filter.return_value.order_by.return_value.all.return_value = CATALOG_ROWS
+        catalog = ExerciseCatalog()
+        typeahead = ExerciseTypeahead(catalog)
+
+        first = typeahead.get(db)
+        self.assertIs(typeahead.get(db), first)
+
+        catalog.invalidate()
+        rebuilt = typeahead.get(db)
+        self.assertIsNot(rebuilt, first)
+        self.assertEqual(rebuilt.version, catalog.version)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,206 @@
+import io
+import unittest
+from unittest.mock import MagicMock, patch
+import os
+import sys
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import OperationalError
+
+from app.api.endpoints.users import router
+from app.core.config import settings
+from app.core.passwords import password_hasher
+from app.core.security import get_current_principal
+from app.db.session import get_db
+from app.services.user_import import UserImportService, detect_format, import_password_hasher, read_rows
+
+
+def fake_hasher():
+    hasher = MagicMock()
+    hasher.hash_many.side_effect = lambda passwords: [f"hashed:{password}" for password in passwords]
+    return hasher
+
+
+def fake_db(existing=(), conflicting=()):
+    """
+    A session where the given emails are already registered, and the conflicting
+    ones get registered between the lookup and the insert. Inserted profiles get
+    ids from 11 on, one per row.
+    """
+    db = MagicMock()
+    db.scalars.side_effect = lambda stmt, *args: (
+        MagicMock(all=MagicMock(return_value=[11 + index for index, _ in enumerate(args[0])]))
+        if args else iter(existing)
+    )
+
+    def execute(stmt, rows=None):
+        result = MagicMock()
+        result.all.return_value = [
+            (row["email"], index) for index, row in enumerate(rows or [], start=1)
+            if "email" in row and row["email"] not in conflicting
+        ]
+        return result
+
+    db.execute.side_effect = execute
+    return db
+
+
+class TestReadRows(unittest.TestCase):
+    def test_ndjson_keeps_line_numbers_and_bad_lines(self):
+        stream = io.StringIO('{"email": "a@example.com", "password": "x"}\n\nnot json\n')
+
+        rows = list(read_rows(stream, "ndjson"))
+
+        self.assertEqual(rows[0], (1, {"email": "a@example.com", "password": "x"}))
+        self.assertEqual(rows[1][0], 3)
+        self.assertTrue(rows[1][1].startswith("Invalid JSON"))
+
+    def test_csv_drops_empty_cells(self):
+        stream = io.StringIO("email,password,name\na@example.com,x,\nb@example.com,y,Bo\n")
+
+        rows = list(read_rows(stream, "csv"))
+
+        self.assertEqual(rows, [
+            (2, {"email": "a@example.com", "password": "x"}),
+            (3, {"email": "b@example.com", "password": "y", "name": "Bo"}),
+        ])
+        self.assertEqual(detect_format("users.CSV"), "csv")
+        self.assertEqual(detect_format("users.jsonl"), "ndjson")
+
+
+class TestUserImportService(unittest.TestCase):
+    def test_chunks_are_hashed_together_and_inserted_in_sets(self):
+        db = fake_db()
+        hasher = fake_hasher()
+        rows = [
+            (1, {"email": "a@example.com", "password": "1", "name": "Ana"}),
+            (2, {"email": "b@example.com", "password": "2"}),
+            (3, {"email": "c@example.com", "password": "3", "name": "Cy"}),
+        ]
+
+        report = UserImportService(db, hasher=hasher, chunk_size=2).import_users(rows)
+
+        self.assertEqual((report["received"], report["imported"], report["failed"]), (3, 3, 0))
+        self.assertEqual([call.args[0] for call in hasher.hash_many.call_args_list], [["1", "2"], ["3"]])
+        self.assertEqual(db.commit.call_count, 2)
+        self.assertIn("rows_per_second", report)
+
+        user_stmt, user_rows = db.execute.call_args_list[0].args
+        self.assertIn("ON CONFLICT (email) DO NOTHING", str(user_stmt.compile(dialect=postgresql.dialect())))
+        self.assertEqual(user_rows[0]["hashed_password"], "hashed:1")
+        # Only named users get a profile, each profile gets preferences
+        profile_rows = db.scalars.call_args_list[1].args[1]
+        self.assertEqual(profile_rows, [{"user_id": 1, "name": "Ana"}])
+        preferences_rows = db.execute.call_args_list[1].args[1]
+        self.assertEqual(preferences_rows, [{"profile_id": 11}])
+        self.assertEqual(len(preferences_rows), len(profile_rows))
+
+    def test_per_row_errors(self):
+        db = fake_db(existing=["taken@example.com"], conflicting=["raced@example.com"])
+        hasher = fake_hasher()
+        rows = [
+            (1, {"email": "not-an-email", "password": "x"}),
+            (2, {"email": "a@example.com", "password": "x"}),
+            (3, {"email": "a@example.com", "password": "y"}),
+            (4, {"email": "taken@example.com", "password": "x"}),
+            (5, {"email": "raced@example.com", "password": "x"}),
+            (6, "Invalid JSON: Expecting value"),
+        ]
+
+        report = UserImportService(db, hasher=hasher, chunk_size=10).import_users(rows)
+
+        self.assertEqual(report["imported"], 1)
+        self.assertEqual({error["row"]: error["error"] for error in report["errors"] if error["row"] != 1}, {
+            3: "Duplicate email in import",
+            4: "Email already registered",
+            5: "Email already registered",
+            6: "Invalid JSON: Expecting value",
+        })
+        self.assertIn("email", report["errors"][0]["error"])
+        # Already registered users are not hashed
+        self.assertEqual(hasher.hash_many.call_args.args[0], ["x", "x"])
+
+    def test_failed_chunk_is_rolled_back_and_reported(self):
+        db = fake_db()
+        db.execute.side_effect = OperationalError("INSERT", {}, Exception("connection lost"))
+
+        report = UserImportService(db, hasher=fake_hasher()).import_users([
+            (1, {"email": "a@example.com", "password": "x"}),
+        ])
+
+        self.assertEqual((report["imported"], report["failed"]), (0, 1))
+        self.assertEqual(report["errors"][0]["error"], "Database error: OperationalError")
+        db.rollback.assert_called_once()
+        db.commit.assert_not_called()
+
+    def test_busy_hasher_fails_only_its_chunk(self):
+        db = fake_db()
+        hasher = fake_hasher()
+        hasher.hash_many.side_effect = [
+            HTTPException(status_code=503, detail="Too many password operations in progress"),
+            ["hashed:2"],
+        ]
+
+        report = UserImportService(db, hasher=hasher, chunk_size=1).import_users([
+            (1, {"email": "a@example.com", "password": "1"}),
+            (2, {"email": "b@example.com", "password": "2"}),
+        ])
+
+        self.assertEqual((report["imported"], report["failed"]), (1, 1))
+        self.assertEqual(report["errors"], [{
+            "row": 1,
+            "email": "a@example.com",
+            "error": "Password hashing unavailable: Too many password operations in progress",
+        }])
+        self.assertEqual(db.commit.call_count, 1)
+
+
+class TestImportEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.principal = MagicMock()
+        app = FastAPI()
+        app.include_router(router, prefix="/users")
+        app.dependency_overrides[get_current_principal] = lambda: self.principal
+        app.dependency_overrides[get_db] = lambda: fake_db()
+        self.client = TestClient(app)
+        patcher = patch.object(settings, 'ADMIN_EMAILS', ["Admin@example.com"])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def upload(self):
+        return self.client.post(
+            "/users/import", files={"file": ("users.ndjson", b'{"email": "a@example.com", "password": "x"}\n')}
+        )
+
+    @patch('app.services.user_import.UserImportService')
+    def test_non_admin_is_forbidden(self, mock_service):
+        self.principal.user.email = "ana@example.com"
+
+        response = self.upload()
+
+        self.assertEqual(response.status_code, 403)
+        mock_service.assert_not_called()
+
+    @patch('app.services.user_import.UserImportService')
+    def test_admin_imports_on_the_import_pool(self, mock_service):
+        self.principal.user.email = "admin@example.com"
+        mock_service.return_value.import_users.return_value = {
+            "received": 1, "imported": 1, "failed": 0, "errors": [], "elapsed_seconds": 0.1, "rows_per_second": 10.0,
+        }
+
+        response = self.upload()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["imported"], 1)
+        hasher = mock_service.call_args.kwargs["hasher"]
+        self.assertIs(hasher, import_password_hasher)
+        self.assertIsNot(hasher, password_hasher)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+from unittest.mock import MagicMock
+import os
+import sys
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+
+from app.api.endpoints.workouts import update_workout_exercises_progress
+from app.schemas.exercise import WorkoutExerciseProgress
+
+
+def returned_row(exercise_id, order, completed_sets):
+    return {
+        "workout_id": 5,
+        "exercise_id": exercise_id,
+        "sets": 3,
+        "reps": "8-10",
+        "order": order,
+        "rest_seconds": 60,
+        "completed_sets": completed_sets,
+        "weights_used": ["20kg"],
+        "exercise__id": exercise_id,
+        "exercise__name": f"Exercise {exercise_id}",
+        "exercise__body_part": "chest",
+        "exercise__target": "pectorals",
+        "exercise__secondary_muscles": ["triceps"],
+        "exercise__equipment": "barbell",
+        "exercise__gif_url": None,
+        "exercise__instructions": ["Push"],
+    }
+
+
+class TestBulkProgressUpdate(unittest.TestCase):
+    def setUp(self):
+        self.db = MagicMock()
+        self.user = MagicMock(id=3)
+        self.progress = [
+            WorkoutExerciseProgress(exercise_id=2, completed_sets=3),
+            WorkoutExerciseProgress(exercise_id=1, weights_used=["20kg"]),
+        ]
+
+    def test_single_statement_updates_and_returns_rows(self):
+        self.db.execute.return_value.mappings.return_value.all.return_value = [
+            returned_row(2, 2, 3), returned_row(1, 1, 0)
+        ]
+
+        result = update_workout_exercises_progress(5, self.progress, self.user, self.db)
+
+        self.db.execute.assert_called_once()
+        self.db.commit.assert_called_once()
+        self.assertEqual([exercise.exercise.id for exercise in result], [1, 2])
+        self.assertEqual(result[1].completed_sets, 3)
+
+        sql = str(self.db.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+        self.assertIn("FROM (VALUES", sql)
+        self.assertIn("EXISTS", sql)
+        self.assertIn("RETURNING", sql)
+
+    def test_missing_exercise_rolls_back_everything(self):
+        self.db.execute.return_value.mappings.return_value.all.return_value = [returned_row(2, 2, 3)]
+
+        with self.assertRaises(HTTPException) as raised:
+            update_workout_exercises_progress(5, self.progress, self.user, self.db)
+
+        self.assertEqual(raised.exception.status_code, 404)
+        self.db.rollback.assert_called_once()
+        self.db.commit.assert_not_called()
+
+    def test_duplicate_exercises_are_rejected(self):
+        with self.assertRaises(HTTPException) as raised:
+            update_workout_exercises_progress(5, self.progress + self.progress[:1], self.user, self.db)
+
+        self.assertEqual(raised.exception.status_code, 400)
+        self.db.execute.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import os
+import sys
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.api.endpoints.workouts import swap_workout_exercise
+from app.core.principal import Principal
+from app.models.workout import Exercise
+
+
+class TestSwapWorkoutExercise(unittest.TestCase):
+    @patch('app.api.endpoints.workouts.ExerciseSelectorService')
+    @patch('app.api.endpoints.workouts.exercise_catalog')
+    def test_deactivated_exercise_can_still_be_swapped(self, mock_catalog, mock_selector):
+        mock_catalog.get.return_value.get_exercise_by_id.return_value = None
+        db = MagicMock()
+        db.get.return_value = Exercise(id=9, target="pectorals", equipment="barbell", is_active=False)
+        db.query.return_value.filter.return_value.all.return_value = []
+        mock_selector.return_value.swap_exercise.return_value = MagicMock()
+        principal = Principal(MagicMock(id=3), MagicMock(), MagicMock(available_equipment=["barbell"]))
+
+        swap_workout_exercise(5, 9, current_user=principal.user, principal=principal, db=db)
+
+        db.get.assert_called_once_with(Exercise, 9)
+        kwargs = mock_selector.return_value.swap_exercise.call_args.kwargs
+        self.assertEqual((kwargs["muscle_group"], kwargs["equipment"]), ("pectorals", "barbell"))
+        db.commit.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()